@@ -1,15 +1,25 @@
 """
 JWT Authentication Middleware
 Extracts user_id from Authorization header and injects into request.state.
+
+纯 ASGI 实现（不经过 BaseHTTPMiddleware 对响应的包装，SSE 等流式响应直接透传）。
+已验证的 token 按 sha256 缓存（LRU，条目在 token 的 exp 到期后失效），
+文件树轮询、SSE 重连等高频请求不再每次做 HMAC 校验。
 """
 import jwt
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
-from starlette.responses import JSONResponse
 import os
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Optional
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
 
 JWT_SECRET = os.environ.get("JWT_SECRET", "agentos-secret-key-change-me")
 JWT_ALGORITHM = "HS256"
+JWT_CACHE_SIZE = int(os.environ.get("JWT_CACHE_SIZE", "4096"))
 
 # Paths that don't require authentication
 PUBLIC_PATHS = [
@@ -21,40 +31,109 @@ PUBLIC_PATHS = [
 ]
 
 
-class JWTAuthMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        path = request.url.path
-        
+class VerifiedTokenCache:
+    """sha256(token) -> (user_id, username, exp)；LRU，过期条目在读取时丢弃"""
+
+    def __init__(self, max_size: int = JWT_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries: "OrderedDict[bytes, tuple[str, str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode("utf-8")).digest()
+
+    def get(self, token: str) -> Optional[tuple[str, str, float]]:
+        key = self._key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] > time.time():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, token: str, user_id: str, username: str, exp: float) -> None:
+        with self._lock:
+            self._entries[self._key(token)] = (user_id, username, exp)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"size": len(self._entries), "max_size": self.max_size,
+                    "hits": self.hits, "misses": self.misses}
+
+
+_token_cache = VerifiedTokenCache()
+
+
+def get_token_cache() -> VerifiedTokenCache:
+    return _token_cache
+
+
+def _verify(token: str) -> tuple[str, str]:
+    """返回 (user_id, username)；无效或过期时抛出 jwt.InvalidTokenError"""
+    cached = _token_cache.get(token)
+    if cached is not None:
+        return cached[0], cached[1]
+    payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
+    user_id, username = payload["user_id"], payload.get("username", "")
+    # 没有 exp 的 token 不缓存，始终走完整校验
+    if "exp" in payload:
+        _token_cache.put(token, user_id, username, float(payload["exp"]))
+    return user_id, username
+
+
+class JWTAuthMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        path = scope["path"]
+        method = scope["method"]
+
         # Skip auth for public paths
         if any(path == p or path.startswith(p + "/") for p in PUBLIC_PATHS):
-            return await call_next(request)
-        
+            return await self.app(scope, receive, send)
+
         # Also skip OPTIONS (CORS preflight)
-        if request.method == "OPTIONS":
-            return await call_next(request)
-        
+        if method == "OPTIONS":
+            return await self.app(scope, receive, send)
+
+        # request.state is backed by scope["state"]
+        state = scope.setdefault("state", {})
+
         # Extract token
-        auth_header = request.headers.get("Authorization", "")
-        
+        auth_header = Headers(scope=scope).get("Authorization", "")
+
         if auth_header.startswith("Bearer "):
             token = auth_header[7:]
             try:
-                payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
-                request.state.user_id = payload["user_id"]
-                request.state.username = payload.get("username", "")
+                state["user_id"], state["username"] = _verify(token)
             except jwt.ExpiredSignatureError:
-                return JSONResponse(status_code=401, content={"detail": "登录已过期，请重新登录"})
-            except jwt.InvalidTokenError:
-                return JSONResponse(status_code=401, content={"detail": "无效的登录凭证"})
-        elif request.method == "GET":
+                return await self._reject(scope, receive, send, "登录已过期，请重新登录")
+            except (jwt.InvalidTokenError, KeyError):
+                return await self._reject(scope, receive, send, "无效的登录凭证")
+        elif method == "GET":
             # Allow unauthenticated GET — read-only demo mode using _template data
-            request.state.user_id = "_template"
-            request.state.username = "guest"
+            state["user_id"] = "_template"
+            state["username"] = "guest"
         else:
             # POST/PUT/DELETE require auth
-            return JSONResponse(
-                status_code=401,
-                content={"detail": "请先登录后再操作"}
-            )
-        
-        return await call_next(request)
+            return await self._reject(scope, receive, send, "请先登录后再操作")
+
+        await self.app(scope, receive, send)
+
+    @staticmethod
+    async def _reject(scope: Scope, receive: Receive, send: Send, detail: str):
+        response = JSONResponse(status_code=401, content={"detail": detail})
+        await response(scope, receive, send)
@@ -5,11 +5,18 @@ import os
 import json
 import uuid
 import shutil
-import bcrypt
 import jwt
 from datetime import datetime, timedelta
+from typing import Optional
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
+
+from src.utils.password_hasher import HasherBusyError, get_password_hasher
+
+from src.utils.sqlite_migration import migrate_root
+from src.utils.sqlite_store import SQLiteUserStore, get_sqlite_db, storage_backend
+from src.utils.user_store import get_json_user_store
 
 router = APIRouter(prefix="/api/auth", tags=["auth"])
 
@@ -37,22 +44,38 @@ class LoginRequest(BaseModel):
 
 # --- Helpers ---
 
+def _users_db():
+    """用户存储：默认 users.json + 内存手机号索引；AGENTOS_STORAGE=sqlite 时为 data/agentos.db"""
+    if storage_backend() == "sqlite":
+        return SQLiteUserStore(get_sqlite_db(DATA_ROOT))
+    return get_json_user_store(USERS_FILE)
+
 def _load_users() -> dict:
-    if not os.path.exists(USERS_FILE):
-        return {}
-    with open(USERS_FILE, "r", encoding="utf-8") as f:
-        return json.load(f)
+    return _users_db().all()
 
 def _save_users(users: dict):
-    os.makedirs(os.path.dirname(USERS_FILE), exist_ok=True)
-    with open(USERS_FILE, "w", encoding="utf-8") as f:
-        json.dump(users, f, ensure_ascii=False, indent=2)
+    _users_db().replace_all(users)
 
-def _hash_password(password: str) -> str:
-    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+def _find_user_by_phone(phone: str) -> Optional[tuple[str, dict]]:
+    """返回 (user_id, user)，未注册返回 None（按索引查找，不扫描全部用户）"""
+    return _users_db().find_by_phone(phone)
 
-def _check_password(password: str, hashed: str) -> bool:
-    return bcrypt.checkpw(password.encode("utf-8"), hashed.encode("utf-8"))
+def _insert_user(user_id: str, user: dict) -> bool:
+    """写入新用户；手机号已被注册时返回 False"""
+    return _users_db().insert(user_id, user)
+
+async def _hash_password(password: str) -> str:
+    """bcrypt 在专用有界线程池上执行，不占用默认线程池（见 src/utils/password_hasher.py）"""
+    try:
+        return await get_password_hasher().hash(password)
+    except HasherBusyError:
+        raise HTTPException(503, "请求过多，请稍后重试")
+
+async def _check_password(password: str, hashed: str) -> bool:
+    try:
+        return await get_password_hasher().check(password, hashed)
+    except HasherBusyError:
+        raise HTTPException(503, "请求过多，请稍后重试")
 
 def _create_token(user_id: str, username: str) -> str:
     payload = {
@@ -64,13 +87,16 @@ def _create_token(user_id: str, username: str) -> str:
     return jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
 
 def _init_user_data(user_id: str):
-    """Copy template data to new user's directory."""
+    """Copy template data to new user's directory (sqlite 后端下同时导入用户的 agentos.db)."""
     user_dir = os.path.join(DATA_ROOT, user_id)
     if os.path.exists(user_dir):
         return
     if os.path.exists(TEMPLATE_DIR):
         shutil.copytree(TEMPLATE_DIR, user_dir)
         print(f"[Auth] Copied template to {user_dir}")
+        if storage_backend() == "sqlite":
+            # sqlite 后端不读 JSON 文件：模板中的 Agent、群组与消息需导入 agentos.db
+            migrate_root(user_dir)
     else:
         os.makedirs(user_dir, exist_ok=True)
         # Create minimal defaults
@@ -84,28 +110,27 @@ def _init_user_data(user_id: str):
 # --- Endpoints ---
 
 @router.post("/register")
-def register(req: RegisterRequest):
+async def register(req: RegisterRequest):
     if not req.username.strip() or not req.phone.strip() or not req.password.strip():
         raise HTTPException(400, "用户名、手机号和密码不能为空")
     
-    users = _load_users()
-    
-    # Check phone uniqueness
-    for uid, u in users.items():
-        if u["phone"] == req.phone:
-            raise HTTPException(400, "该手机号已注册")
+    # Check phone uniqueness (cheap pre-check before hashing)
+    if await run_in_threadpool(_find_user_by_phone, req.phone.strip()):
+        raise HTTPException(400, "该手机号已注册")
     
     user_id = f"user_{uuid.uuid4().hex[:12]}"
-    users[user_id] = {
+    new_user = {
         "username": req.username.strip(),
         "phone": req.phone.strip(),
-        "password_hash": _hash_password(req.password),
+        "password_hash": await _hash_password(req.password),
         "created_at": datetime.now().isoformat()
     }
-    _save_users(users)
+
+    if not await run_in_threadpool(_insert_user, user_id, new_user):
+        raise HTTPException(400, "该手机号已注册")
     
     # Initialize user data directory from template
-    _init_user_data(user_id)
+    await run_in_threadpool(_init_user_data, user_id)
     
     token = _create_token(user_id, req.username)
     return {
@@ -115,21 +140,19 @@ def register(req: RegisterRequest):
 
 
 @router.post("/login")
-def login(req: LoginRequest):
-    users = _load_users()
-    
-    for uid, u in users.items():
-        if u["phone"] == req.phone:
-            if _check_password(req.password, u["password_hash"]):
-                token = _create_token(uid, u["username"])
-                return {
-                    "token": token,
-                    "user": {"id": uid, "username": u["username"], "phone": u["phone"]}
-                }
-            else:
-                raise HTTPException(401, "密码错误")
-    
-    raise HTTPException(404, "该手机号未注册")
+async def login(req: LoginRequest):
+    found = await run_in_threadpool(_find_user_by_phone, req.phone)
+    if found is None:
+        raise HTTPException(404, "该手机号未注册")
+
+    uid, u = found
+    if not await _check_password(req.password, u["password_hash"]):
+        raise HTTPException(401, "密码错误")
+    token = _create_token(uid, u["username"])
+    return {
+        "token": token,
+        "user": {"id": uid, "username": u["username"], "phone": u["phone"]}
+    }
 
 
 @router.get("/me")
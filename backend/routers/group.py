@@ -53,6 +53,10 @@ class ExecuteWorkflowRequest(BaseModel):
     workflow: Dict[str, Any]
     history: List[Dict[str, Any]] = []
 
+class ResumeWorkflowRequest(BaseModel):
+    workspace_id: str
+    group_id: str
+
 @router.get("/list")
 def list_groups(workspace_id: str, request: Request):
     gm = get_user_group_manager(request); return gm.list_groups(workspace_id)
@@ -104,11 +108,21 @@ def delete_group(group_id: str, workspace_id: str, request: Request):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/{group_id}/messages")
-def get_group_messages(group_id: str, workspace_id: str, request: Request, limit: int = 100):
-    """获取群聊历史消息（最近 limit 条）"""
+def get_group_messages(group_id: str, workspace_id: str, request: Request, limit: int = 100,
+                       before: Optional[int] = None, after: Optional[int] = None):
+    """
+    获取群聊历史消息（游标分页）
+    - 默认返回最近 limit 条
+    - before=<id>: 早于该消息的 limit 条（向上滚动加载历史）
+    - after=<id>:  晚于该消息的 limit 条
+    返回 {messages, has_more_before, has_more_after}，消息的 id 即游标
+    """
+    if before is not None and after is not None:
+        raise HTTPException(status_code=400, detail="before 与 after 不能同时指定")
     try:
-        messages = get_user_group_manager(request).get_messages(workspace_id, group_id, limit)
-        return {"messages": messages}
+        return get_user_group_manager(request).get_messages_page(
+            workspace_id, group_id, limit, before=before, after=after
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -164,114 +178,190 @@ from fastapi.responses import StreamingResponse
 import asyncio
 import json
 
-@router.post("/execute")
-async def execute_workflow_plan(req: ExecuteWorkflowRequest, request: Request):
-    """Execute a pre-generated workflow plan with SSE streaming."""
+# (user_id, workspace_id, group_id) -> background workflow task; one run per group at a time
+_running_workflows: Dict[tuple, asyncio.Task] = {}
+
+
+def _workflow_key(request: Request, workspace_id: str, group_id: str) -> tuple:
+    return (getattr(request.state, "user_id", None), workspace_id, group_id)
+
+
+def _stream_workflow(request: Request, workspace_id: str, group_id: str, group_config: Dict[str, Any],
+                     workflow: Dict[str, Any], history: List[Dict[str, Any]], resume: bool = False):
+    """Run a workflow in a background task and stream step results as SSE (shared by /execute and /resume)."""
+    key = _workflow_key(request, workspace_id, group_id)
+    running = _running_workflows.get(key)
+    if running is not None and not running.done():
+        raise HTTPException(status_code=409, detail="A workflow is already running for this group")
+
+    supervisor_id = group_config.get("supervisor_id")
+    if not supervisor_id:
+        raise HTTPException(status_code=400, detail="Group has no supervisor configured")
+
     try:
-        group_config = get_user_group_manager(request).get_group(req.workspace_id, req.group_id)
-        if not group_config:
-            raise HTTPException(status_code=404, detail="Group not found")
+        supervisor_agent = ModelAgent(supervisor_id, workspace_id, get_user_file_manager(request), get_user_agent_registry(request))
+    except Exception as e:
+        print(f"[GroupRouter] CRITICAL ERROR: Supervisor agent '{supervisor_id}' failed to initialize: {e}")
+        import traceback
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=f"Supervisor agent '{supervisor_id}' initialization failed: {str(e)}")
 
-        supervisor_id = group_config.get("supervisor_id")
-        if not supervisor_id:
-            raise HTTPException(status_code=400, detail="Group has no supervisor configured")
+    chat = GroupChat(supervisor_agent=supervisor_agent)
 
+    for agent_id in group_config["members"]:
+        if agent_id == supervisor_id:
+            continue
         try:
-            supervisor_agent = ModelAgent(supervisor_id, req.workspace_id, get_user_file_manager(request), get_user_agent_registry(request))
+            agent = ModelAgent(agent_id, workspace_id, get_user_file_manager(request), get_user_agent_registry(request))
+            chat.add_agent(agent)
         except Exception as e:
-            print(f"[GroupRouter] CRITICAL ERROR: Supervisor agent '{supervisor_id}' failed to initialize: {e}")
+            print(f"[GroupRouter] ERROR: Failed to initialize member {agent_id} in workflow: {e}")
             import traceback
             traceback.print_exc()
-            raise HTTPException(status_code=500, detail=f"Supervisor agent '{supervisor_id}' initialization failed: {str(e)}")
+            print(f"Warning: Member {agent_id} not found, skipping.")
 
-        chat = GroupChat(supervisor_agent=supervisor_agent)
+    group_manager = get_user_group_manager(request)
+    checkpoint = group_manager.get_workflow_checkpoint(workspace_id, group_id)
 
-        for agent_id in group_config["members"]:
-            if agent_id == supervisor_id:
-                continue
-            try:
-                agent = ModelAgent(agent_id, req.workspace_id, get_user_file_manager(request), get_user_agent_registry(request))
-                chat.add_agent(agent)
-            except Exception as e:
-                print(f"[GroupRouter] ERROR: Failed to initialize member {agent_id} in workflow: {e}")
-                import traceback
-                traceback.print_exc()
-                print(f"Warning: Member {agent_id} not found, skipping.")
+    # SSE Setup
+    queue = asyncio.Queue()
 
-        # SSE Setup
-        queue = asyncio.Queue()
-        task_done_event = asyncio.Event()
+    async def save_progress(step_data: Dict[str, Any]):
+        """Callback to save agent response and push to SEE queue."""
+        try:
+            agent_name = step_data.get("agent_name", "System")
+            content = step_data.get("content", "")
+            
+            # ... (Agent ID lookup logic from before) ...
+            agent_id = None
+            agent = chat.members.get(agent_name)
+            agent_id = agent.agent_id if agent else None
+            
+            # 1. Save to DB
+            message = group_manager.add_message(
+                workspace_id, 
+                group_id, 
+                role="assistant",
+                content=content,
+                agent_id=agent_id,
+                agent_name=agent_name
+            )
+            print(f"[GroupRouter] Saved message from {agent_name}")
+
+            # 2. Push to Queue (SSE)
+            # Format: event: agent_message\ndata: {json}\n\n
+            sse_data = {
+                "role": "assistant",
+                "content": content,
+                "name": agent_name,
+                "step": step_data.get("step"),
+                "cached": step_data.get("cached", False),
+                "shouldAnimate": True
+            }
+            await queue.put(f"event: agent_message\ndata: {json.dumps(sse_data, ensure_ascii=False)}\n\n")
+
+        except Exception as ex:
+            print(f"[GroupRouter] Error saving/streaming progress: {ex}")
+
+    async def run_workflow_background():
+        """Background task to run workflow."""
+        try:
+            print("[GroupRouter] Starting background workflow execution...")
+            await chat.execute_workflow(workflow, history, on_step_complete=save_progress,
+                                        checkpoint=checkpoint, resume=resume)
+            print("[GroupRouter] Workflow execution finished.")
+        except Exception as e:
+            print(f"[GroupRouter] Workflow failed: {e}")
+            err_data = {"role": "system", "content": f"Error: {str(e)}"}
+            await queue.put(f"event: error\ndata: {json.dumps(err_data)}\n\n")
+        finally:
+            if _running_workflows.get(key) is asyncio.current_task():
+                del _running_workflows[key]
+            # Push a final keep-alive or finish signal if needed, or just let generator exit
+            await queue.put(None) # Sentinel
+
+    # Started here rather than in the generator, so the run (and its checkpoint)
+    # keeps going when the SSE client disconnects
+    _running_workflows[key] = asyncio.create_task(run_workflow_background())
+
+    async def event_generator():
+        """Yield sse events from queue."""
+        while True:
+            # Wait for next item
+            data = await queue.get()
+            
+            if data is None: # Sentinel
+                # Workflow finished
+                yield "event: finish\ndata: {}\n\n"
+                break
+            
+            yield data
+
+            # Optional: periodic heartbeat if queue is empty for a while?
+            # For now, simple consume is enough.
+
+    return StreamingResponse(event_generator(), media_type="text/event-stream")
 
-        async def save_progress(step_data: Dict[str, Any]):
-            """Callback to save agent response and push to SEE queue."""
-            try:
-                agent_name = step_data.get("agent_name", "System")
-                content = step_data.get("content", "")
-                
-                # ... (Agent ID lookup logic from before) ...
-                agent_id = None
-                agent = chat.members.get(agent_name)
-                agent_id = agent.agent_id if agent else None
-                
-                # 1. Save to DB
-                message = get_user_group_manager(request).add_message(
-                    req.workspace_id, 
-                    req.group_id, 
-                    role="assistant",
-                    content=content,
-                    agent_id=agent_id,
-                    agent_name=agent_name
-                )
-                print(f"[GroupRouter] Saved message from {agent_name}")
-
-                # 2. Push to Queue (SSE)
-                # Format: event: agent_message\ndata: {json}\n\n
-                sse_data = {
-                    "role": "assistant",
-                    "content": content,
-                    "name": agent_name,
-                    "shouldAnimate": True
-                }
-                await queue.put(f"event: agent_message\ndata: {json.dumps(sse_data, ensure_ascii=False)}\n\n")
-
-            except Exception as ex:
-                print(f"[GroupRouter] Error saving/streaming progress: {ex}")
-
-        async def run_workflow_background():
-            """Background task to run workflow."""
-            try:
-                print("[GroupRouter] Starting background workflow execution...")
-                await chat.execute_workflow(req.workflow, req.history, on_step_complete=save_progress)
-                print("[GroupRouter] Workflow execution finished.")
-            except Exception as e:
-                print(f"[GroupRouter] Workflow failed: {e}")
-                err_data = {"role": "system", "content": f"Error: {str(e)}"}
-                await queue.put(f"event: error\ndata: {json.dumps(err_data)}\n\n")
-            finally:
-                task_done_event.set()
-                # Push a final keep-alive or finish signal if needed, or just let generator exit
-                await queue.put(None) # Sentinel
-
-        async def event_generator():
-            """Yield sse events from queue."""
-            # Start background task
-            asyncio.create_task(run_workflow_background())
-
-            while True:
-                # Wait for next item
-                data = await queue.get()
-                
-                if data is None: # Sentinel
-                    # Workflow finished
-                    yield "event: finish\ndata: {}\n\n"
-                    break
-                
-                yield data
 
-                # Optional: periodic heartbeat if queue is empty for a while?
-                # For now, simple consume is enough.
+@router.post("/execute")
+async def execute_workflow_plan(req: ExecuteWorkflowRequest, request: Request):
+    """
+    Execute a pre-generated workflow plan with SSE streaming.
 
-        return StreamingResponse(event_generator(), media_type="text/event-stream")
+    Progress is checkpointed per group; steps whose inputs are unchanged since the
+    last run are reused from the checkpoint (agent_message events with "cached": true).
+    """
+    try:
+        group_config = get_user_group_manager(request).get_group(req.workspace_id, req.group_id)
+        if not group_config:
+            raise HTTPException(status_code=404, detail="Group not found")
+        return _stream_workflow(request, req.workspace_id, req.group_id, group_config, req.workflow, req.history)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/{group_id}/workflow/checkpoint")
+def get_workflow_checkpoint(group_id: str, workspace_id: str, request: Request):
+    """Status of the group's last workflow run (completed / in-progress step numbers)."""
+    data = get_user_group_manager(request).get_workflow_checkpoint(workspace_id, group_id).load()
+    if not data:
+        raise HTTPException(status_code=404, detail="No workflow checkpoint")
+    steps = data.get("steps", {})
+    running = _running_workflows.get(_workflow_key(request, workspace_id, group_id))
+    return {
+        "status": data.get("status"),
+        "running": running is not None and not running.done(),
+        "plan_name": data.get("workflow", {}).get("plan_name"),
+        "error": data.get("error"),
+        "updated_at": data.get("updated_at"),
+        "completed_steps": sorted(int(n) for n, e in steps.items() if e.get("status") == "completed"),
+        "in_progress_steps": sorted(int(n) for n, e in steps.items() if e.get("status") == "in_progress"),
+    }
+
+
+@router.post("/resume")
+async def resume_workflow_plan(req: ResumeWorkflowRequest, request: Request):
+    """
+    Continue the group's checkpointed workflow run with SSE streaming.
+
+    Completed steps are not executed again and steps already delivered are not
+    re-sent; an interrupted step continues from its last saved revision round.
+    """
+    try:
+        group_manager = get_user_group_manager(request)
+        group_config = group_manager.get_group(req.workspace_id, req.group_id)
+        if not group_config:
+            raise HTTPException(status_code=404, detail="Group not found")
+        data = group_manager.get_workflow_checkpoint(req.workspace_id, req.group_id).load()
+        if not data.get("workflow"):
+            raise HTTPException(status_code=404, detail="No workflow checkpoint to resume")
+        return _stream_workflow(request, req.workspace_id, req.group_id, group_config,
+                                data["workflow"], data.get("history", []), resume=True)
 
     except HTTPException:
         raise
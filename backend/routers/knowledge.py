@@ -5,6 +5,7 @@ import os
 import shutil
 
 from src.utils.rag_ingestion import RAGIngestion
+from src.utils.ingestion_jobs import IngestionJob, JobConflictError, get_ingestion_job_manager
 from src.core.file_manager import FileManager
 
 router = APIRouter(prefix="/api/knowledge", tags=["knowledge"])
@@ -13,6 +14,8 @@ router = APIRouter(prefix="/api/knowledge", tags=["knowledge"])
 class ProcessRequest(BaseModel):
     workspace_id: str
     agent_id: str
+    parallel: bool = False  # Load/Clean/Split across a process pool (bulk uploads)
+    workers: Optional[int] = None  # Pool size for parallel mode, defaults to CPU count
 
 class FileListResponse(BaseModel):
     files: List[str]
@@ -94,6 +97,54 @@ def delete_file(workspace_id: str, agent_id: str, type: str, filename: str):
     else:
         raise HTTPException(status_code=404, detail="File not found")
 
+def _ingest_uploads(request: ProcessRequest, job: Optional[IngestionJob] = None) -> dict:
+    """
+    Ingest knowledge_base/uploads/ and move ingested files to knowledge_base/processed/.
+    Returns the RAGIngestion report; when a job is given, progress and cancellation go through it.
+    """
+    uploads_dir = os.path.join(DATA_ROOT, request.workspace_id, request.agent_id, "knowledge_base/uploads")
+    processed_dir = os.path.join(DATA_ROOT, request.workspace_id, request.agent_id, "knowledge_base/processed")
+
+    if not os.path.exists(uploads_dir):
+        return {"files": {}}
+
+    os.makedirs(processed_dir, exist_ok=True)
+    
+    ingestion = RAGIngestion(DATA_ROOT, request.workspace_id, request.agent_id)
+
+    paths = [
+        os.path.join(uploads_dir, filename)
+        for filename in os.listdir(uploads_dir)
+        if os.path.isfile(os.path.join(uploads_dir, filename))
+    ]
+    on_progress = job.update_progress if job else None
+    should_cancel = job.cancelled if job else None
+    if job:
+        job.files_total = len(paths)
+
+    if request.parallel:
+        report = ingestion.ingest_files_parallel(
+            paths, workers=request.workers, on_progress=on_progress, should_cancel=should_cancel
+        )
+    else:
+        report = ingestion.ingest_files(paths, on_progress=on_progress, should_cancel=should_cancel)
+    results = report["files"]
+
+    # Move successfully ingested files to processed
+    for src_path in paths:
+        filename = os.path.basename(src_path)
+        if filename not in results or isinstance(results[filename], str):
+            continue
+        try:
+            dst_path = os.path.join(processed_dir, filename)
+            if os.path.exists(dst_path):
+                os.remove(dst_path)
+            shutil.move(src_path, dst_path)
+        except Exception as e:
+            results[filename] = f"Error: {str(e)}"
+
+    return report
+
 @router.post("/process")
 def process_knowledge_base(request: ProcessRequest):
     """
@@ -103,35 +154,52 @@ def process_knowledge_base(request: ProcessRequest):
     3. Move to knowledge_base/processed/
     """
     try:
-        uploads_dir = os.path.join(DATA_ROOT, request.workspace_id, request.agent_id, "knowledge_base/uploads")
-        processed_dir = os.path.join(DATA_ROOT, request.workspace_id, request.agent_id, "knowledge_base/processed")
-        
-        if not os.path.exists(uploads_dir):
+        report = _ingest_uploads(request)
+        if not report["files"]:
             return {"status": "success", "results": {}, "message": "No uploads found"}
-            
-        os.makedirs(processed_dir, exist_ok=True)
-        
-        ingestion = RAGIngestion(DATA_ROOT, request.workspace_id, request.agent_id)
-        results = {}
-        
-        for filename in os.listdir(uploads_dir):
-            src_path = os.path.join(uploads_dir, filename)
-            if not os.path.isfile(src_path):
-                continue
-                
-            try:
-                # Ingest
-                count = ingestion.ingest_file(src_path)
-                results[filename] = count
-                
-                # Move to processed
-                dst_path = os.path.join(processed_dir, filename)
-                if os.path.exists(dst_path):
-                    os.remove(dst_path)
-                shutil.move(src_path, dst_path)
-            except Exception as e:
-                results[filename] = f"Error: {str(e)}"
-        
-        return {"status": "success", "results": results}
+        return {
+            "status": "success",
+            "results": report["files"],
+            "stats": {k: v for k, v in report.items() if k != "files"},
+        }
     except Exception as e:
          raise HTTPException(status_code=500, detail=str(e))
+
+# ============================================================
+# Background Ingestion Jobs
+# ============================================================
+
+@router.post("/jobs")
+def submit_ingestion_job(request: ProcessRequest):
+    """Queue a background ingestion of knowledge_base/uploads/ and return its job id."""
+    try:
+        job = get_ingestion_job_manager().submit(
+            request.workspace_id,
+            request.agent_id,
+            lambda job: _ingest_uploads(request, job)
+        )
+    except JobConflictError as e:
+        raise HTTPException(status_code=409, detail={"message": str(e), "job_id": e.job_id})
+    return {"status": "success", "job_id": job.id, "job": job.to_dict()}
+
+@router.get("/jobs")
+def list_ingestion_jobs(workspace_id: Optional[str] = None, agent_id: Optional[str] = None):
+    """List known ingestion jobs, optionally filtered by workspace/agent."""
+    jobs = get_ingestion_job_manager().list_jobs(workspace_id, agent_id)
+    return {"jobs": [j.to_dict() for j in jobs]}
+
+@router.get("/jobs/{job_id}")
+def get_ingestion_job(job_id: str):
+    """Poll job progress: files done, chunks embedded and ETA."""
+    job = get_ingestion_job_manager().get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+@router.delete("/jobs/{job_id}")
+def cancel_ingestion_job(job_id: str):
+    """Cancel a queued or running job (running jobs stop after the current batch)."""
+    job = get_ingestion_job_manager().cancel(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return {"status": "success", "job": job.to_dict()}
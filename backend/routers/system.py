@@ -3,6 +3,13 @@ from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
 
 from src.core.file_manager import FileManager, ChangeRequest
+from src.core.llm_manager import LLMManager
+from backend.user_deps import user_manager_stats
+from backend.middleware.auth_middleware import get_token_cache
+from src.utils.embedding_service import embedding_stats
+from src.utils.password_hasher import get_password_hasher
+from src.utils.query_cache import query_cache_stats
+from src.utils.vector_store_cache import get_chroma_cache
 import os
 
 router = APIRouter(prefix="/api/sys", tags=["system"])
@@ -36,3 +43,16 @@ def apply_change(request: ApplyChangeRequest):
         return {"status": "success", "message": f"Change applied to {request.file_path}"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/cache-stats")
+def cache_stats():
+    """Process-wide cache/pool counters for performance monitoring."""
+    return {
+        "llm_clients": LLMManager.pool_stats(),
+        "embedding": embedding_stats(),
+        "vector_stores": get_chroma_cache().stats(),
+        "retrieval": query_cache_stats(),
+        "password_hashing": get_password_hasher().stats(),
+        "user_managers": user_manager_stats(),
+        "jwt_tokens": get_token_cache().stats(),
+    }
@@ -7,6 +7,8 @@ from typing import List, Optional, Dict, Any
 
 from fastapi import FastAPI, HTTPException, Body, Depends
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel
 
 # Add project root to sys.path to allow imports from src
@@ -18,7 +20,7 @@ if PROJECT_ROOT not in sys.path:
 from src.core.file_manager import FileManager
 from src.core.workspace import WorkspaceManager
 from src.core.agent_registry import AgentRegistry
-from src.graph.agent_graph import create_compiled_graph
+from src.graph.agent_graph import ASYNC_GRAPH_VERSION, get_compiled_graph, warm_graph_registry
 from src.core.llm_manager import LLMManager
 from langchain_core.messages import HumanMessage, AIMessage
 
@@ -83,6 +85,13 @@ workspace_manager = WorkspaceManager(file_manager)
 agent_registry = AgentRegistry(REGISTRY_PATH)
 llm_manager = LLMManager()
 
+
+@app.on_event("startup")
+def warm_caches():
+    """Compile the agent graph once so the first chat request doesn't pay for it."""
+    versions = warm_graph_registry()
+    print(f"[Server] Agent graph compiled (versions: {versions})")
+
 # ==============================================================================
 # Pydantic Models
 # ==============================================================================
@@ -172,10 +181,9 @@ def list_agents(request: Request, workspace_id: Optional[str] = None):
 @app.get("/api/skills")
 def list_available_skills():
     """List all available skills with Chinese descriptions."""
-    from src.skills.skill_loader import SkillLoader
+    from src.skills.skill_loader import get_skill_registry
     
-    sl = SkillLoader(os.path.join(PROJECT_ROOT, "custom_skills"))
-    sl.scan_and_load()
+    sl = get_skill_registry(os.path.join(PROJECT_ROOT, "custom_skills"))
     
     results = []
     for s in sl.list_skills():
@@ -260,12 +268,33 @@ def read_file(req: FileReadRequest, request: Request):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/api/chat/invoke", response_model=ChatResponse)
-def invoke_chat(chat_req: ChatRequest, request: Request):
-    """
-    Invoke the Agent LangGraph.
-    This is a stateless invocation per turn (REST style).
-    """
+def _normalize_content(content):
+    """将 LLM 返回的 content 统一转为字符串。
+    某些模型（如 Claude）返回 [{'type': 'text', 'text': '...'}] 列表。"""
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        parts = []
+        for item in content:
+            if isinstance(item, dict) and "text" in item:
+                parts.append(item["text"])
+            elif isinstance(item, str):
+                parts.append(item)
+        return "\n".join(parts) if parts else str(content)
+    return str(content)
+
+
+def _log_graph_error(e: Exception):
+    import traceback
+    with open("backend_debug.log", "a", encoding="utf-8") as f:
+        f.write(f"Graph Execution Error: {str(e)}\n")
+        f.write(traceback.format_exc())
+        f.write("\n" + "="*50 + "\n")
+    print(f"Graph Execution Error: {str(e)}") # Print to console just in case
+
+
+def _prepare_chat_state(chat_req: ChatRequest, request: Request) -> dict:
+    """Build the initial graph state for one chat turn (404 if the agent does not exist)."""
     # 1. Get Agent Config
     ar = get_user_agent_registry(request)
     agent_config = ar.get_agent(chat_req.agent_id)
@@ -287,7 +316,7 @@ def invoke_chat(chat_req: ChatRequest, request: Request):
 
     # 3. Construct Graph State
     user_root = get_user_data_root(request)
-    initial_state = {
+    return {
         "messages": [HumanMessage(content=chat_req.message)],
         "current_agent": chat_req.agent_id,
         "current_workspace": chat_req.workspace_id,
@@ -298,17 +327,22 @@ def invoke_chat(chat_req: ChatRequest, request: Request):
         "llm_config_path": os.path.join(user_root, "llm_providers.json"),
     }
 
+
+@app.post("/api/chat/invoke", response_model=ChatResponse)
+async def invoke_chat(chat_req: ChatRequest, request: Request):
+    """
+    Invoke the Agent LangGraph.
+    This is a stateless invocation per turn (REST style).
+    Runs the async graph: no worker thread is held while waiting on the LLM.
+    """
+    initial_state = await run_in_threadpool(_prepare_chat_state, chat_req, request)
+
     # 4. Run Graph
     try:
-        graph = create_compiled_graph()
-        result = graph.invoke(initial_state)
+        graph = get_compiled_graph(ASYNC_GRAPH_VERSION)
+        result = await graph.ainvoke(initial_state)
     except Exception as e:
-        import traceback
-        with open("backend_debug.log", "a", encoding="utf-8") as f:
-            f.write(f"Graph Execution Error: {str(e)}\n")
-            f.write(traceback.format_exc())
-            f.write("\n" + "="*50 + "\n")
-        print(f"Graph Execution Error: {str(e)}") # Print to console just in case
+        _log_graph_error(e)
         raise HTTPException(status_code=500, detail=f"Graph execution failed: {str(e)}")
 
     # 5. Process Result
@@ -319,21 +353,6 @@ def invoke_chat(chat_req: ChatRequest, request: Request):
     response_text = ""
     serialized_messages = []
     
-    def _normalize_content(content):
-        """将 LLM 返回的 content 统一转为字符串。
-        某些模型（如 Claude）返回 [{'type': 'text', 'text': '...'}] 列表。"""
-        if isinstance(content, str):
-            return content
-        if isinstance(content, list):
-            parts = []
-            for item in content:
-                if isinstance(item, dict) and "text" in item:
-                    parts.append(item["text"])
-                elif isinstance(item, str):
-                    parts.append(item)
-            return "\n".join(parts) if parts else str(content)
-        return str(content)
-    
     for msg in messages:
         role = "unknown"
         content = ""
@@ -355,6 +374,78 @@ def invoke_chat(chat_req: ChatRequest, request: Request):
         pending_changes=pending_changes
     )
 
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+
+@app.post("/api/chat/stream")
+async def stream_chat(chat_req: ChatRequest, request: Request):
+    """
+    Same turn as /api/chat/invoke, streamed as Server-Sent Events while the graph runs.
+
+    Events:
+      token           {"content"}                    LLM output delta (agent node)
+      tool_call       {"agent", "tool", "args", "id"}
+      tool_result     {"agent", "tool", "result", "id"}
+      change_request  {...change request...}         pending file change awaiting approval
+      done            {"response", "pending_changes"}
+      error           {"content"}
+    """
+    initial_state = await run_in_threadpool(_prepare_chat_state, chat_req, request)
+    agent_name = initial_state["agent_config"].get("name", chat_req.agent_id)
+
+    async def event_generator():
+        response_text = ""
+        pending_changes = []
+        tool_names = {}  # tool_call_id -> tool name
+        try:
+            graph = get_compiled_graph(ASYNC_GRAPH_VERSION)
+            async for event in graph.astream_events(initial_state, version="v2"):
+                kind = event["event"]
+                node = event.get("metadata", {}).get("langgraph_node")
+
+                if kind == "on_chat_model_stream" and node == "agent":
+                    chunk = event["data"]["chunk"]
+                    text = _normalize_content(chunk.content) if chunk.content else ""
+                    if text:
+                        yield _sse("token", {"content": text})
+
+                elif kind == "on_chain_end" and event["name"] == node == "agent":
+                    for msg in (event["data"].get("output") or {}).get("messages", []):
+                        if isinstance(msg, AIMessage):
+                            response_text = _normalize_content(msg.content)  # Keep last assistant message
+                            for call in msg.tool_calls or []:
+                                tool_names[call["id"]] = call["name"]
+                                yield _sse("tool_call", {
+                                    "agent": agent_name, "tool": call["name"],
+                                    "args": call["args"], "id": call["id"],
+                                })
+
+                elif kind == "on_chain_end" and event["name"] == node == "tools":
+                    output = event["data"].get("output") or {}
+                    for msg in output.get("messages", []):
+                        call_id = getattr(msg, "tool_call_id", None)
+                        yield _sse("tool_result", {
+                            "agent": agent_name, "tool": tool_names.get(call_id, ""),
+                            "result": _normalize_content(msg.content), "id": call_id,
+                        })
+                    # tool_node returns the cumulative list; emit only the new entries
+                    for cr in output.get("pending_changes", [])[len(pending_changes):]:
+                        pending_changes.append(cr)
+                        yield _sse("change_request", cr)
+
+            yield _sse("done", {"response": response_text, "pending_changes": pending_changes})
+        except Exception as e:
+            _log_graph_error(e)
+            yield _sse("error", {"content": f"Graph execution failed: {str(e)}"})
+
+    return StreamingResponse(
+        event_generator(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 # ... (summarize endpoint removed, moved to util router)
 
 if __name__ == "__main__":
@@ -1,6 +1,6 @@
 """
 User-scoped dependency injection.
-Provides per-request managers based on the authenticated user's ID.
+Provides managers scoped to the authenticated user's ID, cached per user across requests.
 """
 import os
 from fastapi import Request, Depends, HTTPException
@@ -9,10 +9,16 @@ from src.core.agent_registry import AgentRegistry
 from src.core.workspace import WorkspaceManager
 from src.core.group_manager import GroupChatManager
 from src.core.llm_manager import LLMManager
+from src.utils.manager_cache import ManagerCache
 
 PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DATA_ROOT = os.path.join(PROJECT_ROOT, "data")
 
+_managers = ManagerCache(
+    max_size=int(os.environ.get("USER_MANAGER_CACHE_SIZE", "256")),
+    idle_ttl=float(os.environ.get("USER_MANAGER_IDLE_TTL", "600")),
+)
+
 
 def get_user_id(request: Request) -> str:
     """Extract user_id from request state (set by JWT middleware)."""
@@ -28,33 +34,45 @@ def get_user_data_root(request: Request) -> str:
     return os.path.join(DATA_ROOT, user_id)
 
 
+def _cached(request: Request, kind: str, factory, watch=(), depends=()):
+    """按 (user_id, kind) 复用管理对象（LRU + 空闲 TTL + 配置文件 mtime 校验 + 依赖对象校验）"""
+    return _managers.get_or_create((get_user_id(request), kind), factory, watch, depends)
+
+
 def get_user_file_manager(request: Request) -> FileManager:
-    """Create a FileManager scoped to the current user's data directory."""
+    """Return the (cached) FileManager scoped to the current user's data directory."""
     user_root = get_user_data_root(request)
-    return FileManager(user_root)
+    return _cached(request, "file_manager", lambda: FileManager(user_root))
 
 
 def get_user_agent_registry(request: Request) -> AgentRegistry:
-    """Create an AgentRegistry scoped to the current user's config."""
+    """Return the (cached) AgentRegistry scoped to the current user's config."""
     user_root = get_user_data_root(request)
     registry_path = os.path.join(user_root, "agents_registry.json")
-    return AgentRegistry(registry_path)
+    # 注册表内容由 JsonStore 按 mtime 校验，这里无需监视文件
+    return _cached(request, "agent_registry", lambda: AgentRegistry(registry_path))
 
 
 def get_user_workspace_manager(request: Request) -> WorkspaceManager:
-    """Create a WorkspaceManager scoped to the current user."""
+    """Return the (cached) WorkspaceManager scoped to the current user."""
     fm = get_user_file_manager(request)
-    return WorkspaceManager(fm)
+    # FileManager 被重建后随之重建，不继续持有旧实例
+    return _cached(request, "workspace_manager", lambda: WorkspaceManager(fm), depends=(fm,))
 
 
 def get_user_group_manager(request: Request) -> GroupChatManager:
-    """Create a GroupChatManager scoped to the current user."""
+    """Return the (cached) GroupChatManager scoped to the current user."""
     fm = get_user_file_manager(request)
-    return GroupChatManager(fm)
+    return _cached(request, "group_manager", lambda: GroupChatManager(fm), depends=(fm,))
 
 
 def get_user_llm_manager(request: Request) -> LLMManager:
-    """Create an LLMManager scoped to the current user's config."""
+    """Return the (cached) LLMManager scoped to the current user's config."""
     user_root = get_user_data_root(request)
     config_path = os.path.join(user_root, "llm_providers.json")
-    return LLMManager(config_path=config_path)
+    # llm_providers.json 被修改（包括其他进程）后重新加载
+    return _cached(request, "llm_manager", lambda: LLMManager(config_path=config_path), watch=(config_path,))
+
+
+def user_manager_stats() -> dict:
+    return _managers.stats()
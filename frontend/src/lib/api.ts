@@ -93,6 +93,61 @@ export const sendMessage = async (
     return response.data;
 };
 
+// Single-agent chat over SSE: tokens arrive as they are generated.
+// onEvent receives token / tool_call / tool_result / change_request events;
+// resolves with the same shape as sendMessage once the turn is done.
+export const streamChat = async (
+    workspaceId: string,
+    agentId: string,
+    message: string,
+    onEvent: (event: string, data: any) => void
+): Promise<ChatResponse> => {
+    const token = localStorage.getItem('auth_token');
+    const res = await fetch(`${API_BASE_URL}/chat/stream`, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+            ...(token ? { 'Authorization': `Bearer ${token}` } : {}),
+        },
+        body: JSON.stringify({ message, agent_id: agentId, workspace_id: workspaceId }),
+    });
+    if (!res.ok || !res.body) {
+        throw new Error(`Chat stream failed: ${res.status} ${res.statusText}`);
+    }
+
+    const reader = res.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let result: ChatResponse = { response: '', messages: [], pending_changes: [] };
+
+    while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        const blocks = buffer.split('\n\n');
+        buffer = blocks.pop() || '';
+
+        for (const block of blocks) {
+            const eventMatch = block.match(/^event: (.*)$/m);
+            const dataMatch = block.match(/^data: (.*)$/m);
+            if (!eventMatch || !dataMatch) continue;
+
+            const eventType = eventMatch[1].trim();
+            let data: any = {};
+            try { data = JSON.parse(dataMatch[1].trim()); } catch { continue; }
+
+            if (eventType === 'done') {
+                result = { response: data.response, messages: [], pending_changes: data.pending_changes || [] };
+            } else if (eventType === 'error') {
+                throw new Error(data.content);
+            } else {
+                onEvent(eventType, data);
+            }
+        }
+    }
+    return result;
+};
+
 export const readFile = async (filePath: string): Promise<{ content: string; file_path: string }> => {
     const response = await api.post('/file/read', { file_path: filePath });
     return response.data;
@@ -359,9 +414,16 @@ export const executeWorkflowPlan = async (
 
 
 
-export const fetchGroupMessages = async (workspaceId: string, groupId: string, limit: number = 100) => {
+// Cursor pagination: pass { before: oldestLoadedId } to lazy-load older history.
+// Response: { messages, has_more_before, has_more_after }; each message's `id` is its cursor.
+export const fetchGroupMessages = async (
+    workspaceId: string,
+    groupId: string,
+    limit: number = 100,
+    cursor?: { before?: number; after?: number }
+) => {
     const response = await api.get(`/group/${groupId}/messages`, {
-        params: { workspace_id: workspaceId, limit }
+        params: { workspace_id: workspaceId, limit, ...cursor }
     });
     return response.data;
 };
@@ -1,5 +1,5 @@
 import { create } from 'zustand';
-import { fetchWorkspaces, fetchAgents, sendMessage, createAgent, fetchProviders, saveProvider, deleteProvider, fetchFiles, uploadFiles, deleteFile, processKnowledgeBase, updateAgent, applyChange, fetchGroupMessages } from './lib/api';
+import { fetchWorkspaces, fetchAgents, sendMessage, createAgent, fetchProviders, saveProvider, deleteProvider, fetchFiles, uploadFiles, deleteFile, processKnowledgeBase, updateAgent, applyChange, fetchGroupMessages, streamChat } from './lib/api';
 import type { Workspace, Agent, LLMProvider, GroupChat } from './lib/api';
 import { sessionManager } from './utils/sessionManager';
 
@@ -490,17 +490,27 @@ export const useStore = create<AppState>((set, get) => ({
             messages: [...(state.chatHistory[currentAgentId] || []), newMessage] // Update current view
         }));
 
-        try {
-            const response = await sendMessage(currentWorkspaceId, currentAgentId, text);
-            const aiMessage: Message = { role: 'assistant', content: response.response, shouldAnimate: true };
+        // Replace the trailing assistant message (appended on the first token) with `content`
+        const setStreamingReply = (content: string, shouldAnimate: boolean) => set((state) => {
+            const history = state.chatHistory[currentAgentId] || [];
+            const last = history[history.length - 1];
+            const base = last && last.role === 'assistant' ? history.slice(0, -1) : history;
+            const updated = [...base, { role: 'assistant' as const, content, shouldAnimate }];
+            return {
+                chatHistory: { ...state.chatHistory, [currentAgentId]: updated },
+                messages: updated
+            };
+        });
 
-            set((state) => ({
-                chatHistory: {
-                    ...state.chatHistory,
-                    [currentAgentId]: [...(state.chatHistory[currentAgentId] || []), aiMessage]
-                },
-                messages: [...(state.chatHistory[currentAgentId] || []), aiMessage]
-            }));
+        try {
+            let streamed = '';
+            const response = await streamChat(currentWorkspaceId, currentAgentId, text, (event, data) => {
+                if (event === 'token') {
+                    streamed += data.content;
+                    setStreamingReply(streamed, false);
+                }
+            });
+            setStreamingReply(response.response, !streamed);
 
             // Auto-save session after AI response
             const finalState = get();
@@ -0,0 +1,120 @@
+"""
+登录吞吐基准 - 登录洪峰下其他接口的延迟是否稳定
+
+对运行中的后端:
+  1. 注册（或登录）一个基准用户，取得 token
+  2. 基线：单线程轮询 --probe 接口（默认 GET /api/agents，同步路由，走默认线程池），记录延迟
+  3. 加压：--logins 个线程持续 POST /api/auth/login，同时继续轮询 --probe
+输出两阶段的 probe p50 / p99 与登录吞吐。bcrypt 在专用线程池执行后，
+加压阶段的 probe 延迟应与基线接近，多余的登录请求以 503 快速失败而不是排队。
+
+用法:
+  python backend/server.py &
+  python scripts/bench_login_throughput.py --url http://127.0.0.1:8000 --logins 32 --seconds 10
+  AUTH_BCRYPT_ROUNDS=10 AUTH_HASH_WORKERS=2 python backend/server.py   # 调整 cost / 线程数后重测
+"""
+
+import json
+import time
+import argparse
+import threading
+import statistics
+import urllib.error
+import urllib.request
+from collections import Counter
+
+BENCH_PHONE = "19900000000"
+BENCH_PASSWORD = "bench-password"
+
+
+def _request(url: str, method: str = "GET", body: dict = None, token: str = None) -> tuple[int, dict]:
+    data = json.dumps(body).encode("utf-8") if body is not None else None
+    req = urllib.request.Request(url, data=data, method=method)
+    req.add_header("Content-Type", "application/json")
+    if token:
+        req.add_header("Authorization", f"Bearer {token}")
+    try:
+        with urllib.request.urlopen(req, timeout=60) as resp:
+            return resp.status, json.loads(resp.read() or b"null")
+    except urllib.error.HTTPError as e:
+        return e.code, {}
+
+
+def get_token(base: str) -> str:
+    credentials = {"phone": BENCH_PHONE, "password": BENCH_PASSWORD}
+    status, body = _request(f"{base}/api/auth/login", "POST", credentials)
+    if status == 404:
+        status, body = _request(f"{base}/api/auth/register", "POST", {"username": "bench", **credentials})
+    if status != 200:
+        raise SystemExit(f"cannot obtain token (HTTP {status})")
+    return body["token"]
+
+
+def probe(url: str, token: str, stop: threading.Event) -> list[float]:
+    samples = []
+    while not stop.is_set():
+        start = time.perf_counter()
+        _request(url, token=token)
+        samples.append((time.perf_counter() - start) * 1000)
+        time.sleep(0.01)
+    return samples
+
+
+def login_worker(base: str, stop: threading.Event, results: Counter, lock: threading.Lock) -> None:
+    credentials = {"phone": BENCH_PHONE, "password": BENCH_PASSWORD}
+    while not stop.is_set():
+        status, _ = _request(f"{base}/api/auth/login", "POST", credentials)
+        with lock:
+            results[status] += 1
+
+
+def run_phase(base: str, probe_url: str, token: str, logins: int, seconds: float) -> tuple[list[float], Counter]:
+    stop = threading.Event()
+    results: Counter = Counter()
+    lock = threading.Lock()
+    workers = [threading.Thread(target=login_worker, args=(base, stop, results, lock)) for _ in range(logins)]
+    for t in workers:
+        t.start()
+    timer = threading.Timer(seconds, stop.set)
+    timer.start()
+    samples = probe(probe_url, token, stop)
+    for t in workers:
+        t.join()
+    return samples, results
+
+
+def _percentiles(samples: list[float]) -> str:
+    if not samples:
+        return "no samples"
+    samples = sorted(samples)
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+    return f"p50={statistics.median(samples):8.1f}ms  p99={p99:8.1f}ms  n={len(samples)}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Login burst vs. probe endpoint latency")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--probe", default="/api/agents", help="latency-sensitive endpoint to watch")
+    parser.add_argument("--logins", type=int, default=32, help="concurrent login clients")
+    parser.add_argument("--seconds", type=float, default=10)
+    args = parser.parse_args()
+
+    base = args.url.rstrip("/")
+    token = get_token(base)
+    probe_url = f"{base}{args.probe}"
+
+    baseline, _ = run_phase(base, probe_url, token, 0, args.seconds)
+    print(f"baseline     {args.probe}: {_percentiles(baseline)}")
+
+    loaded, results = run_phase(base, probe_url, token, args.logins, args.seconds)
+    print(f"{args.logins:>3} logins   {args.probe}: {_percentiles(loaded)}")
+    other = {code: n for code, n in results.items() if code not in (200, 503)}
+    print(f"login throughput: {results[200] / args.seconds:.1f}/s ok, "
+          f"{results[503] / args.seconds:.1f}/s shed (503), other={other}")
+    status, stats = _request(f"{base}/api/sys/cache-stats", token=token)
+    if status == 200:
+        print(f"hasher: {stats.get('password_hashing')}")
+
+
+if __name__ == "__main__":
+    main()
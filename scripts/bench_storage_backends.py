@@ -0,0 +1,120 @@
+"""
+存储后端基准 - 对比 JSON 与 SQLite 后端的单次操作延迟
+
+预先写入 --agents 个 Agent（分布在 --workspaces 个工作区）与单个群组的 --messages 条消息，
+再通过 AgentRegistry / GroupChatManager 的公开接口逐次计时，输出 p50 / p99 (ms)。
+
+用法:
+  python scripts/bench_storage_backends.py                       # 10k agents, 1M messages
+  python scripts/bench_storage_backends.py --agents 1000 --messages 50000 --ops 200
+"""
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import statistics
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from src.core.agent_registry import AgentRegistry
+from src.core.file_manager import FileManager
+from src.core.group_manager import GroupChatManager
+from src.utils.json_store import flush_json_stores
+
+WORKSPACE = "workspace_bench"
+GROUP_ID = "group_bench_1"
+
+
+def _agent_config(i: int, workspaces: int) -> dict:
+    return {
+        "name": f"Agent {i}",
+        "workspace": f"workspace_{i % workspaces}",
+        "system_prompt": "You are a helpful assistant. " * 4,
+        "tools": ["read_file", "write_file"],
+        "tags": [f"tag_{i % 50}"],
+    }
+
+
+def _message(i: int) -> dict:
+    return {
+        "role": "user" if i % 2 else "assistant",
+        "content": f"message {i} " + "lorem ipsum " * 10,
+        "timestamp": f"2026-01-01T00:00:{i % 60:02d}",
+    }
+
+
+def populate(root: str, backend: str, agents: int, workspaces: int, messages: int):
+    registry = AgentRegistry(os.path.join(root, "agents_registry.json"), backend=backend)
+    configs = {f"agent_{i}": _agent_config(i, workspaces) for i in range(agents)}
+    if backend == "sqlite":
+        registry._sql.import_all(configs)
+    else:
+        registry._save({"version": "1.0", "agents": configs})
+
+    os.makedirs(os.path.join(root, WORKSPACE), exist_ok=True)
+    groups = GroupChatManager(FileManager(root), backend=backend)
+    groups._save_groups(WORKSPACE, [{"id": GROUP_ID, "name": "bench", "members": []}])
+    groups._get_message_log(WORKSPACE, GROUP_ID).import_if_empty(
+        lambda: [_message(i) for i in range(messages)]
+    )
+    return registry, groups
+
+
+def timed(fn, ops: int) -> tuple[float, float]:
+    samples = []
+    for i in range(ops):
+        start = time.perf_counter()
+        fn(i)
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+
+
+def bench(backend: str, args) -> None:
+    root = tempfile.mkdtemp(prefix=f"bench_{backend}_")
+    try:
+        start = time.perf_counter()
+        registry, groups = populate(root, backend, args.agents, args.workspaces, args.messages)
+        print(f"\n[{backend}] populated in {time.perf_counter() - start:.1f}s")
+
+        n = args.agents
+        cases = [
+            ("get_agent", lambda i: registry.get_agent(f"agent_{(i * 7919) % n}")),
+            ("list_agents(workspace)", lambda i: registry.list_agents(workspace=f"workspace_{i % args.workspaces}")),
+            ("list_agents(tag)", lambda i: registry.list_agents(tag=f"tag_{i % 50}")),
+            ("update_agent", lambda i: registry.update_agent(f"agent_{(i * 7919) % n}", {"name": f"renamed {i}"})),
+            ("register_agent", lambda i: registry.register_agent(f"new_agent_{i}", _agent_config(i, args.workspaces))),
+            ("add_message", lambda i: groups.add_message(WORKSPACE, GROUP_ID, "user", f"bench {i}")),
+            ("messages(latest 50)", lambda i: groups.get_messages_page(WORKSPACE, GROUP_ID, 50)),
+            ("messages(oldest 50)", lambda i: groups.get_messages_page(WORKSPACE, GROUP_ID, 50, before=50)),
+            ("list_groups", lambda i: groups.list_groups(WORKSPACE)),
+        ]
+        for name, fn in cases:
+            p50, p99 = timed(fn, args.ops)
+            print(f"  {name:<24} p50={p50:>9.3f}ms  p99={p99:>9.3f}ms")
+        flush_json_stores()
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-op latency: JSON vs SQLite storage backend")
+    parser.add_argument("--agents", type=int, default=10_000)
+    parser.add_argument("--workspaces", type=int, default=20)
+    parser.add_argument("--messages", type=int, default=1_000_000)
+    parser.add_argument("--ops", type=int, default=200, help="timed operations per case")
+    parser.add_argument("--backend", choices=["json", "sqlite", "both"], default="both")
+    args = parser.parse_args()
+
+    print(f"agents={args.agents} workspaces={args.workspaces} messages={args.messages} ops={args.ops}")
+    for backend in (["json", "sqlite"] if args.backend == "both" else [args.backend]):
+        bench(backend, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+数据迁移脚本 - 将 JSON 存储布局导入 SQLite 后端 (AGENTOS_STORAGE=sqlite)
+
+导入:
+  data/users.json                                  -> data/agentos.db (users)
+  data/{root}/agents_registry.json                 -> data/{root}/agentos.db (agents)
+  data/{root}/{workspace}/_group_chats.json        -> data/{root}/agentos.db (groups)
+  data/{root}/{workspace}/_group_messages/{id}/    -> data/{root}/agentos.db (group_messages)
+  data/{root}/{workspace}/_group_messages_{id}.json   (旧版单文件消息，同上)
+  config/agents_registry.json                      -> config/agentos.db (--config)
+
+{root} 为 data/ 本身以及其下每个用户目录。原 JSON 文件保留不动；
+重复执行是安全的：Agent 与群组按 id 覆盖，已有消息的群组和已存在的用户会跳过。
+
+用法:
+  python scripts/migrate_json_to_sqlite.py --dry-run
+  python scripts/migrate_json_to_sqlite.py --config
+  AGENTOS_STORAGE=sqlite python backend/server.py
+"""
+
+import os
+import sys
+import argparse
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from src.utils.sqlite_migration import migrate_data_root, migrate_registry
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migrate the JSON storage layout into SQLite")
+    parser.add_argument("--data-root", default=os.path.join(PROJECT_ROOT, "data"))
+    parser.add_argument("--config", action="store_true", help="also migrate config/agents_registry.json")
+    parser.add_argument("--dry-run", action="store_true", help="only count records, write nothing")
+    args = parser.parse_args()
+
+    if args.dry_run:
+        print("[DRY-RUN] counting records only")
+    migrate_data_root(os.path.realpath(args.data_root), args.dry_run)
+    if args.config:
+        registry_path = os.path.join(PROJECT_ROOT, "config", "agents_registry.json")
+        print(f"{registry_path}: {migrate_registry(registry_path, args.dry_run)} agents")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,58 +1,83 @@
 """
 AgentRegistry - Agent 注册与发现
 职责：管理 agents_registry.json，提供 Agent 的注册/查询/更新/删除。
+AGENTOS_STORAGE=sqlite 时改用同目录下的 agentos.db（见 src/utils/sqlite_store.py）。
 """
 
 import os
-import json
+import copy
 from datetime import datetime
 from typing import Optional
 
+from src.utils.json_store import get_json_store
+from src.utils.sqlite_store import SQLiteAgentStore, get_sqlite_db, storage_backend
+
 
 class AgentRegistry:
     """全局 Agent 注册表管理"""
 
-    def __init__(self, registry_path: str):
+    def __init__(self, registry_path: str, backend: Optional[str] = None):
         """
         Args:
             registry_path: agents_registry.json 的绝对路径
+            backend: "json" / "sqlite"，默认取 AGENTOS_STORAGE
         """
         self.registry_path = registry_path
+        self._sql: Optional[SQLiteAgentStore] = None
+        if (backend or storage_backend()) == "sqlite":
+            self._sql = SQLiteAgentStore(get_sqlite_db(os.path.dirname(registry_path)))
+            return
+        self._store = get_json_store(registry_path, default=self._empty_registry)
         self._ensure_registry()
 
+    @staticmethod
+    def _empty_registry() -> dict:
+        return {"version": "1.0", "agents": {}}
+
     def _ensure_registry(self) -> None:
         """确保注册表文件存在"""
         os.makedirs(os.path.dirname(self.registry_path), exist_ok=True)
-        if not os.path.exists(self.registry_path):
-            self._save({"version": "1.0", "agents": {}})
+        if not self._store.exists():
+            self._store.update(lambda data: None)
 
     def _load(self) -> dict:
-        """加载注册表"""
-        with open(self.registry_path, "r", encoding="utf-8") as f:
-            return json.load(f)
+        """加载注册表（只读，缓存按 mtime 校验）"""
+        return self._store.peek()
 
     def _save(self, data: dict) -> None:
-        """保存注册表"""
-        with open(self.registry_path, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        """保存注册表（整体覆盖；读-改-写请用 self._store.update）"""
+        self._store.write(data)
 
     def register_agent(self, agent_id: str, config: dict) -> None:
         """注册新 Agent"""
-        data = self._load()
-        if agent_id in data["agents"]:
-            raise ValueError(f"Agent 已存在: {agent_id}")
         config.setdefault("created_at", datetime.now().isoformat())
-        data["agents"][agent_id] = config
-        self._save(data)
+        if self._sql:
+            self._sql.insert(agent_id, config)
+            return
+
+        def apply(data: dict) -> None:
+            if agent_id in data["agents"]:
+                raise ValueError(f"Agent 已存在: {agent_id}")
+            data["agents"][agent_id] = config
+
+        self._store.update(apply)
 
     def update_agent(self, agent_id: str, updates: dict) -> None:
         """更新 Agent 配置"""
-        data = self._load()
-        if agent_id not in data["agents"]:
-            raise KeyError(f"Agent 不存在: {agent_id}")
-        data["agents"][agent_id].update(updates)
-        data["agents"][agent_id]["updated_at"] = datetime.now().isoformat()
-        self._save(data)
+        def apply_config(config: dict) -> None:
+            config.update(updates)
+            config["updated_at"] = datetime.now().isoformat()
+
+        if self._sql:
+            self._sql.update(agent_id, apply_config)
+            return
+
+        def apply(data: dict) -> None:
+            if agent_id not in data["agents"]:
+                raise KeyError(f"Agent 不存在: {agent_id}")
+            apply_config(data["agents"][agent_id])
+
+        self._store.update(apply)
 
     def get_agent(self, agent_id: str) -> Optional[dict]:
         """获取 Agent 配置"""
@@ -69,14 +94,18 @@ class AgentRegistry:
                 "tags": ["system", "meta"],
                 "persona_mode": "efficient"
             }
+        if self._sql:
+            return self._sql.get(agent_id)
         data = self._load()
-        return data["agents"].get(agent_id)
+        return copy.deepcopy(data["agents"].get(agent_id))
 
     def list_agents(self, workspace: Optional[str] = None,
                     tag: Optional[str] = None) -> list[dict]:
         """
         列出所有 Agent，可按 workspace 或 tag 筛选
         """
+        if self._sql:
+            return [{"id": aid, **config} for aid, config in self._sql.list_agents(workspace, tag)]
         data = self._load()
         agents = []
         for aid, config in data["agents"].items():
@@ -84,19 +113,26 @@ class AgentRegistry:
                 continue
             if tag and tag not in config.get("tags", []):
                 continue
-            agents.append({"id": aid, **config})
+            agents.append({"id": aid, **copy.deepcopy(config)})
         return agents
 
     def remove_agent(self, agent_id: str) -> None:
         """从注册表中移除 Agent"""
-        data = self._load()
-        if agent_id not in data["agents"]:
-            raise KeyError(f"Agent 不存在: {agent_id}")
-        del data["agents"][agent_id]
-        self._save(data)
+        if self._sql:
+            self._sql.delete(agent_id)
+            return
+
+        def apply(data: dict) -> None:
+            if agent_id not in data["agents"]:
+                raise KeyError(f"Agent 不存在: {agent_id}")
+            del data["agents"][agent_id]
+
+        self._store.update(apply)
 
     def get_all_tags(self) -> list[str]:
         """获取所有已使用的标签"""
+        if self._sql:
+            return self._sql.all_tags()
         data = self._load()
         tags = set()
         for config in data["agents"].values():
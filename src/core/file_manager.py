@@ -14,6 +14,8 @@ from dataclasses import dataclass, field
 from typing import Optional, Dict, Any
 from datetime import datetime
 
+from src.utils.json_store import get_json_store
+
 
 @dataclass
 class ChangeRequest:
@@ -132,33 +134,27 @@ class FileManager:
         return ""
 
     def _load_metadata(self, metadata_path: str) -> dict:
-        """读取元数据文件"""
-        if not metadata_path or not os.path.exists(metadata_path):
+        """
+        读取元数据文件（返回缓存中的 dict，调用方不要修改）
+        由进程级 JsonStore 缓存，按 mtime/size 校验，文件未变化时不读盘
+        """
+        if not metadata_path:
             return {}
         try:
-            with open(metadata_path, "r", encoding="utf-8") as f:
-                return json.load(f).get("files", {})
+            return get_json_store(metadata_path).peek().get("files", {})
         except Exception:
             return {}
 
     def _save_metadata(self, metadata_path: str, data: dict) -> None:
-        """保存元数据文件 (Merge Update)"""
+        """保存元数据文件 (Merge Update)，读-改-写在文件锁内原子执行"""
         if not metadata_path:
             return
-        os.makedirs(os.path.dirname(metadata_path), exist_ok=True)
+
+        def merge(full_data: dict) -> None:
+            full_data.setdefault("files", {}).update(data)
+
         try:
-            # Load existing to merge (optimistic concurrency)
-            current = {}
-            if os.path.exists(metadata_path):
-                with open(metadata_path, "r", encoding="utf-8") as f:
-                    full_data = json.load(f)
-                    current = full_data.get("files", {})
-            
-            # Update
-            current.update(data)
-            
-            with open(metadata_path, "w", encoding="utf-8") as f:
-                json.dump({"files": current}, f, indent=2, ensure_ascii=False)
+            get_json_store(metadata_path).update(merge)
         except Exception as e:
             print(f"Error saving metadata: {e}")
 
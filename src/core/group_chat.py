@@ -450,7 +450,8 @@ class GroupChat:
                 "workflow": []
             }
     
-    async def execute_workflow(self, workflow: dict, initial_history: list = None, on_step_complete = None) -> list:
+    async def execute_workflow(self, workflow: dict, initial_history: list = None, on_step_complete = None,
+                               checkpoint=None, resume: bool = False) -> list:
         """
         Execute a pre-generated workflow plan.
         
@@ -458,6 +459,8 @@ class GroupChat:
             workflow: Workflow plan (from generate_workflow)
             initial_history: Initial conversation history (optional)
             on_step_complete: Optional async callback(step_result_dict)
+            checkpoint: Optional WorkflowCheckpoint (progress is saved / unchanged steps are reused)
+            resume: Continue the checkpointed run instead of starting a new one
         
         Returns:
             Complete conversation history after execution
@@ -469,8 +472,8 @@ class GroupChat:
             self.history = initial_history.copy()
         
         # Create executor and run
-        executor = WorkflowExecutor(workflow, self.members, self.history)
-        self.history = await executor.execute(on_step_complete=on_step_complete)
+        executor = WorkflowExecutor(workflow, self.members, self.history, checkpoint=checkpoint)
+        self.history = await executor.execute(on_step_complete=on_step_complete, resume=resume)
         
         return self.history
 
@@ -3,32 +3,47 @@ import json
 from datetime import datetime
 from typing import List, Dict, Any, Optional
 from src.core.file_manager import FileManager
+from src.utils.json_store import get_json_store
+from src.utils.message_log import MessageLog
+from src.core.workflow_checkpoint import WorkflowCheckpoint
+from src.utils.sqlite_store import SQLiteGroupStore, SQLiteMessageLog, get_sqlite_db, storage_backend
 
 class GroupChatManager:
     """
     Manages persistence of Group Chat configurations and messages.
     - Groups are stored in `_group_chats.json` within the workspace directory
-    - Messages are stored in `_group_messages_{group_id}.json`
+    - Messages are appended to a JSONL segment log in `_group_messages/{group_id}/`
+      (legacy `_group_messages_{group_id}.json` files are migrated on first access)
+    - With AGENTOS_STORAGE=sqlite both live in `{data_root}/agentos.db` instead
+    - Workflow checkpoints are JSON files in `_group_workflows/` under either backend
     """
-    def __init__(self, file_manager: FileManager):
+    def __init__(self, file_manager: FileManager, backend: Optional[str] = None):
         self.fm = file_manager
+        self._sql_db = None
+        self._sql_groups: Optional[SQLiteGroupStore] = None
+        if (backend or storage_backend()) == "sqlite":
+            self._sql_db = get_sqlite_db(self.fm.data_root)
+            self._sql_groups = SQLiteGroupStore(self._sql_db)
 
     def _get_storage_path(self, workspace_id: str) -> str:
         ws_path = self.fm._resolve_and_validate(workspace_id)
         return os.path.join(ws_path, "_group_chats.json")
 
+    def _groups_store(self, workspace_id: str):
+        return get_json_store(self._get_storage_path(workspace_id), default=list)
+
     def list_groups(self, workspace_id: str) -> List[Dict[str, Any]]:
-        path = self._get_storage_path(workspace_id)
-        if not os.path.exists(path):
-            return []
         try:
-            with open(path, "r", encoding="utf-8") as f:
-                return json.load(f)
+            if self._sql_groups:
+                return self._sql_groups.list_groups(workspace_id)
+            return self._groups_store(workspace_id).read()
         except Exception as e:
             print(f"Error loading groups for {workspace_id}: {e}")
             return []
 
     def get_group(self, workspace_id: str, group_id: str) -> Optional[Dict[str, Any]]:
+        if self._sql_groups:
+            return self._sql_groups.get(workspace_id, group_id)
         groups = self.list_groups(workspace_id)
         for g in groups:
             if g["id"] == group_id:
@@ -36,62 +51,113 @@ class GroupChatManager:
         return None
 
     def create_group(self, workspace_id: str, name: str, member_ids: List[str], supervisor_id: str) -> Dict[str, Any]:
-        groups = self.list_groups(workspace_id)
-        group_id = f"group_{name.lower().replace(' ', '_')}_{len(groups)+1}"
-
-        new_group = {
-            "id": group_id,
-            "name": name,
-            "members": member_ids,
-            "supervisor_id": supervisor_id,
-            "supervisor_prompt": "",  # Empty = use default template (legacy mode)
-            "workflow_supervisor_prompt": "",  # Empty = use default template (workflow mode)
-            "created_at": datetime.now().isoformat()
-        }
+        def build(count: int) -> Dict[str, Any]:
+            return {
+                "id": f"group_{name.lower().replace(' ', '_')}_{count+1}",
+                "name": name,
+                "members": member_ids,
+                "supervisor_id": supervisor_id,
+                "supervisor_prompt": "",  # Empty = use default template (legacy mode)
+                "workflow_supervisor_prompt": "",  # Empty = use default template (workflow mode)
+                "created_at": datetime.now().isoformat()
+            }
+
+        if self._sql_groups:
+            return self._sql_groups.create(workspace_id, build)
 
-        groups.append(new_group)
-        self._save_groups(workspace_id, groups)
-        return new_group
+        def apply(groups: List[Dict[str, Any]]) -> Dict[str, Any]:
+            new_group = build(len(groups))
+            groups.append(new_group)
+            return new_group
+
+        return self._groups_store(workspace_id).update(apply)
 
     def update_group(self, workspace_id: str, group_id: str, updates: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """Update group fields (supervisor_id, supervisor_prompt, name, etc.)."""
-        groups = self.list_groups(workspace_id)
-        for g in groups:
-            if g["id"] == group_id:
-                for key, value in updates.items():
-                    if key != "id":  # Never allow id change
-                        g[key] = value
-                self._save_groups(workspace_id, groups)
-                return g
-        return None
+        if self._sql_groups:
+            return self._sql_groups.update(workspace_id, group_id, updates)
+
+        def apply(groups: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+            for g in groups:
+                if g["id"] == group_id:
+                    for key, value in updates.items():
+                        if key != "id":  # Never allow id change
+                            g[key] = value
+                    return g
+            return None
+
+        if self.get_group(workspace_id, group_id) is None:
+            return None
+        return self._groups_store(workspace_id).update(apply)
 
     def delete_group(self, workspace_id: str, group_id: str):
-        groups = self.list_groups(workspace_id)
-        groups = [g for g in groups if g["id"] != group_id]
-        self._save_groups(workspace_id, groups)
+        if self._sql_groups:
+            self._sql_groups.delete(workspace_id, group_id)
+            return
+
+        def apply(groups: List[Dict[str, Any]]) -> None:
+            groups[:] = [g for g in groups if g["id"] != group_id]
+
+        self._groups_store(workspace_id).update(apply)
 
     def _save_groups(self, workspace_id: str, groups: List[Dict[str, Any]]):
-        path = self._get_storage_path(workspace_id)
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(groups, f, indent=2, ensure_ascii=False)
+        if self._sql_groups:
+            self._sql_groups.replace_all(workspace_id, groups)
+            return
+        self._groups_store(workspace_id).write(groups)
     
     # ========== Message Management ==========
     
     def _get_messages_path(self, workspace_id: str, group_id: str) -> str:
-        """Get path to messages file for a specific group."""
+        """Legacy single-file message history (migrated to the segment log on first access)."""
         ws_path = self.fm._resolve_and_validate(workspace_id)
         return os.path.join(ws_path, f"_group_messages_{group_id}.json")
-    
+
+    def _get_message_log(self, workspace_id: str, group_id: str):
+        """Append-only JSONL segment log: {workspace}/_group_messages/{group_id}/
+        (a SQLiteMessageLog with the same interface under the sqlite backend)"""
+        ws_path = self.fm._resolve_and_validate(workspace_id)
+        if self._sql_db:
+            log = SQLiteMessageLog(self._sql_db, workspace_id, group_id)
+        else:
+            log = MessageLog(os.path.join(ws_path, "_group_messages", group_id))
+        legacy_path = self._get_messages_path(workspace_id, group_id)
+        if os.path.exists(legacy_path) and not log.exists():
+            self._migrate_legacy_messages(legacy_path, log)
+        return log
+
+    @staticmethod
+    def _migrate_legacy_messages(legacy_path: str, log) -> None:
+        def load_legacy() -> List[Dict[str, Any]]:
+            with open(legacy_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+
+        try:
+            count = log.import_if_empty(load_legacy)
+            os.remove(legacy_path)
+            print(f"[GroupManager] Migrated {count} messages from {legacy_path}")
+        except FileNotFoundError:
+            pass  # Migrated concurrently
+        except Exception as e:
+            print(f"[GroupManager] Failed to migrate {legacy_path}: {e}")
+
     def get_messages(self, workspace_id: str, group_id: str, limit: int = 100) -> List[Dict[str, Any]]:
-        """Load message history for a group (最近 limit 条)."""
-        path = self._get_messages_path(workspace_id, group_id)
-        if not os.path.exists(path):
-            return []
+        """Load message history for a group (最近 limit 条，只解析日志末尾的 limit 条记录)."""
+        return self.get_messages_page(workspace_id, group_id, limit)["messages"]
+
+    def get_messages_page(self, workspace_id: str, group_id: str, limit: int = 100,
+                          before: Optional[int] = None, after: Optional[int] = None) -> Dict[str, Any]:
+        """Cursor pagination over message history by message id.
+
+        before=id returns the `limit` messages older than id, after=id the `limit` newer ones,
+        neither returns the latest `limit`. Every page costs one offset-index lookup,
+        regardless of how far back it is.
+        Returns {"messages", "has_more_before", "has_more_after"}.
+        """
         try:
-            with open(path, "r", encoding="utf-8") as f:
-                all_messages = json.load(f)
-            # Return latest limit with transformation
-            messages = all_messages[-limit:] if len(all_messages) > limit else all_messages
+            messages, has_more_before, has_more_after = self._get_message_log(workspace_id, group_id).page(
+                limit, before=before, after=after
+            )
             
             # Transform for frontend compatibility (name, role)
             for msg in messages:
@@ -103,15 +169,15 @@ class GroupChatManager:
                 if "agent_name" in msg and "name" not in msg:
                     msg["name"] = msg["agent_name"]
             
-            return messages
+            return {"messages": messages, "has_more_before": has_more_before, "has_more_after": has_more_after}
         except Exception as e:
             print(f"Error loading messages for {group_id}: {e}")
-            return []
+            return {"messages": [], "has_more_before": False, "has_more_after": False}
     
     def add_message(self, workspace_id: str, group_id: str, role: str, 
                     content: str, agent_id: Optional[str] = None, 
                     agent_name: Optional[str] = None, **kwargs) -> Dict[str, Any]:
-        """Add a message to group chat history.
+        """Add a message to group chat history (appends one record to the log).
         
         Args:
             role: 'user' or 'agent'
@@ -119,8 +185,6 @@ class GroupChatManager:
             agent_name: agent display name (if role='agent')
             **kwargs: Additional fields to store (e.g., is_plan, plan_data)
         """
-        messages = self._load_all_messages(workspace_id, group_id)
-        
         message = {
             "role": role,
             "content": content,
@@ -139,30 +203,26 @@ class GroupChatManager:
         # Merge extra fields
         message.update(kwargs)
             
-        messages.append(message)
-        self._save_messages(workspace_id, group_id, messages)
-        return message
+        return self._get_message_log(workspace_id, group_id).append(message)
     
     def _load_all_messages(self, workspace_id: str, group_id: str) -> List[Dict[str, Any]]:
         """Load all messages (内部使用，无limit)."""
-        path = self._get_messages_path(workspace_id, group_id)
-        if not os.path.exists(path):
-            return []
         try:
-            with open(path, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except:
+            return list(self._get_message_log(workspace_id, group_id))
+        except Exception:
             return []
-    
-    def _save_messages(self, workspace_id: str, group_id: str, messages: List[Dict[str, Any]]):
-        """Save messages to file."""
-        path = self._get_messages_path(workspace_id, group_id)
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(messages, f, indent=2, ensure_ascii=False)
 
     def clear_messages(self, workspace_id: str, group_id: str):
         """Clear all messages for a group."""
         path = self._get_messages_path(workspace_id, group_id)
         if os.path.exists(path):
             os.remove(path)
-            print(f"[GroupManager] Cleared messages for {group_id}")
+        self._get_message_log(workspace_id, group_id).clear()
+        print(f"[GroupManager] Cleared messages for {group_id}")
+
+    # ========== Workflow Checkpoints ==========
+
+    def get_workflow_checkpoint(self, workspace_id: str, group_id: str) -> WorkflowCheckpoint:
+        """Checkpoint of the group's latest workflow run: {workspace}/_group_workflows/{group_id}.json"""
+        ws_path = self.fm._resolve_and_validate(workspace_id)
+        return WorkflowCheckpoint(os.path.join(ws_path, "_group_workflows", f"{group_id}.json"))
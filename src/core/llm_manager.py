@@ -5,7 +5,10 @@ LLM Manager - 统一管理大模型提供商与实例
 
 import os
 import json
-from typing import List, Optional, Dict, Any
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Dict, Any, Callable, Tuple
 from dataclasses import dataclass, field
 
 @dataclass
@@ -18,6 +21,98 @@ class LLMProvider:
     api_key_env: str = "EMPTY"  # 对应 secrets.secrets["llm"][key] 的 key 名
     is_builtin: bool = False  # 系统内置供应商，用户不可删除
 
+
+class ModelClientPool:
+    """
+    进程级 LLM 客户端池 (LRU)
+
+    LangChain 的 Chat Model 实例内部持有 HTTP 连接池，复用实例即可复用
+    keep-alive 连接，避免每轮对话重新进行 TCP + TLS 握手。
+    Key: (provider_id, type, base_url, model, temperature, api_key 哈希)
+    """
+
+    def __init__(self, max_size: int = 64):
+        self.max_size = max_size
+        self._clients: "OrderedDict[Tuple, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_or_create(self, key: Tuple, factory: Callable[[], Any]) -> Any:
+        with self._lock:
+            client = self._clients.get(key)
+            if client is not None:
+                self._clients.move_to_end(key)
+                self.hits += 1
+                return client
+            self.misses += 1
+
+        # 在锁外构造，避免慢初始化阻塞其他请求
+        client = factory()
+
+        with self._lock:
+            existing = self._clients.get(key)
+            if existing is not None:
+                self._clients.move_to_end(key)
+                return existing
+            self._clients[key] = client
+            while len(self._clients) > self.max_size:
+                self._clients.popitem(last=False)
+                self.evictions += 1
+        return client
+
+    def invalidate(self, provider_id: Optional[str] = None) -> int:
+        """移除指定 Provider 的客户端 (provider_id 为 None 时清空)，返回移除数量"""
+        with self._lock:
+            if provider_id is None:
+                removed = len(self._clients)
+                self._clients.clear()
+                return removed
+            stale = [k for k in self._clients if k[0] == provider_id]
+            for k in stale:
+                del self._clients[k]
+            return len(stale)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._clients),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+
+
+_model_pool = ModelClientPool(max_size=int(os.environ.get("LLM_CLIENT_POOL_SIZE", "64")))
+
+# OpenRouter 专用的共享 httpx 客户端（带固定 Header），所有 ChatOpenAI 实例共用连接池
+_OPENROUTER_HEADERS = {
+    "HTTP-Referer": "https://coworkai.xin",
+    "X-Title": "BASE Coworker AI"
+}
+_openrouter_clients: Dict[str, Any] = {}
+_openrouter_lock = threading.Lock()
+
+
+def _get_openrouter_http_clients():
+    """延迟创建共享的 httpx.Client / httpx.AsyncClient"""
+    with _openrouter_lock:
+        if not _openrouter_clients:
+            import httpx
+            _openrouter_clients["sync"] = httpx.Client(headers=_OPENROUTER_HEADERS)
+            _openrouter_clients["async"] = httpx.AsyncClient(headers=_OPENROUTER_HEADERS)
+        return _openrouter_clients["sync"], _openrouter_clients["async"]
+
+
+def get_model_pool() -> ModelClientPool:
+    """返回进程级 LLM 客户端池"""
+    return _model_pool
+
+
 class LLMManager:
     CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "config", "llm_providers.json")
 
@@ -25,6 +120,7 @@ class LLMManager:
         if config_path:
             self.CONFIG_PATH = config_path
         self.providers: Dict[str, LLMProvider] = {}
+        self._persisted: Dict[str, dict] = {}  # 上次加载/保存时的 Provider 快照，用于检测变更
         self.load_providers()
 
     def load_providers(self):
@@ -52,6 +148,13 @@ class LLMManager:
                         print(f"Error parsing provider {p_data.get('id')}: {e}")
         except Exception as e:
             print(f"Error loading providers: {e}")
+        self._persisted = self._snapshot()
+
+    def _snapshot(self) -> Dict[str, dict]:
+        return {
+            pid: dict(p.__dict__) if isinstance(p, LLMProvider) else dict(p)
+            for pid, p in self.providers.items()
+        }
 
     def save_providers(self):
         """保存 Provider 配置到 JSON"""
@@ -69,6 +172,14 @@ class LLMManager:
                 json.dump(data, f, indent=2, ensure_ascii=False)
         except Exception as e:
             print(f"Error saving providers: {e}")
+            return
+
+        # 已变更 / 已删除的 Provider 对应的池化客户端失效
+        current = self._snapshot()
+        for pid in set(self._persisted) | set(current):
+            if self._persisted.get(pid) != current.get(pid):
+                _model_pool.invalidate(pid)
+        self._persisted = current
 
     def get_provider(self, provider_id: str) -> Optional[LLMProvider]:
         return self.providers.get(provider_id)
@@ -107,15 +218,31 @@ class LLMManager:
         return os.environ.get(api_key_env, str(api_key_env))
 
     def get_model(self, provider_id: str, model_name: str, temperature: float = 0.7):
-        """获取 LangChain Model 实例"""
+        """获取 LangChain Model 实例（从进程级客户端池复用）"""
         provider = self.get_provider(provider_id)
         if not provider:
             raise ValueError(f"Provider not found: {provider_id}")
 
         api_key = self._get_api_key(provider.api_key_env)
-        
+        key_hash = hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16] if api_key else ""
+        pool_key = (provider_id, provider.type, provider.base_url, model_name, temperature, key_hash)
+
+        return _model_pool.get_or_create(
+            pool_key,
+            lambda: self._create_model(provider, model_name, temperature, api_key),
+        )
+
+    @staticmethod
+    def pool_stats() -> Dict[str, Any]:
+        """LLM 客户端池命中/未命中统计"""
+        return _model_pool.stats()
+
+    def _create_model(self, provider: LLMProvider, model_name: str, temperature: float, api_key: str):
+        """实例化 LangChain Model（仅在客户端池未命中时调用）"""
+        provider_id = provider.id
+
         # Debug logging
-        print(f"[LLMManager] get_model called:")
+        print(f"[LLMManager] creating model client:")
         print(f"  provider_id={provider_id}, type={provider.type}")
         print(f"  model={model_name}, base_url={provider.base_url}")
         print(f"  api_key_env (raw field)={provider.api_key_env[:20]}..." if provider.api_key_env else "  api_key_env=EMPTY")
@@ -161,13 +288,9 @@ class LLMManager:
             
             # OpenRouter requires HTTP-Referer and X-Title headers for free models
             if provider.base_url and "openrouter.ai" in provider.base_url:
-                import httpx
-                extra_headers = {
-                    "HTTP-Referer": "https://coworkai.xin",
-                    "X-Title": "BASE Coworker AI"
-                }
-                kwargs["http_client"] = httpx.Client(headers=extra_headers)
-                kwargs["http_async_client"] = httpx.AsyncClient(headers=extra_headers)
+                http_client, http_async_client = _get_openrouter_http_clients()
+                kwargs["http_client"] = http_client
+                kwargs["http_async_client"] = http_async_client
             
             return ChatOpenAI(**kwargs)
             
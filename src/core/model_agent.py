@@ -10,6 +10,7 @@ from src.core.file_manager import FileManager
 from src.core.persona_prompts import get_persona_prompt
 from src.utils.rag_ingestion import RAGIngestion
 from src.tools.rag_tools import get_rag_tool
+from src.utils.tool_dispatch import ainvoke_tool, is_parallel_safe, dispatch_async
 
 class ModelAgent(BaseAgent):
     """
@@ -302,34 +303,36 @@ class ModelAgent(BaseAgent):
             return []
     
     async def _execute_tools_with_events(self, tool_calls, tools, fire):
-        """执行工具调用并发射事件，返回ToolMessage列表"""
-        results = []
+        """并发执行工具调用，每个完成时立即发射 tool_result 事件，返回按调用顺序排列的ToolMessage列表"""
         tool_map = {t.name: t for t in tools}
 
-        for tool_call in tool_calls:
+        async def run_one(tool_call):
+            return await ainvoke_tool(tool_map[tool_call.get("name")], tool_call.get("args", {}))
+
+        def is_safe(tool_call):
+            tool = tool_map.get(tool_call.get("name"))
+            return tool is None or is_parallel_safe(tool)
+
+        def to_content(tool_call, outcome) -> str:
             tool_name = tool_call.get("name")
-            tool_args = tool_call.get("args", {})
-            tool_id = tool_call.get("id", "unknown")
+            if tool_name not in tool_map:
+                return f"工具 {tool_name} 未找到"
+            if isinstance(outcome, Exception):
+                return f"工具 {tool_name} 执行失败: {str(outcome)}"
+            return str(outcome)
 
-            if tool_name in tool_map:
-                tool = tool_map[tool_name]
-                try:
-                    if hasattr(tool, "ainvoke"):
-                        result = await tool.ainvoke(tool_args)
-                    else:
-                        result = tool.invoke(tool_args)
-                    result_str = str(result)
-                    await fire("tool_result", tool=tool_name, result=result_str[:500])
-                    results.append(ToolMessage(content=result_str, tool_call_id=tool_id))
-                except Exception as e:
-                    error_msg = f"工具 {tool_name} 执行失败: {str(e)}"
-                    await fire("tool_result", tool=tool_name, result=error_msg)
-                    results.append(ToolMessage(content=error_msg, tool_call_id=tool_id))
-            else:
-                error_msg = f"工具 {tool_name} 未找到"
-                await fire("tool_result", tool=tool_name, result=error_msg)
-                results.append(ToolMessage(content=error_msg, tool_call_id=tool_id))
-        return results
+        async def on_result(index, tool_call, outcome):
+            content = to_content(tool_call, outcome)
+            succeeded = tool_call.get("name") in tool_map and not isinstance(outcome, Exception)
+            result = content[:500] if succeeded else content
+            await fire("tool_result", tool=tool_call.get("name"), result=result,
+                       id=tool_call.get("id", "unknown"), index=index)
+
+        outcomes = await dispatch_async(tool_calls, run_one, is_safe, on_result=on_result)
+        return [
+            ToolMessage(content=to_content(tool_call, outcome), tool_call_id=tool_call.get("id", "unknown"))
+            for tool_call, outcome in zip(tool_calls, outcomes)
+        ]
 
     async def _execute_tools(self, tool_calls, tools):
         """执行工具调用，返回ToolMessage列表"""
@@ -0,0 +1,96 @@
+"""
+Workflow Checkpoint for Group Chat.
+
+Persists WorkflowExecutor progress for one group so that a run interrupted by a
+process restart or an SSE disconnect can be resumed, and so that re-running an
+unchanged plan does not pay for steps whose inputs are the same.
+
+Checkpoint format ({workspace}/_group_workflows/{group_id}.json):
+{
+  "status": "running" | "completed" | "failed",
+  "workflow": {...},          # the plan being executed
+  "history": [...],           # initial conversation history of the run
+  "error": "...",             # set when status == "failed"
+  "updated_at": "...",
+  "steps": {
+    "1": {
+      "status": "completed" | "in_progress",
+      "input_hash": "...",    # see WorkflowExecutor.step_input_hash
+      "result": "...",        # completed only
+      "messages": [...],      # messages the step has added so far
+      "round": 1,             # in_progress only: next revision round
+      "executor_prompt": "...",  # in_progress only: prompt for that round
+      "reported": true        # on_step_complete has run for this step in the current run
+    }
+  }
+}
+"""
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from src.utils.json_store import get_json_store
+
+
+class WorkflowCheckpoint:
+    """Read / update the checkpoint file of one group (all writes are atomic JsonStore updates)."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._store = get_json_store(path, default=dict)
+
+    def load(self) -> Dict[str, Any]:
+        return self._store.read()
+
+    def exists(self) -> bool:
+        return self._store.exists()
+
+    def _update(self, apply) -> None:
+        def wrapped(data: Dict[str, Any]) -> None:
+            data.setdefault("steps", {})
+            apply(data)
+            data["updated_at"] = datetime.now().isoformat()
+
+        self._store.update(wrapped)
+
+    def start(self, workflow: dict, history: List[Dict[str, Any]], resume: bool = False) -> Dict[str, Dict[str, Any]]:
+        """
+        Begin a run and return the saved steps ({step_num: entry}).
+
+        Saved steps are kept as a cache either way; a fresh run clears the
+        "reported" flags so every step is reported again.
+        """
+        def apply(data: Dict[str, Any]) -> None:
+            data.update({"status": "running", "workflow": workflow, "history": history})
+            data.pop("error", None)
+            if not resume:
+                for entry in data["steps"].values():
+                    entry.pop("reported", None)
+
+        self._update(apply)
+        return {int(step): entry for step, entry in self.load()["steps"].items()}
+
+    def save_step(self, step_num: int, entry: Dict[str, Any]) -> None:
+        def apply(data: Dict[str, Any]) -> None:
+            data["steps"][str(step_num)] = entry
+
+        self._update(apply)
+
+    def mark_reported(self, step_num: int) -> None:
+        def apply(data: Dict[str, Any]) -> None:
+            entry = data["steps"].get(str(step_num))
+            if entry is not None:
+                entry["reported"] = True
+
+        self._update(apply)
+
+    def finish(self, error: Optional[str] = None) -> None:
+        def apply(data: Dict[str, Any]) -> None:
+            data["status"] = "failed" if error else "completed"
+            if error:
+                data["error"] = error
+
+        self._update(apply)
+
+    def clear(self) -> None:
+        self._store.write({})
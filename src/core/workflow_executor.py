@@ -5,10 +5,26 @@ This module executes pre-defined workflows (generated by Supervisor),
 allowing for deterministic, one-shot planning instead of iterative decision-making.
 """
 
+import os
+import re
 import json
+import time
+import hashlib
 import asyncio
 from typing import List, Dict, Any, Optional
 from src.core.model_agent import ModelAgent
+from src.utils.tool_dispatch import run_blocking
+
+
+STEP_RESULT_PATTERN = re.compile(r"\{step_(\d+)_result\}")
+MAX_PARALLEL_STEPS = int(os.environ.get("WORKFLOW_MAX_PARALLEL_STEPS", "3"))
+
+
+def log_debug(msg):
+    try:
+        with open("backend_debug.log", "a", encoding="utf-8") as f:
+            f.write(f"[{time.strftime('%H:%M:%S')}] {msg}\n")
+    except: pass
 
 
 class WorkflowExecutor:
@@ -27,13 +43,28 @@ class WorkflowExecutor:
           "executor_prompt": "...",
           "reviewer_agent": "审核员",  # or null
           "reviewer_prompt": "...",    # or null
-          "max_revision_rounds": 3
+          "max_revision_rounds": 3,
+          "depends_on": [1]            # optional
         }
       ]
     }
+
+    Steps form a DAG: a step depends on every earlier step whose {step_N_result}
+    appears in its executor_prompt / reviewer_prompt, plus any listed in depends_on.
+    Steps whose dependencies are done run concurrently (at most max_parallel_steps
+    at a time). Each step sees the initial history plus the messages of the steps
+    it (transitively) depends on; completed steps are appended to the history and
+    reported to on_step_complete in workflow order, so the output does not depend
+    on which step happened to finish first.
+
+    With a checkpoint (see workflow_checkpoint.WorkflowCheckpoint) every finished
+    step and every revision round is saved. A later run reuses a saved step whose
+    input hash is unchanged instead of calling the agents again, and continues an
+    interrupted step from its last saved revision round.
     """
     
-    def __init__(self, workflow: dict, agents: Dict[str, ModelAgent], history: List[Dict[str, Any]]):
+    def __init__(self, workflow: dict, agents: Dict[str, ModelAgent], history: List[Dict[str, Any]],
+                 max_parallel_steps: Optional[int] = None, checkpoint=None):
         """
         Initialize the executor.
         
@@ -41,75 +72,225 @@ class WorkflowExecutor:
             workflow: The workflow plan (dict with "workflow" key)
             agents: Dict of agent_name -> ModelAgent instances
             history: Initial conversation history
+            max_parallel_steps: Max steps running at once (default WORKFLOW_MAX_PARALLEL_STEPS)
+            checkpoint: Optional WorkflowCheckpoint to save progress to / reuse steps from
         """
         self.workflow = workflow
         self.agents = agents
         self.history = history.copy()  # Don't mutate original
         self.step_results: Dict[int, str] = {}  # {step_num: result}
+        self.max_parallel_steps = max_parallel_steps or MAX_PARALLEL_STEPS
+        self.checkpoint = checkpoint
+        self.step_hashes: Dict[int, str] = {}  # {step_num: input hash}
+        self.dependencies = self.build_dependencies()
     
-    async def execute(self, on_step_complete=None) -> List[Dict[str, Any]]:
+    def build_dependencies(self) -> Dict[int, List[int]]:
+        """
+        Infer the step dependency DAG.
+
+        Only steps listed earlier count as dependencies (a forward reference was never
+        filled by the sequential executor either), so the graph cannot contain cycles.
+
+        Returns:
+            {step_num: [earlier step numbers it depends on]}
+        """
+        dependencies: Dict[int, List[int]] = {}
+        for step_config in self.workflow.get("workflow", []):
+            refs = set()
+            for key in ("executor_prompt", "reviewer_prompt"):
+                refs.update(int(n) for n in STEP_RESULT_PATTERN.findall(step_config.get(key) or ""))
+            for n in step_config.get("depends_on") or []:
+                try:
+                    refs.add(int(n))
+                except (TypeError, ValueError):
+                    pass
+            dependencies[step_config["step"]] = sorted(r for r in refs if r in dependencies)
+        return dependencies
+
+    def step_input_hash(self, step_config: dict, dependencies: List[int],
+                        history: List[Dict[str, Any]]) -> str:
+        """
+        Hash of everything a step's output is derived from: its agents and round
+        limit, the executor / reviewer prompts with placeholders filled in, the
+        input hashes of the steps it depends on and a digest of the history it
+        sees (initial history plus its ancestors' messages).
+        """
+        step_num = step_config["step"]
+        reviewer_prompt = step_config.get("reviewer_prompt")
+        encoded_history = json.dumps(history, ensure_ascii=False, sort_keys=True, default=str)
+        payload = {
+            "step": {k: step_config.get(k) for k in (
+                "step", "executor_agent", "reviewer_agent", "max_revision_rounds",
+            )},
+            "executor_prompt": self._fill_placeholders(step_config["executor_prompt"], step_num),
+            "reviewer_prompt": self._fill_placeholders(reviewer_prompt, step_num) if reviewer_prompt else None,
+            "dependencies": [[dep, self.step_hashes[dep]] for dep in dependencies],
+            "history": hashlib.sha256(encoded_history.encode("utf-8")).hexdigest(),
+        }
+        encoded = json.dumps(payload, ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+    async def execute(self, on_step_complete=None, resume: bool = False) -> List[Dict[str, Any]]:
         """
         Execute the entire workflow.
         
         Args:
-            on_step_complete: Optional async callback(step_result_dict)
+            on_step_complete: Optional async callback(step_result_dict), called in workflow order
+            resume: Continue the checkpointed run: steps already reported in it are not reported again
         
         Returns:
             Updated conversation history with all agent responses
         """
         workflow_steps = self.workflow.get("workflow", [])
-        
-        import time
-        def log_debug(msg):
-            try:
-                with open("backend_debug.log", "a", encoding="utf-8") as f:
-                    f.write(f"[{time.strftime('%H:%M:%S')}] {msg}\n")
-            except: pass
+        dependencies = self.dependencies
 
         log_debug(f"\n[WorkflowExecutor] Starting workflow: {self.workflow.get('plan_name', 'Untitled')}")
-        log_debug(f"[WorkflowExecutor] Total steps: {len(workflow_steps)}")
-        
+        log_debug(f"[WorkflowExecutor] Total steps: {len(workflow_steps)}, dependencies: {dependencies}")
+
+        # Transitive dependencies, listed in workflow order
+        ancestors: Dict[int, List[int]] = {}
         for step_config in workflow_steps:
-            log_debug(f"[WorkflowExecutor] Executing Step {step_config.get('step')}...")
+            step_num = step_config["step"]
+            closure = set(dependencies[step_num])
+            for dep in dependencies[step_num]:
+                closure.update(ancestors[dep])
+            ancestors[step_num] = [c["step"] for c in workflow_steps if c["step"] in closure]
+
+        # Checkpoint writes are file I/O with fsync: keep them off the event loop
+        saved_steps = {}
+        if self.checkpoint:
+            saved_steps = await run_blocking(self.checkpoint.start, self.workflow, self.history, resume)
+
+        base_history = self.history.copy()
+        step_messages: Dict[int, List[Dict[str, Any]]] = {}
+        failures: Dict[int, Exception] = {}
+        cached_steps = set()
+        finished = {c["step"]: asyncio.Event() for c in workflow_steps}
+        semaphore = asyncio.Semaphore(max(1, self.max_parallel_steps))
+        flush_lock = asyncio.Lock()
+        emitted = 0
+        aborted = False
+
+        async def flush():
+            """Append / report finished steps in workflow order, up to the first unfinished one."""
+            nonlocal emitted
+            async with flush_lock:
+                while emitted < len(workflow_steps) and finished[workflow_steps[emitted]["step"]].is_set():
+                    step_config = workflow_steps[emitted]
+                    emitted += 1
+                    step_num = step_config["step"]
+                    if step_num in failures:
+                        self.history.append({
+                            "role": "assistant", 
+                            "name": "System", 
+                            "content": f"Critical Error in Step {step_num}: {failures[step_num]}"
+                        })
+                        continue
+                    if step_num not in self.step_results:
+                        continue  # skipped after an earlier failure
+                    self.history.extend(step_messages[step_num])
+
+                    saved = saved_steps.get(step_num) or {}
+                    if resume and saved.get("reported") and saved.get("input_hash") == self.step_hashes[step_num]:
+                        continue  # delivered before the interruption
+
+                    # Trigger callback
+                    if on_step_complete:
+                        step_data = {
+                            "step": step_num,
+                            "agent_name": step_config["executor_agent"],
+                            "content": self.step_results[step_num],
+                            "timestamp": time.time(),
+                            "cached": step_num in cached_steps
+                        }
+                        if asyncio.iscoroutinefunction(on_step_complete):
+                            await on_step_complete(step_data)
+                        else:
+                            on_step_complete(step_data)
+                    if self.checkpoint:
+                        await run_blocking(self.checkpoint.mark_reported, step_num)
+
+        async def run(step_config: dict):
+            nonlocal aborted
+            step_num = step_config["step"]
             try:
-                result = await self._execute_step(step_config)
-                self.step_results[step_config["step"]] = result
-                
-                # Trigger callback
-                if on_step_complete:
-                    # We might want to pass the last added message(s)
-                    # For simplicity, let's pass the step info and result
-                    step_data = {
-                        "step": step_config["step"],
-                        "agent_name": step_config["executor_agent"],
-                        "content": result,
-                        "timestamp": time.time()
-                    }
-                    if asyncio.iscoroutinefunction(on_step_complete):
-                        await on_step_complete(step_data)
-                    else:
-                        on_step_complete(step_data)
-                        
-            except Exception as e:
-                log_debug(f"[WorkflowExecutor] Step {step_config.get('step')} Failed: {e}")
-                import traceback
-                log_debug(traceback.format_exc())
-                self.history.append({
-                    "role": "assistant", 
-                    "name": "System", 
-                    "content": f"Critical Error in Step {step_config.get('step')}: {e}"
-                })
-                break
+                for dep in dependencies[step_num]:
+                    await finished[dep].wait()
+                async with semaphore:
+                    # A failure stops any step that has not started yet (like the sequential break)
+                    if aborted:
+                        return
+                    log_debug(f"[WorkflowExecutor] Executing Step {step_num}...")
+                    history = base_history.copy()
+                    for dep in ancestors[step_num]:
+                        history.extend(step_messages.get(dep, []))
+                    context_len = len(history)
+                    input_hash = self.step_input_hash(step_config, dependencies[step_num], history)
+                    self.step_hashes[step_num] = input_hash
+                    saved = saved_steps.get(step_num)
+                    if saved and saved.get("input_hash") != input_hash:
+                        saved = None
+                    if saved and saved.get("status") == "completed":
+                        log_debug(f"[WorkflowExecutor] Step {step_num} unchanged, reusing checkpoint")
+                        cached_steps.add(step_num)
+                        self.step_results[step_num] = saved["result"]
+                        step_messages[step_num] = saved["messages"]
+                        return
+                    try:
+                        result = await self._execute_step(
+                            step_config, history, resume_state=saved,
+                            on_round=self._round_saver(step_config, input_hash, context_len, history),
+                        )
+                        self.step_results[step_num] = result
+                        step_messages[step_num] = history[context_len:]
+                        if self.checkpoint and step_config["executor_agent"] in self.agents:
+                            await run_blocking(self.checkpoint.save_step, step_num, {
+                                "status": "completed", "input_hash": input_hash,
+                                "result": result, "messages": step_messages[step_num],
+                            })
+                    except Exception as e:
+                        log_debug(f"[WorkflowExecutor] Step {step_num} Failed: {e}")
+                        import traceback
+                        log_debug(traceback.format_exc())
+                        failures[step_num] = e
+                        aborted = True
+            finally:
+                finished[step_num].set()
+                await flush()
+
+        await asyncio.gather(*(run(step_config) for step_config in workflow_steps))
+
+        if self.checkpoint:
+            error = "; ".join(f"Step {n}: {e}" for n, e in failures.items()) or None
+            await run_blocking(self.checkpoint.finish, error)
         
         log_debug(f"[WorkflowExecutor] Workflow completed!")
         return self.history
     
-    async def _execute_step(self, step_config: dict) -> str:
+    def _round_saver(self, step_config: dict, input_hash: str, context_len: int, history: List[Dict[str, Any]]):
+        """Async on_round callback saving a step's revision state to the checkpoint (None without one)"""
+        if not self.checkpoint:
+            return None
+
+        async def save(next_round: int, executor_prompt: str) -> None:
+            await run_blocking(self.checkpoint.save_step, step_config["step"], {
+                "status": "in_progress", "input_hash": input_hash,
+                "round": next_round, "executor_prompt": executor_prompt,
+                "messages": history[context_len:],
+            })
+
+        return save
+
+    async def _execute_step(self, step_config: dict, history: List[Dict[str, Any]],
+                            resume_state: Optional[dict] = None, on_round=None) -> str:
         """
         Execute one workflow step, with optional review/revision loop.
         
         Args:
             step_config: Step configuration from workflow
+            history: This step's conversation context; the step's messages are appended to it
+            resume_state: Saved "in_progress" checkpoint entry to continue from
+            on_round: Optional async callback(next_round, executor_prompt) after a rejected round
         
         Returns:
             Final approved result for this step
@@ -132,7 +313,7 @@ class WorkflowExecutor:
         if not executor_agent:
             error_msg = f"[ERROR] Executor agent '{executor_name}' not found!"
             print(error_msg)
-            self.history.append({
+            history.append({
                 "role": "assistant",
                 "name": "System",
                 "content": error_msg
@@ -146,21 +327,27 @@ class WorkflowExecutor:
             step_config["executor_prompt"],
             step_num
         )
+        first_round = 0
+        if resume_state and resume_state.get("status") == "in_progress":
+            first_round = resume_state["round"]
+            executor_prompt = resume_state["executor_prompt"]
+            history.extend(resume_state["messages"])
+            print(f"[{step_name}] Resuming from round {first_round + 1}")
         
         # Revision loop
-        for round_num in range(max_rounds + 1):
+        for round_num in range(first_round, max_rounds + 1):
             round_label = f"Round {round_num + 1}/{max_rounds + 1}" if max_rounds > 0 else "Execution"
             print(f"[{step_name}] {round_label}")
             
             # Execute
             result = await executor_agent.execute_with_context(
                 executor_prompt,
-                self.history
+                history
             )
             
             print(f"[{executor_name}] Output: {result[:100]}...")
             
-            self.history.append({
+            history.append({
                 "role": "assistant",
                 "name": executor_name,
                 "content": result
@@ -176,12 +363,12 @@ class WorkflowExecutor:
                 
                 review = await reviewer_agent.execute_with_context(
                     reviewer_prompt,
-                    self.history
+                    history
                 )
                 
                 print(f"[{reviewer_name}] Review: {review[:100]}...")
                 
-                self.history.append({
+                history.append({
                     "role": "assistant",
                     "name": reviewer_name,
                     "content": review
@@ -201,6 +388,8 @@ class WorkflowExecutor:
 {result}
 
 请根据审核意见进行修改。"""
+                    if on_round:
+                        await on_round(round_num + 1, executor_prompt)
                 else:
                     # Max rounds reached, force accept
                     print(f"[{reviewer_name}] ⚠ Max revisions reached, force accepting")
@@ -224,12 +413,14 @@ class WorkflowExecutor:
         
         Supported placeholders:
         - {user_input}: Original user request
-        - {step_N_result}: Result from step N (e.g., {step_1_result})
+        - {step_N_result}: Result from step N (e.g., {step_1_result}); only steps the
+          current step depends on are filled, so the prompt does not depend on which
+          unrelated step happened to finish first (forward references stay as-is)
         - {step_result}: Current step's execution result (for reviewer prompts)
         
         Args:
             prompt: Prompt template with placeholders
-            current_step: Current step number (for logging)
+            current_step: Current step number (selects which step results are filled)
             step_result: Optional current step result (for reviewer)
         
         Returns:
@@ -238,16 +429,12 @@ class WorkflowExecutor:
         filled = prompt
         
         # {user_input} - Original user request
-        user_msg = next(
-            (m["content"] for m in self.history if m["role"] == "user"),
-            ""
-        )
-        filled = filled.replace("{user_input}", user_msg)
+        filled = filled.replace("{user_input}", self._user_input())
         
-        # {step_N_result} - Results from previous steps
-        for step_num, result in self.step_results.items():
-            placeholder = f"{{step_{step_num}_result}}"
-            filled = filled.replace(placeholder, result)
+        # {step_N_result} - Results from the steps this one depends on
+        for step_num in self.dependencies.get(current_step, []):
+            if step_num in self.step_results:
+                filled = filled.replace(f"{{step_{step_num}_result}}", self.step_results[step_num])
         
         # {step_result} - Current step result (for reviewer)
         if step_result:
@@ -255,6 +442,13 @@ class WorkflowExecutor:
         
         return filled
     
+    def _user_input(self) -> str:
+        """The original user request (first user message in the history)."""
+        return next(
+            (m["content"] for m in self.history if m["role"] == "user"),
+            ""
+        )
+
     def get_step_results(self) -> Dict[int, str]:
         """Get all step results."""
         return self.step_results.copy()
@@ -38,6 +38,9 @@ Analyze the user's request and design a **COMPLETE WORKFLOW** that accomplishes
 5. **Step dependencies**:
    - Later steps can reference earlier steps using {{step_N_result}}
    - Example: Step 3 can use {{step_1_result}} and {{step_2_result}}
+   - Steps that do not reference each other run in parallel
+   - Optional `depends_on`: list of earlier step numbers that must finish first,
+     for steps that need earlier work done without using its result (e.g. "depends_on": [1])
 
 ## Output Format
 
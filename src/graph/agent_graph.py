@@ -3,32 +3,45 @@ AgentGraph - LangGraph StateGraph 构建
 定义 Agent 的工作流程：Router → Agent → Tool → Approval → End
 """
 
+import threading
+
 from langgraph.graph import StateGraph, END
 
 from .state import AgentState
 from .nodes import (
     router_node,
     agent_node,
+    agent_node_async,
     tool_node,
+    tool_node_async,
     approval_node,
     should_use_tools,
     should_approve,
 )
 
 
-def build_agent_graph() -> StateGraph:
+# 图结构版本号：修改节点/边的拓扑时递增，旧版本的编译结果不会被复用
+GRAPH_VERSION = "1"
+# 异步图：拓扑相同，agent / tools 节点为 async 版本（ainvoke/astream_events 使用）
+ASYNC_GRAPH_VERSION = "1-async"
+
+
+def build_agent_graph(async_nodes: bool = False) -> StateGraph:
     """
     构建 Agent 工作流图
     
     流程:
     START → router → agent → [tools? → agent] → [approval?] → END
+
+    Args:
+        async_nodes: 使用 agent_node_async / tool_node_async（图只能通过 ainvoke / astream 运行）
     """
     graph = StateGraph(AgentState)
 
     # 添加节点
     graph.add_node("router", router_node)
-    graph.add_node("agent", agent_node)
-    graph.add_node("tools", tool_node)
+    graph.add_node("agent", agent_node_async if async_nodes else agent_node)
+    graph.add_node("tools", tool_node_async if async_nodes else tool_node)
     graph.add_node("approval", approval_node)
 
     # 设置入口
@@ -68,3 +81,45 @@ def create_compiled_graph():
     """创建并编译图，返回可直接 invoke 的 Runnable"""
     graph = build_agent_graph()
     return graph.compile()
+
+
+
+# ----- Compiled Graph Registry -----
+# 编译后的图是无状态的（状态随 invoke 传入），可以在整个进程内复用。
+
+_GRAPH_BUILDERS = {
+    GRAPH_VERSION: build_agent_graph,
+    ASYNC_GRAPH_VERSION: lambda: build_agent_graph(async_nodes=True),
+}
+_compiled_graphs: dict = {}
+_registry_lock = threading.Lock()
+
+
+def get_compiled_graph(version: str = GRAPH_VERSION):
+    """获取进程级缓存的已编译图（首次调用时编译）"""
+    compiled = _compiled_graphs.get(version)
+    if compiled is not None:
+        return compiled
+
+    with _registry_lock:
+        compiled = _compiled_graphs.get(version)
+        if compiled is None:
+            builder = _GRAPH_BUILDERS.get(version)
+            if builder is None:
+                raise KeyError(f"Unknown graph version: {version}")
+            compiled = builder().compile()
+            _compiled_graphs[version] = compiled
+    return compiled
+
+
+def warm_graph_registry() -> list[str]:
+    """启动时预编译所有已注册版本的图，返回已编译的版本列表"""
+    for version in _GRAPH_BUILDERS:
+        get_compiled_graph(version)
+    return list(_compiled_graphs.keys())
+
+
+def clear_graph_registry() -> None:
+    """清空已编译图缓存（测试或热重载节点代码时使用）"""
+    with _registry_lock:
+        _compiled_graphs.clear()
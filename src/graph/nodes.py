@@ -1,15 +1,25 @@
 """
 Graph Nodes - LangGraph 各节点实现
 Router → Agent → Tool → Approval → End
+
+agent / tools 节点各有同步版本与异步版本（*_async），分别用于同步图与异步图
+（见 agent_graph.GRAPH_VERSION / ASYNC_GRAPH_VERSION）。
 """
 
+import os
 import json
 import re
+import hashlib
+import threading
+from collections import OrderedDict
 from typing import Optional
 
 from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
 
 from .state import AgentState
+from src.utils.tool_dispatch import (
+    run_blocking, ainvoke_tool, is_parallel_safe, dispatch_async, dispatch_sync,
+)
 
 
 def _get_llm(agent_config: dict, config_path: str = None):
@@ -54,26 +64,96 @@ def _get_llm(agent_config: dict, config_path: str = None):
             raise ValueError(f"无法初始化 LLM，请检查设置: {e}")
 
 
+# ----- Tool Catalogue Cache -----
+# 技能由进程级 SkillRegistry 增量加载；包装后的工具列表按
+# (工具/技能配置哈希, base_path, FileManager, 技能注册表版本) 缓存。
+
+_TOOL_CACHE_MAX = 256
+_tool_cache: "OrderedDict[tuple, list]" = OrderedDict()
+_skill_tools_cache: dict = {"version": None, "tools": {}}
+_tool_cache_lock = threading.Lock()
+
+
+def _agent_tools_hash(agent_config: dict) -> str:
+    """只对影响工具选择的字段做哈希"""
+    payload = json.dumps(
+        [agent_config.get("tools", []), agent_config.get("skills", [])],
+        ensure_ascii=False,
+    )
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def _get_skill_tools(registry) -> dict:
+    """将注册表中的技能包装为 LangChain Tool（按注册表版本缓存）"""
+    from langchain_core.tools import StructuredTool
+
+    with _tool_cache_lock:
+        if _skill_tools_cache["version"] == registry.version:
+            return _skill_tools_cache["tools"]
+
+    skill_tools = {}
+    for name, skill_data in registry.skills.items():
+        # 将技能函数包装为 LangChain Tool
+        # 注意: 需要捕获 closure 变量
+        def create_wrapper(run_func):
+            def wrapper(**kwargs):
+                return run_func(**kwargs)
+            return wrapper
+        
+        wrapper_func = create_wrapper(skill_data["run"])
+        
+        tool = StructuredTool.from_function(
+            func=wrapper_func,
+            name=skill_data["name"],
+            description=skill_data["description"]
+        )
+        skill_tools[skill_data["name"]] = tool
+
+    with _tool_cache_lock:
+        _skill_tools_cache["version"] = registry.version
+        _skill_tools_cache["tools"] = skill_tools
+    return skill_tools
+
+
 def _get_tools(agent_config: dict, base_path: str = None) -> list:
     """根据 Agent 配置获取工具和技能列表
     
     Args:
         agent_config: Agent 配置字典
         base_path: Agent 根目录 (用于上下文感知工具)，如果为 None 则使用全局工具
+
+    Returns:
+        新的列表对象（调用方可以安全 append，例如追加 RAG 工具）
     """
-    from langchain_core.tools import StructuredTool
     from src.tools.file_tools import FILE_TOOLS, create_agent_file_tools, _file_manager
     from src.tools.web_tools import WEB_TOOLS
     from src.tools.code_tools import CODE_TOOLS
     from src.tools.browser_tools import BROWSER_TOOLS
     from src.tools.playwright_tools import PLAYWRIGHT_TOOLS
     from src.tools.meta_tools import META_TOOLS
-    from src.skills.skill_loader import SkillLoader
-    import os
+    from src.skills.skill_loader import get_skill_registry
+
+    # 技能注册表增量刷新（只 stat，不重复 exec_module）
+    # 这里假设 custom_skills 在项目根目录
+    project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    registry = get_skill_registry(os.path.join(project_root, "custom_skills"))
+
+    use_agent_file_tools = bool(base_path and _file_manager)
+    cache_key = (
+        _agent_tools_hash(agent_config),
+        base_path if use_agent_file_tools else None,
+        id(_file_manager) if use_agent_file_tools else None,
+        registry.version,
+    )
+    with _tool_cache_lock:
+        cached = _tool_cache.get(cache_key)
+        if cached is not None:
+            _tool_cache.move_to_end(cache_key)
+            return list(cached)
 
     # 1. 收集 L1 Tools
     # 如果提供了 base_path 且 _file_manager 已初始化，则使用上下文感知的 File Tools
-    if base_path and _file_manager:
+    if use_agent_file_tools:
         file_tools = create_agent_file_tools(base_path, _file_manager)
     else:
         file_tools = FILE_TOOLS
@@ -81,27 +161,7 @@ def _get_tools(agent_config: dict, base_path: str = None) -> list:
     all_tools = {t.name: t for t in file_tools + WEB_TOOLS + CODE_TOOLS + BROWSER_TOOLS + PLAYWRIGHT_TOOLS + META_TOOLS}
 
     # 2. 收集 L2/L3 Skills
-    # 这里假设 custom_skills 在项目根目录
-    project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-    sl = SkillLoader(os.path.join(project_root, "custom_skills"))
-    sl.scan_and_load()
-
-    for name, skill_data in sl.skills.items():
-        # 将技能函数包装为 LangChain Tool
-        # 注意: 需要捕获 closure 变量
-        def create_wrapper(run_func):
-            def wrapper(**kwargs):
-                return run_func(**kwargs)
-            return wrapper
-        
-        wrapper_func = create_wrapper(skill_data["run"])
-        
-        tool = StructuredTool.from_function(
-            func=wrapper_func,
-            name=skill_data["name"],
-            description=skill_data["description"]
-        )
-        all_tools[skill_data["name"]] = tool
+    all_tools.update(_get_skill_tools(registry))
 
     # 3. 过滤
     requested_tools = agent_config.get("tools", [])
@@ -112,8 +172,13 @@ def _get_tools(agent_config: dict, base_path: str = None) -> list:
     for name in requested_tools + requested_skills:
         if name in all_tools:
             final_tools.append(all_tools[name])
+
+    with _tool_cache_lock:
+        _tool_cache[cache_key] = final_tools
+        while len(_tool_cache) > _TOOL_CACHE_MAX:
+            _tool_cache.popitem(last=False)
             
-    return final_tools
+    return list(final_tools)
 
 
 def router_node(state: AgentState) -> dict:
@@ -151,9 +216,45 @@ def router_node(state: AgentState) -> dict:
     }
 
 
-def agent_node(state: AgentState) -> dict:
+def _get_agent_tools(state: AgentState) -> list:
+    """当前 Agent 的工具列表（含绑定到其知识库的 search_knowledge_base）。
+    agent 节点与 tools 节点共用，保证 LLM 看到的工具在执行时都可用。"""
+    agent_config = state.get("agent_config", {})
+    base_path = None
+    rag_tool = None
+    
+    curr_ws = state.get("current_workspace")
+    curr_agent = state.get("current_agent")
+    
+    if curr_ws and curr_agent:
+        base_path = os.path.join(curr_ws, curr_agent)
+        
+        # 🆕 Agentic RAG: Bind Search Tool
+        try:
+            from src.utils.rag_ingestion import RAGIngestion
+            from src.tools.rag_tools import get_rag_tool
+            
+            project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+            data_root = os.path.join(project_root, "data")
+            
+            # Check if agent dir exists to avoid errors
+            if os.path.exists(os.path.join(data_root, curr_ws, curr_agent)):
+                 rag = RAGIngestion(data_root, curr_ws, curr_agent)
+                 rag_tool = get_rag_tool(rag)
+        except Exception as e:
+            print(f"[nodes.py] RAG Tool Init Failed: {e}")
+
+    tools = _get_tools(agent_config, base_path)
+    
+    if rag_tool:
+        tools.append(rag_tool)
+    return tools
+
+
+def _prepare_agent_call(state: AgentState):
     """
-    Agent 节点：调用 LLM，绑定工具。
+    构建 LLM 调用：返回 (llm_with_tools, chat_messages)；配置错误时返回 (None, 节点结果)。
+    包含读取配置、加载工具等阻塞操作，异步节点在线程池中调用。
     """
     agent_config = state.get("agent_config", {})
     context = state.get("context", "")
@@ -162,7 +263,7 @@ def agent_node(state: AgentState) -> dict:
     try:
         llm = _get_llm(agent_config, config_path=state.get("llm_config_path"))
     except ValueError as e:
-        return {
+        return None, {
             "messages": [AIMessage(content=f"⚠️ 配置错误: {str(e)}")],
             "needs_approval": False,
         }
@@ -187,35 +288,7 @@ def agent_node(state: AgentState) -> dict:
         system_prompt += f"\n\n---\n## 前文上下文（由主对话传递）\n{mention_summary}"
 
     # 获取工具
-    import os
-    base_path = None
-    rag_tool = None
-    
-    curr_ws = state.get("current_workspace")
-    curr_agent = state.get("current_agent")
-    
-    if curr_ws and curr_agent:
-        base_path = os.path.join(curr_ws, curr_agent)
-        
-        # 🆕 Agentic RAG: Bind Search Tool
-        try:
-            from src.utils.rag_ingestion import RAGIngestion
-            from src.tools.rag_tools import get_rag_tool
-            
-            project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-            data_root = os.path.join(project_root, "data")
-            
-            # Check if agent dir exists to avoid errors
-            if os.path.exists(os.path.join(data_root, curr_ws, curr_agent)):
-                 rag = RAGIngestion(data_root, curr_ws, curr_agent)
-                 rag_tool = get_rag_tool(rag)
-        except Exception as e:
-            print(f"[nodes.py] RAG Tool Init Failed: {e}")
-
-    tools = _get_tools(agent_config, base_path)
-    
-    if rag_tool:
-        tools.append(rag_tool)
+    tools = _get_agent_tools(state)
 
     # 绑定工具到 LLM
     if tools:
@@ -225,90 +298,114 @@ def agent_node(state: AgentState) -> dict:
 
     # 构建消息列表
     chat_messages = [SystemMessage(content=system_prompt)] + list(messages)
+    return llm_with_tools, chat_messages
+
+
+def _llm_error_result(e: Exception) -> dict:
+    return {
+        "messages": [AIMessage(content=f"⚠️ LLM 调用失败: {str(e)}")],
+        "needs_approval": False,
+    }
+
+
+def agent_node(state: AgentState) -> dict:
+    """
+    Agent 节点：调用 LLM，绑定工具。
+    """
+    llm_with_tools, prepared = _prepare_agent_call(state)
+    if llm_with_tools is None:
+        return prepared
 
     # 调用 LLM
     try:
-        response = llm_with_tools.invoke(chat_messages)
+        response = llm_with_tools.invoke(prepared)
     except Exception as e:
-        return {
-            "messages": [AIMessage(content=f"⚠️ LLM 调用失败: {str(e)}")],
-            "needs_approval": False,
-        }
+        return _llm_error_result(e)
 
-    # 检查是否有工具调用
-    has_tool_calls = hasattr(response, "tool_calls") and response.tool_calls
-    
     return {
         "messages": [response],
         "needs_approval": False,
     }
 
 
-def tool_node(state: AgentState) -> dict:
+async def agent_node_async(state: AgentState) -> dict:
     """
-    工具执行节点：执行 LLM 返回的工具调用。
+    agent_node 的异步版本：LLM 调用使用 ainvoke，等待期间不占用线程。
     """
-    from langchain_core.messages import ToolMessage
+    llm_with_tools, prepared = await run_blocking(_prepare_agent_call, state)
+    if llm_with_tools is None:
+        return prepared
+
+    try:
+        response = await llm_with_tools.ainvoke(prepared)
+    except Exception as e:
+        return _llm_error_result(e)
+
+    return {
+        "messages": [response],
+        "needs_approval": False,
+    }
+
 
+def _pending_tool_calls(state: AgentState):
+    """返回最后一条 AI 消息中的工具调用，没有则返回 None"""
     messages = state.get("messages", [])
-    agent_config = state.get("agent_config", {})
     last_msg = messages[-1] if messages else None
-
     if not last_msg or not hasattr(last_msg, "tool_calls") or not last_msg.tool_calls:
-        return {"messages": [], "pending_changes": [], "needs_approval": False}
+        return None
+    return last_msg.tool_calls
 
-    tools = _get_tools(agent_config) # 这里的 tools 可能没有 context?
-    # Tool Node 也要重新获取 context aware tools 吗？
-    # 是的，因为 StructuredTool 闭包了 context。
-    base_path = None
-    curr_ws = state.get("current_workspace")
-    curr_agent = state.get("current_agent")
-    if curr_ws and curr_agent:
-        import os
-        base_path = os.path.join(curr_ws, curr_agent)
 
-    tools = _get_tools(agent_config, base_path)
-    tool_map = {t.name: t for t in tools}
+def _tool_message(state: AgentState, call: dict, outcome, pending_changes: list) -> tuple:
+    """
+    将一次工具调用的结果转换为 ToolMessage。
+    outcome 为工具返回值，或执行时抛出的异常；返回 (ToolMessage, 是否生成了变更请求)。
+    """
+    from langchain_core.messages import ToolMessage
+
+    tool_name = call["name"]
+    tool_args = call["args"]
+
+    if isinstance(outcome, Exception):
+        _log_tool_call(state, tool_name, tool_args, f"Error: {outcome}")
+        return ToolMessage(content=f"工具执行错误: {str(outcome)}", tool_call_id=call["id"]), False
+
+    result = outcome
+    needs_approval = False
+    # 检查结果是否包含 ChangeRequest
+    if isinstance(result, str) and '"type": "change_request"' in result:
+        try:
+            cr_data = json.loads(result)
+            if cr_data.get("type") == "change_request":
+                pending_changes.append(cr_data)
+                needs_approval = True
+                result = f"📋 已生成文件变更请求: {cr_data.get('file_path', '未知')}\n请在右侧审批面板中查看差异并决定是否应用。"
+        except json.JSONDecodeError:
+            pass
+
+    # Flight Recorder: 记录工具调用
+    _log_tool_call(state, tool_name, tool_args, "Success")
+    return ToolMessage(content=str(result), tool_call_id=call["id"]), needs_approval
+
+
+def _unavailable_tool_message(call: dict):
+    from langchain_core.messages import ToolMessage
+    return ToolMessage(content=f"工具 '{call['name']}' 不可用。", tool_call_id=call["id"])
 
+
+def _collect_tool_messages(state: AgentState, tool_calls: list, tool_map: dict, outcomes: list) -> dict:
+    """按调用顺序把执行结果转换为 ToolMessage，变更请求也按调用顺序追加"""
     new_messages = []
     pending_changes = list(state.get("pending_changes", []))
     needs_approval = False
 
-    for call in last_msg.tool_calls:
-        tool_name = call["name"]
-        tool_args = call["args"]
-
-        if tool_name in tool_map:
-            try:
-                result = tool_map[tool_name].invoke(tool_args)
-
-                # 检查结果是否包含 ChangeRequest
-                if isinstance(result, str) and '"type": "change_request"' in result:
-                    try:
-                        cr_data = json.loads(result)
-                        if cr_data.get("type") == "change_request":
-                            pending_changes.append(cr_data)
-                            needs_approval = True
-                            result = f"📋 已生成文件变更请求: {cr_data.get('file_path', '未知')}\n请在右侧审批面板中查看差异并决定是否应用。"
-                    except json.JSONDecodeError:
-                        pass
-
-                new_messages.append(
-                    ToolMessage(content=str(result), tool_call_id=call["id"])
-                )
-
-                # Flight Recorder: 记录工具调用
-                _log_tool_call(state, tool_name, tool_args, "Success")
-
-            except Exception as e:
-                new_messages.append(
-                    ToolMessage(content=f"工具执行错误: {str(e)}", tool_call_id=call["id"])
-                )
-                _log_tool_call(state, tool_name, tool_args, f"Error: {e}")
-        else:
-            new_messages.append(
-                ToolMessage(content=f"工具 '{tool_name}' 不可用。", tool_call_id=call["id"])
-            )
+    for call, outcome in zip(tool_calls, outcomes):
+        if call["name"] not in tool_map:
+            new_messages.append(_unavailable_tool_message(call))
+            continue
+        message, approval = _tool_message(state, call, outcome, pending_changes)
+        new_messages.append(message)
+        needs_approval = needs_approval or approval
 
     return {
         "messages": new_messages,
@@ -317,6 +414,50 @@ def tool_node(state: AgentState) -> dict:
     }
 
 
+def _is_call_parallel_safe(tool_map: dict):
+    # 不可用的工具不执行，视为可并发，不占用串行通道
+    return lambda call: call["name"] not in tool_map or is_parallel_safe(tool_map[call["name"]])
+
+
+def tool_node(state: AgentState) -> dict:
+    """
+    工具执行节点：执行 LLM 返回的工具调用。
+    同一轮的多个调用并发执行（见 src.utils.tool_dispatch），结果按调用顺序返回。
+    """
+    tool_calls = _pending_tool_calls(state)
+    if not tool_calls:
+        return {"messages": [], "pending_changes": [], "needs_approval": False}
+
+    # Tool Node 也要获取 context aware tools，因为 StructuredTool 闭包了 context。
+    tool_map = {t.name: t for t in _get_agent_tools(state)}
+
+    def run_one(call):
+        tool = tool_map.get(call["name"])
+        return tool.invoke(call["args"]) if tool is not None else None
+
+    outcomes = dispatch_sync(tool_calls, run_one, _is_call_parallel_safe(tool_map))
+    return _collect_tool_messages(state, tool_calls, tool_map, outcomes)
+
+
+async def tool_node_async(state: AgentState) -> dict:
+    """
+    tool_node 的异步版本：原生异步工具直接 ainvoke，同步工具在有界线程池中执行。
+    """
+    tool_calls = _pending_tool_calls(state)
+    if not tool_calls:
+        return {"messages": [], "pending_changes": [], "needs_approval": False}
+
+    tools = await run_blocking(_get_agent_tools, state)
+    tool_map = {t.name: t for t in tools}
+
+    async def run_one(call):
+        tool = tool_map.get(call["name"])
+        return await ainvoke_tool(tool, call["args"]) if tool is not None else None
+
+    outcomes = await dispatch_async(tool_calls, run_one, _is_call_parallel_safe(tool_map))
+    return _collect_tool_messages(state, tool_calls, tool_map, outcomes)
+
+
 def approval_node(state: AgentState) -> dict:
     """
     审批节点：等待用户对文件变更的审批。
@@ -9,6 +9,7 @@ SkillLoader - 动态技能加载器（Layer 3）
 """
 
 import os
+import threading
 import importlib.util
 from typing import Optional
 
@@ -92,3 +93,98 @@ class SkillLoader:
             return skill["run"](**kwargs)
         except Exception as e:
             return f"技能 '{name}' 执行出错: {str(e)}"
+
+
+class SkillRegistry(SkillLoader):
+    """
+    进程级技能注册表（增量加载）
+
+    与 SkillLoader 不同，scan_and_load() 只在目录 mtime 变化时重新列目录，
+    并且只对 mtime 变化的文件重新 exec_module。每次内容变化 version 递增，
+    下游（如 _get_tools 的工具缓存）据此判断是否需要重建。
+    """
+
+    def __init__(self, skills_dir: str):
+        super().__init__(skills_dir)
+        self.version = 0
+        self._dir_mtimes: dict[str, int] = {}
+        self._dir_files: dict[str, list[str]] = {}
+        self._file_state: dict[str, tuple[int, Optional[dict]]] = {}  # filepath -> (mtime_ns, skill)
+        self._lock = threading.Lock()
+
+    def _skill_dirs(self) -> list[str]:
+        return [os.path.dirname(os.path.abspath(__file__)), self.skills_dir]
+
+    def _list_skill_files(self, directory: str) -> list[str]:
+        """目录 mtime 未变时复用上次的文件列表"""
+        try:
+            dir_mtime = os.stat(directory).st_mtime_ns
+        except OSError:
+            self._dir_mtimes.pop(directory, None)
+            self._dir_files.pop(directory, None)
+            return []
+
+        if self._dir_mtimes.get(directory) != dir_mtime:
+            self._dir_mtimes[directory] = dir_mtime
+            self._dir_files[directory] = [
+                os.path.join(directory, filename)
+                for filename in sorted(os.listdir(directory))
+                if filename.endswith(".py") and not filename.startswith("_") and filename != "skill_loader.py"
+            ]
+        return self._dir_files[directory]
+
+    def scan_and_load(self) -> int:
+        """增量刷新，返回当前已加载的技能数量"""
+        with self._lock:
+            changed = False
+            seen = set()
+
+            for directory in self._skill_dirs():
+                for filepath in self._list_skill_files(directory):
+                    seen.add(filepath)
+                    try:
+                        mtime = os.stat(filepath).st_mtime_ns
+                    except OSError:
+                        continue
+
+                    cached = self._file_state.get(filepath)
+                    if cached and cached[0] == mtime:
+                        continue
+
+                    try:
+                        skill = self._load_skill_file(filepath)
+                    except Exception as e:
+                        print(f"[SkillRegistry] 加载 {os.path.basename(filepath)} 失败: {e}")
+                        skill = None
+                    self._file_state[filepath] = (mtime, skill)
+                    changed = True
+
+            for filepath in [f for f in self._file_state if f not in seen]:
+                del self._file_state[filepath]
+                changed = True
+
+            if changed:
+                self.skills = {
+                    skill["name"]: skill
+                    for _, skill in self._file_state.values()
+                    if skill
+                }
+                self.version += 1
+
+            return len(self.skills)
+
+
+_registries: dict[str, SkillRegistry] = {}
+_registries_lock = threading.Lock()
+
+
+def get_skill_registry(skills_dir: str) -> SkillRegistry:
+    """获取（并增量刷新）指定目录的进程级技能注册表"""
+    skills_dir = os.path.abspath(skills_dir)
+    with _registries_lock:
+        registry = _registries.get(skills_dir)
+        if registry is None:
+            registry = SkillRegistry(skills_dir)
+            _registries[skills_dir] = registry
+    registry.scan_and_load()
+    return registry
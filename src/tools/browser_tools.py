@@ -7,6 +7,8 @@ Playwright CDP 连接为可选功能。
 from datetime import datetime
 from langchain_core.tools import tool
 
+from src.utils.tool_dispatch import mark_parallel_unsafe
+
 
 @tool
 def get_current_time() -> str:
@@ -36,4 +38,7 @@ def take_screenshot() -> str:
         return f"截图失败: {str(e)}"
 
 
+# 截屏读取共享的屏幕状态，不与同一轮的其他工具并发
+mark_parallel_unsafe([take_screenshot])
+
 BROWSER_TOOLS = [get_current_time, take_screenshot]
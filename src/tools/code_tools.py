@@ -9,6 +9,8 @@ import subprocess
 from contextlib import redirect_stdout, redirect_stderr
 from langchain_core.tools import tool
 
+from src.utils.tool_dispatch import mark_parallel_unsafe
+
 
 @tool
 def python_repl(code: str) -> str:
@@ -96,4 +98,5 @@ def shell_command(cmd: str) -> str:
         return f"执行错误: {str(e)}"
 
 
-CODE_TOOLS = [python_repl, shell_command]
+# 共享解释器 stdout / 工作目录，同一轮内按调用顺序串行执行
+CODE_TOOLS = mark_parallel_unsafe([python_repl, shell_command])
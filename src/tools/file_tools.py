@@ -6,6 +6,8 @@ FileSystemTools - 文件系统工具（Layer 1 核心工具）
 import json
 from langchain_core.tools import tool
 
+from src.utils.tool_dispatch import mark_parallel_unsafe
+
 # FileManager 实例将在运行时注入
 _file_manager = None
 
@@ -187,6 +189,8 @@ def create_agent_file_tools(base_path: str, file_manager) -> list:
             description="列出目录文件。路径说明: static/, active/ 为工作区共享目录。"
         ),
     ]
+    # 写入会修改共享文件与变更请求，同一轮内按调用顺序串行执行（读取仍可并发）
+    mark_parallel_unsafe([t for t in tools if t.name == "write_file"])
     return tools
 
 
@@ -204,5 +208,8 @@ def get_file_diff(old_text: str, new_text: str) -> str:
     return "\n".join(diff)
 
 
+# 写入/移动会修改共享文件，同一轮内按调用顺序串行执行
+mark_parallel_unsafe([write_file, move_file])
+
 # 导出所有工具
 FILE_TOOLS = [read_file, write_file, list_directory, move_file, get_file_diff]
@@ -5,6 +5,7 @@ Meta Tools - Meta-Agent 工具集
 
 from langchain_core.tools import tool
 from src.core.meta_agent import MetaAgent
+from src.utils.tool_dispatch import mark_parallel_unsafe
 
 _meta_agent: MetaAgent = None
 
@@ -178,6 +179,9 @@ def suggest_delegation_to_agent(target_agent_id: str, task_description: str) ->
     return suggestion["message"]
 
 
+# 创建 Agent 会写注册表与工作区，委派建议会追加 session_state，同一轮内按调用顺序串行执行
+mark_parallel_unsafe([create_new_agent, suggest_delegation_to_agent])
+
 # All tools
 META_TOOLS = [
     create_new_agent,
@@ -11,6 +11,8 @@ from datetime import datetime
 from typing import Optional
 from langchain_core.tools import tool
 
+from src.utils.tool_dispatch import mark_parallel_unsafe
+
 # ============================================================
 # 全局浏览器实例管理
 # ============================================================
@@ -305,7 +307,8 @@ def close_browser() -> str:
 # 导出
 # ============================================================
 
-PLAYWRIGHT_TOOLS = [
+# 所有工具共用同一个页面（_current_page），同一轮内按调用顺序串行执行
+PLAYWRIGHT_TOOLS = mark_parallel_unsafe([
     open_browser,
     get_page_text,
     page_screenshot,
@@ -313,4 +316,4 @@ PLAYWRIGHT_TOOLS = [
     check_login_status,
     wait_for_login,
     close_browser,
-]
+])
@@ -10,7 +10,7 @@ import streamlit as st
 from concurrent.futures import ThreadPoolExecutor
 from langchain_core.messages import HumanMessage, AIMessage, ToolMessage
 
-from src.graph.agent_graph import create_compiled_graph
+from src.graph.agent_graph import get_compiled_graph
 from src.core.file_manager import FileManager
 
 
@@ -271,7 +271,7 @@ def _generate_response_with_animation(user_input, agent_config, file_manager):
 
         # 2. Run Graph in background
         def run_graph():
-            graph = create_compiled_graph()
+            graph = get_compiled_graph()
             # Use 'invoke' directly. For streaming tokens in the future, use 'stream'.
             return graph.invoke(initial_state)
 
@@ -0,0 +1,215 @@
+"""
+BM25 Index — 每个 Agent 的倒排索引（词法检索）
+
+与向量检索互补：MiniLM 嵌入对 "ORD-2024-0153" 这类 ID 几乎没有区分度，
+而倒排索引可以精确命中。分词器同时处理拉丁字母/数字（保留 ID 整体及其分段）
+与中日韩文字（单字 + 双字组合）。
+
+持久化: data/{workspace}/{agent}/vector_store/_bm25_index.json
+进程内按路径 LRU 缓存（BM25_INDEX_CACHE_SIZE，默认 16）；有未保存修改的索引不会被淘汰。
+"""
+
+import os
+import re
+import json
+import math
+import threading
+from collections import Counter, OrderedDict
+from typing import Optional
+
+
+_WORD_RE = re.compile(r"[0-9a-z][0-9a-z_\-./:#]*[0-9a-z]|[0-9a-z]")
+_CJK_RE = re.compile(r"[぀-ヿ㐀-䶿一-鿿豈-﫿가-힯]+")
+_ID_SPLIT_RE = re.compile(r"[_\-./:#]+")
+
+
+def tokenize(text: str) -> list[str]:
+    """
+    分词:
+      - 拉丁/数字串整体作为一个 token，含分隔符时额外加入各分段 ("abc-123" → abc-123, abc, 123)
+      - CJK 连续片段拆为单字与相邻双字 ("知识库" → 知, 识, 库, 知识, 识库)
+    """
+    text = text.lower()
+    tokens = []
+    for word in _WORD_RE.findall(text):
+        tokens.append(word)
+        parts = [p for p in _ID_SPLIT_RE.split(word) if p]
+        if len(parts) > 1:
+            tokens.extend(parts)
+    for run in _CJK_RE.findall(text):
+        tokens.extend(run)
+        tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return tokens
+
+
+def is_exact_id_query(query: str) -> bool:
+    """形如 ID 的查询（单个 token，且包含数字），如 "ORD-2024-0153"、"u_12345" """
+    query = query.strip()
+    return bool(query) and " " not in query and any(c.isdigit() for c in query) \
+        and _WORD_RE.fullmatch(query.lower()) is not None
+
+
+class BM25Index:
+    """内存倒排索引 + BM25 打分，支持增删文档与 JSON 持久化"""
+
+    K1 = 1.5
+    B = 0.75
+    FILENAME = "_bm25_index.json"
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.docs: dict[str, dict] = {}  # doc_id -> {"source", "text", "tf": {term: n}, "len"}
+        self.postings: dict[str, dict[str, int]] = {}  # term -> {doc_id: tf}
+        self.total_len = 0
+        self.lock = threading.RLock()
+        self.mtime_ns: Optional[int] = None
+        self.dirty = False  # 有未保存的修改
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    # ========== Mutation ==========
+
+    def add(self, doc_id: str, text: str, source: str) -> None:
+        with self.lock:
+            if doc_id in self.docs:
+                self.docs[doc_id]["source"] = source
+                return
+            tf = Counter(tokenize(text))
+            self._insert(doc_id, {"source": source, "text": text, "tf": dict(tf), "len": sum(tf.values())})
+
+    def _insert(self, doc_id: str, doc: dict) -> None:
+        self.dirty = True
+        self.docs[doc_id] = doc
+        self.total_len += doc["len"]
+        for term, n in doc["tf"].items():
+            self.postings.setdefault(term, {})[doc_id] = n
+
+    def remove(self, doc_id: str) -> None:
+        with self.lock:
+            doc = self.docs.pop(doc_id, None)
+            if not doc:
+                return
+            self.dirty = True
+            self.total_len -= doc["len"]
+            for term in doc["tf"]:
+                posting = self.postings.get(term)
+                if posting is not None:
+                    posting.pop(doc_id, None)
+                    if not posting:
+                        del self.postings[term]
+
+    def remove_source(self, source: str) -> None:
+        with self.lock:
+            for doc_id in [d for d, doc in self.docs.items() if doc["source"] == source]:
+                self.remove(doc_id)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.docs.clear()
+            self.postings.clear()
+            self.total_len = 0
+            self.dirty = True
+
+    # ========== Search ==========
+
+    def search(self, query: str, top_k: int = 5, exact: bool = False) -> list[tuple[str, float]]:
+        """
+        BM25 检索，返回 [(doc_id, score)]。
+        exact=True 时只使用完整查询串这一个 token（ID 精确查找）。
+        """
+        terms = [query.strip().lower()] if exact else list(dict.fromkeys(tokenize(query)))
+        with self.lock:
+            n_docs = len(self.docs)
+            if not n_docs or not terms:
+                return []
+            avg_len = self.total_len / n_docs or 1.0
+            scores: dict[str, float] = {}
+            for term in terms:
+                posting = self.postings.get(term)
+                if not posting:
+                    continue
+                idf = math.log(1 + (n_docs - len(posting) + 0.5) / (len(posting) + 0.5))
+                for doc_id, tf in posting.items():
+                    doc_len = self.docs[doc_id]["len"]
+                    denom = tf + self.K1 * (1 - self.B + self.B * doc_len / avg_len)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.K1 + 1) / denom
+        return sorted(scores.items(), key=lambda x: x[1], reverse=True)[:top_k]
+
+    def get(self, doc_id: str) -> Optional[dict]:
+        return self.docs.get(doc_id)
+
+    # ========== Persistence ==========
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        with self.lock:
+            payload = {
+                "version": 1,
+                "docs": {d: [doc["source"], doc["text"], doc["tf"]] for d, doc in self.docs.items()},
+            }
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(payload, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+            self.mtime_ns = os.stat(self.path).st_mtime_ns
+            self.dirty = False
+
+    @classmethod
+    def load(cls, path: str) -> "BM25Index":
+        index = cls(path)
+        if not os.path.exists(path):
+            return index
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                payload = json.load(f)
+            for doc_id, (source, text, tf) in payload.get("docs", {}).items():
+                index._insert(doc_id, {"source": source, "text": text, "tf": tf, "len": sum(tf.values())})
+            index.mtime_ns = os.stat(path).st_mtime_ns
+            index.dirty = False
+        except Exception as e:
+            print(f"[BM25Index] Unreadable index {path}, starting empty: {e}")
+            index.clear()
+        return index
+
+
+BM25_INDEX_CACHE_SIZE = int(os.environ.get("BM25_INDEX_CACHE_SIZE", "16"))
+
+_indexes: "OrderedDict[str, BM25Index]" = OrderedDict()
+_indexes_lock = threading.Lock()
+
+
+def get_bm25_index(vs_path: str) -> BM25Index:
+    """进程级 LRU 缓存的倒排索引；磁盘文件被改写或删除（mtime 变化）时重新加载"""
+    path = os.path.join(os.path.realpath(vs_path), BM25Index.FILENAME)
+    with _indexes_lock:
+        index = _indexes.get(path)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            mtime = None
+        if index is None or mtime != index.mtime_ns:
+            index = BM25Index.load(path)
+            _indexes[path] = index
+        _indexes.move_to_end(path)
+        _evict_indexes()
+        return index
+
+
+def _evict_indexes() -> None:
+    """从最久未用开始淘汰超出容量的索引；dirty 的索引跳过（其修改尚未落盘，重新加载会丢失）"""
+    for path in list(_indexes):
+        if len(_indexes) <= BM25_INDEX_CACHE_SIZE:
+            break
+        if not _indexes[path].dirty:
+            del _indexes[path]
+
+
+def reciprocal_rank_fusion(rankings: list[list[str]], k: int = 60) -> list[tuple[str, float]]:
+    """RRF: score(d) = Σ 1 / (k + rank_i(d))，rank 从 1 开始"""
+    scores: dict[str, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda x: x[1], reverse=True)
@@ -0,0 +1,168 @@
+"""
+Embedding Service — 进程级嵌入模型服务
+
+SentenceTransformer 模型 (~80MB) 在整个进程中只加载一次，所有 RAGIngestion
+实例共享。短请求（如检索 query）会在 max_wait 时间窗内合并成一个 batch 编码，
+大批量请求（如摄入时的 chunk 列表）直接按 max_batch_size 分批编码。
+"""
+
+import os
+import time
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Optional, Union
+
+
+class EmbeddingService:
+    """
+    线程安全的嵌入服务，接口与 SentenceTransformer.encode 保持一致：
+      encode("text")       -> 1D 向量
+      encode(["a", "b"])   -> 2D 向量矩阵
+    """
+
+    DEFAULT_MAX_BATCH_SIZE = int(os.environ.get("RAG_EMBED_MAX_BATCH", "32"))
+    DEFAULT_MAX_WAIT_MS = float(os.environ.get("RAG_EMBED_MAX_WAIT_MS", "5"))
+
+    def __init__(self, model_name: str, max_batch_size: Optional[int] = None,
+                 max_wait_ms: Optional[float] = None):
+        self.model_name = model_name
+        self.max_batch_size = max_batch_size or self.DEFAULT_MAX_BATCH_SIZE
+        self.max_wait = (self.DEFAULT_MAX_WAIT_MS if max_wait_ms is None else max_wait_ms) / 1000.0
+
+        self._model = None
+        self._load_lock = threading.Lock()
+        self._encode_lock = threading.Lock()  # 模型推理串行化
+        self._requests: "queue.Queue[tuple[list[str], Future]]" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._worker_lock = threading.Lock()
+
+        self._stats_lock = threading.Lock()
+        self.stats = {"requests": 0, "batches": 0, "texts": 0, "encode_seconds": 0.0}
+
+    # ========== Model ==========
+
+    def _get_model(self):
+        """延迟加载 sentence-transformers 模型（双重检查，只加载一次）"""
+        if self._model is None:
+            with self._load_lock:
+                if self._model is None:
+                    try:
+                        from sentence_transformers import SentenceTransformer
+                    except ImportError:
+                        raise ImportError(
+                            "sentence-transformers 未安装。"
+                            "请运行: pip install sentence-transformers"
+                        )
+                    print(f"[EmbeddingService] Loading model {self.model_name}...")
+                    self._model = SentenceTransformer(self.model_name)
+        return self._model
+
+    def warm(self) -> None:
+        """预加载模型"""
+        self._get_model()
+
+    def _encode_batch(self, texts: list[str]):
+        model = self._get_model()
+        with self._encode_lock:
+            start = time.perf_counter()
+            embeddings = model.encode(texts, batch_size=self.max_batch_size)
+            self.stats["encode_seconds"] += time.perf_counter() - start
+            self.stats["batches"] += 1
+            self.stats["texts"] += len(texts)
+        return embeddings
+
+    # ========== Public API ==========
+
+    def encode(self, sentences: Union[str, list[str]]):
+        """编码单条文本或文本列表"""
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        with self._stats_lock:
+            self.stats["requests"] += 1
+
+        if not texts:
+            return self._encode_batch([])
+
+        if len(texts) >= self.max_batch_size:
+            # 大批量请求本身已经是满 batch，无需等待合并
+            embeddings = self._encode_batch(texts)
+        else:
+            future: Future = Future()
+            self._ensure_worker()
+            self._requests.put((texts, future))
+            embeddings = future.result()
+
+        return embeddings[0] if single else embeddings
+
+    # ========== Micro-batching Worker ==========
+
+    def _ensure_worker(self) -> None:
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._worker_lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(
+                    target=self._worker_loop, name="embedding-batcher", daemon=True
+                )
+                self._worker.start()
+
+    def _worker_loop(self) -> None:
+        while True:
+            first = self._requests.get()
+            pending = [first]
+            total = len(first[0])
+            deadline = time.monotonic() + self.max_wait
+
+            # 在等待窗口内收集更多请求，直到凑满一个 batch
+            while total < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._requests.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                pending.append(item)
+                total += len(item[0])
+
+            texts = [t for req_texts, _ in pending for t in req_texts]
+            try:
+                embeddings = self._encode_batch(texts)
+            except BaseException as e:
+                for _, future in pending:
+                    future.set_exception(e)
+                continue
+
+            offset = 0
+            for req_texts, future in pending:
+                future.set_result(embeddings[offset:offset + len(req_texts)])
+                offset += len(req_texts)
+
+    def get_stats(self) -> dict:
+        with self._stats_lock:
+            stats = dict(self.stats)
+        stats["model_loaded"] = self._model is not None
+        stats["avg_batch_size"] = stats["texts"] / stats["batches"] if stats["batches"] else 0.0
+        return stats
+
+
+_services: dict[str, EmbeddingService] = {}
+_services_lock = threading.Lock()
+
+
+def get_embedding_service(model_name: str) -> EmbeddingService:
+    """获取指定模型的进程级嵌入服务（单例）"""
+    service = _services.get(model_name)
+    if service is None:
+        with _services_lock:
+            service = _services.get(model_name)
+            if service is None:
+                service = EmbeddingService(model_name)
+                _services[model_name] = service
+    return service
+
+
+def embedding_stats() -> dict:
+    """所有嵌入服务的统计信息"""
+    return {name: svc.get_stats() for name, svc in _services.items()}
@@ -0,0 +1,172 @@
+"""
+Ingestion Jobs — 知识库摄入后台任务
+
+/api/knowledge/process 在 HTTP 请求内同步执行摄入，大批量上传会阻塞 worker 线程直至超时。
+这里把摄入放到有界线程池中后台执行：提交后立即返回 job_id，客户端轮询进度或取消，
+客户端断开连接不影响任务继续运行。同一 Agent 同时只允许一个排队/运行中的任务。
+"""
+
+import os
+import time
+import uuid
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+
+class JobConflictError(Exception):
+    """同一 Agent 已有进行中的摄入任务"""
+
+    def __init__(self, job_id: str):
+        super().__init__(f"该 Agent 已有进行中的摄入任务: {job_id}")
+        self.job_id = job_id
+
+
+@dataclass
+class IngestionJob:
+    id: str
+    workspace_id: str
+    agent_id: str
+    status: str = "queued"  # queued / running / completed / failed / cancelled
+    files_total: int = 0
+    files_done: int = 0
+    chunks: int = 0
+    chunks_embedded: int = 0
+    current_file: Optional[str] = None
+    results: dict = field(default_factory=dict)
+    stats: dict = field(default_factory=dict)
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    _cancel: threading.Event = field(default_factory=threading.Event, repr=False)
+
+    @property
+    def is_active(self) -> bool:
+        return self.status in ("queued", "running")
+
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def update_progress(self, progress: dict) -> None:
+        """RAGIngestion on_progress 回调"""
+        self.current_file = progress.get("file")
+        self.files_done = progress.get("files_done", self.files_done)
+        self.chunks = progress.get("chunks", self.chunks)
+        self.chunks_embedded = progress.get("embedded", self.chunks_embedded)
+
+    def eta_seconds(self) -> Optional[float]:
+        """按已完成文件的平均耗时估算剩余时间"""
+        if self.status != "running" or not self.started_at or not self.files_done or not self.files_total:
+            return None
+        elapsed = time.time() - self.started_at
+        remaining = max(self.files_total - self.files_done, 0)
+        return round(elapsed / self.files_done * remaining, 1)
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.id,
+            "workspace_id": self.workspace_id,
+            "agent_id": self.agent_id,
+            "status": self.status,
+            "files_total": self.files_total,
+            "files_done": self.files_done,
+            "chunks": self.chunks,
+            "chunks_embedded": self.chunks_embedded,
+            "current_file": self.current_file,
+            "eta_seconds": self.eta_seconds(),
+            "results": self.results,
+            "stats": self.stats,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class IngestionJobManager:
+    """有界线程池上的摄入任务调度（每个 Agent 至多一个进行中的任务）"""
+
+    MAX_FINISHED_JOBS = 200  # 保留的已结束任务数，超出后淘汰最旧的
+
+    def __init__(self, max_workers: int = 2):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ingest-job")
+        self._jobs: "OrderedDict[str, IngestionJob]" = OrderedDict()
+        self._active_by_agent: dict[tuple, str] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, workspace_id: str, agent_id: str,
+               runner: Callable[[IngestionJob], dict]) -> IngestionJob:
+        """
+        提交任务。runner(job) 执行实际摄入并返回报告
+        （报告格式同 RAGIngestion.ingest_files），需通过 job.update_progress / job.cancelled 协作。
+        """
+        key = (workspace_id, agent_id)
+        with self._lock:
+            active_id = self._active_by_agent.get(key)
+            if active_id and self._jobs[active_id].is_active:
+                raise JobConflictError(active_id)
+
+            job = IngestionJob(id=f"job_{uuid.uuid4().hex[:12]}", workspace_id=workspace_id, agent_id=agent_id)
+            self._jobs[job.id] = job
+            self._active_by_agent[key] = job.id
+            self._prune()
+
+        self._executor.submit(self._run, job, runner)
+        return job
+
+    def _run(self, job: IngestionJob, runner: Callable[[IngestionJob], dict]) -> None:
+        if job.cancelled():
+            job.status = "cancelled"
+            job.finished_at = time.time()
+            return
+
+        job.status = "running"
+        job.started_at = time.time()
+        try:
+            report = runner(job)
+            job.results = report.get("files", {})
+            job.stats = {k: v for k, v in report.items() if k != "files"}
+            job.files_done = len(job.results)
+            job.status = "cancelled" if report.get("cancelled") or job.cancelled() else "completed"
+        except Exception as e:
+            print(f"[IngestionJobs] Job {job.id} failed: {e}")
+            job.error = str(e)
+            job.status = "failed"
+        finally:
+            job.current_file = None
+            job.finished_at = time.time()
+
+    def get(self, job_id: str) -> Optional[IngestionJob]:
+        return self._jobs.get(job_id)
+
+    def list_jobs(self, workspace_id: Optional[str] = None, agent_id: Optional[str] = None) -> list[IngestionJob]:
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return [
+            j for j in jobs
+            if (workspace_id is None or j.workspace_id == workspace_id)
+            and (agent_id is None or j.agent_id == agent_id)
+        ]
+
+    def cancel(self, job_id: str) -> Optional[IngestionJob]:
+        """请求取消；运行中的任务在当前批次结束后停止"""
+        job = self._jobs.get(job_id)
+        if job and job.is_active:
+            job._cancel.set()
+        return job
+
+    def _prune(self) -> None:
+        finished = [jid for jid, j in self._jobs.items() if not j.is_active]
+        for jid in finished[:max(len(finished) - self.MAX_FINISHED_JOBS, 0)]:
+            del self._jobs[jid]
+
+
+_job_manager = IngestionJobManager(max_workers=int(os.environ.get("RAG_INGEST_JOB_WORKERS", "2")))
+
+
+def get_ingestion_job_manager() -> IngestionJobManager:
+    """返回进程级摄入任务管理器"""
+    return _job_manager
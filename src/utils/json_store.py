@@ -0,0 +1,240 @@
+"""
+JSON Store — 持久化 JSON 文件的并发安全读写
+
+agents_registry.json、_group_chats.json、users.json、_metadata.json 都是整文件
+读-改-写。直接 open(..., "w") 在并发请求下会丢失更新，进程崩溃时还会留下半截 JSON。
+JsonStore 统一提供:
+  - 进程内线程锁 + 跨进程 advisory 文件锁 (fcntl / msvcrt)，update() 内读-改-写原子执行
+  - 写临时文件后 os.replace，读者永远看到完整文件（读取无需加锁）
+  - 内存缓存，按 (mtime_ns, size, inode) 校验，文件未变化时不读盘
+
+fsync 策略 (环境变量 JSON_STORE_FSYNC):
+  batch  — 临时文件在 replace 前 fsync，崩溃后文件要么是旧内容要么是完整的新内容；
+           目录 fsync（rename 本身的持久化）由后台线程按 FSYNC_INTERVAL 合并，
+           崩溃时最近一个间隔内的写入可能回退为上一版本（默认）
+  always — 临时文件与目录都在写入返回前 fsync
+  off    — 不主动 fsync，崩溃后文件可能为空或不完整
+"""
+
+import os
+import copy
+import json
+import time
+import atexit
+import threading
+from typing import Any, Callable, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+FSYNC_MODE = os.environ.get("JSON_STORE_FSYNC", "batch")
+FSYNC_INTERVAL = float(os.environ.get("JSON_STORE_FSYNC_INTERVAL", "0.05"))
+
+
+class FileLock:
+    """跨进程 advisory 排他锁（锁文件为隐藏文件 .{name}.lock）"""
+
+    def __init__(self, path: str):
+        directory, name = os.path.split(path)
+        self.lock_path = os.path.join(directory, f".{name}.lock")
+        self._fd: Optional[int] = None
+
+    def __enter__(self):
+        os.makedirs(os.path.dirname(self.lock_path) or ".", exist_ok=True)
+        self._fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        if fcntl is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+        else:
+            while True:
+                try:
+                    msvcrt.locking(self._fd, msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue  # LK_LOCK 重试 10 次后超时，继续等待
+        return self
+
+    def __exit__(self, *exc):
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+            else:
+                os.lseek(self._fd, 0, os.SEEK_SET)
+                msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+        finally:
+            os.close(self._fd)
+            self._fd = None
+
+
+class _FsyncBatcher:
+    """后台合并目录 fsync：同一目录在一个间隔内的多次 rename 只刷盘一次"""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._pending: set[str] = set()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self.syncs = 0
+
+    def schedule(self, path: str) -> None:
+        with self._cond:
+            self._pending.add(path)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._loop, name="json-store-fsync", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def _loop(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+            time.sleep(self.interval)
+            self.flush()
+
+    def flush(self) -> None:
+        with self._cond:
+            paths, self._pending = self._pending, set()
+        for path in paths:
+            _fsync_dir(path)
+            self.syncs += 1
+
+
+def _fsync_dir(directory: str) -> None:
+    """fsync 目录，使其中的 rename 持久化（Windows 不支持打开目录，跳过）"""
+    if fcntl is None:
+        return
+    try:
+        dir_fd = os.open(directory or ".", os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+    except OSError:
+        pass
+
+
+_batcher = _FsyncBatcher(FSYNC_INTERVAL)
+atexit.register(_batcher.flush)
+
+
+class JsonStore:
+    """单个 JSON 文件的并发安全存储（通过 get_json_store 获取进程内共享实例）"""
+
+    def __init__(self, path: str, default: Callable[[], Any] = dict, indent: Optional[int] = 2,
+                 fsync: str = FSYNC_MODE):
+        self.path = path
+        self.default = default
+        self.indent = indent
+        self.fsync = fsync
+        self._lock = threading.RLock()
+        self._file_lock = FileLock(path)
+        self._signature: Optional[tuple] = None
+        self._data: Any = None
+        self.reads = 0
+        self.writes = 0
+
+    def _stat_signature(self) -> Optional[tuple]:
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    def _load(self) -> Any:
+        """返回缓存数据；文件被替换/修改过则重新读取。文件损坏时抛出异常"""
+        signature = self._stat_signature()
+        if signature is None:
+            self._signature, self._data = None, None
+            return self.default()
+        if signature == self._signature:
+            return self._data
+        with open(self.path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        self.reads += 1
+        self._signature, self._data = signature, data
+        return data
+
+    # ========== Public API ==========
+
+    def peek(self) -> Any:
+        """只读访问缓存中的数据（调用方不得修改返回值）"""
+        with self._lock:
+            return self._load()
+
+    def read(self) -> Any:
+        """返回数据的独立副本"""
+        return copy.deepcopy(self.peek())
+
+    def snapshot(self) -> tuple[Optional[tuple], Any]:
+        """返回 (版本签名, 只读数据)；签名不变即数据未变，可用于缓存由数据派生的索引"""
+        with self._lock:
+            data = self._load()
+            return self._signature, data
+
+    @property
+    def thread_lock(self) -> threading.RLock:
+        """进程内写锁（可重入）；持有它可让 update() 与后续的派生索引更新在进程内原子"""
+        return self._lock
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    def update(self, fn: Callable[[Any], Any]) -> Any:
+        """
+        原子读-改-写: 持有线程锁与文件锁，fn 就地修改数据副本，返回 fn 返回值的副本。
+        fn 抛出异常时不写入。
+        """
+        with self._lock, self._file_lock:
+            data = copy.deepcopy(self._load())
+            result = fn(data)
+            self._write(data)
+            return copy.deepcopy(result)
+
+    def write(self, data: Any) -> None:
+        """整体覆盖写入"""
+        with self._lock, self._file_lock:
+            self._write(copy.deepcopy(data))
+
+    def _write(self, data: Any) -> None:
+        directory, name = os.path.split(self.path)
+        os.makedirs(directory or ".", exist_ok=True)
+        tmp_path = os.path.join(directory, f".{name}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=self.indent)
+            if self.fsync != "off":
+                # 数据必须在 rename 之前落盘，否则崩溃后可能留下空文件/截断的 JSON
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        if self.fsync == "always":
+            _fsync_dir(directory)
+        elif self.fsync == "batch":
+            _batcher.schedule(directory)
+        self.writes += 1
+        self._signature, self._data = self._stat_signature(), data
+
+
+_stores: dict[str, JsonStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_json_store(path: str, default: Callable[[], Any] = dict, indent: Optional[int] = 2) -> JsonStore:
+    """按路径返回进程内共享的 JsonStore（同一文件共享缓存与线程锁）"""
+    key = os.path.realpath(path)
+    store = _stores.get(key)
+    if store is None:
+        with _stores_lock:
+            store = _stores.get(key)
+            if store is None:
+                store = JsonStore(key, default=default, indent=indent)
+                _stores[key] = store
+    return store
+
+
+def flush_json_stores() -> None:
+    """立即执行所有待处理的批量 fsync"""
+    _batcher.flush()
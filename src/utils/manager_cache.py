@@ -0,0 +1,112 @@
+"""
+Manager Cache — 按用户缓存 FileManager / AgentRegistry / LLMManager 等管理对象
+
+backend/user_deps 原先每个请求都重新构造这些对象：LLMManager 在构造时读取并解析
+llm_providers.json，FileManager 调用 realpath + makedirs。这里按 (user_id, 类型) 缓存:
+  - LRU：超过 max_size 时淘汰最久未用的条目
+  - 空闲 TTL：超过 idle_ttl 秒未被访问的条目在下次访问缓存时清理
+  - 配置文件 mtime 校验：条目可登记依赖的文件，文件被修改/删除后下次访问重建
+  - 依赖对象校验：由其他缓存对象构造的条目（如基于 FileManager 的 WorkspaceManager）
+    登记依赖对象，依赖被替换后下次访问重建，不会继续使用旧对象
+"""
+
+import os
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Iterable, Optional
+
+
+def _file_signature(paths: Iterable[str]) -> tuple[Optional[int], ...]:
+    signature = []
+    for path in paths:
+        try:
+            signature.append(os.stat(path).st_mtime_ns)
+        except OSError:
+            signature.append(None)
+    return tuple(signature)
+
+
+class ManagerCache:
+    """线程安全的 LRU + 空闲 TTL 缓存，条目可按依赖文件的 mtime 失效"""
+
+    def __init__(self, max_size: int = 256, idle_ttl: float = 600.0):
+        self.max_size = max_size
+        self.idle_ttl = idle_ttl
+        # key -> [value, signature, last_used, depends]（持有 depends 保证其 id 在条目存活期间不被复用）
+        self._entries: "OrderedDict[Hashable, list]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expired = 0
+        self.invalidations = 0
+
+    def get_or_create(self, key: Hashable, factory: Callable[[], Any], watch: Iterable[str] = (),
+                      depends: Iterable[Any] = ()) -> Any:
+        """
+        返回 key 对应的对象；不存在、已过期、watch 中的文件 mtime 变化，
+        或 depends 中的对象与构造时不是同一个实例时，调用 factory() 重建。
+        """
+        depends = tuple(depends)
+        signature = (_file_signature(tuple(watch)), tuple(id(obj) for obj in depends))
+        with self._lock:
+            now = time.monotonic()
+            self._expire(now)
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[1] == signature:
+                    entry[2] = now
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[0]
+                del self._entries[key]
+                self.invalidations += 1
+            self.misses += 1
+
+        # 在锁外构造，避免慢初始化阻塞其他用户的请求
+        value = factory()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] == signature:
+                self._entries.move_to_end(key)
+                return entry[0]
+            self._entries[key] = [value, signature, time.monotonic(), depends]
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def _expire(self, now: float) -> None:
+        """按 LRU 顺序从最旧开始清理空闲条目（调用方持有锁）"""
+        while self._entries:
+            key, entry = next(iter(self._entries.items()))
+            if now - entry[2] <= self.idle_ttl:
+                break
+            del self._entries[key]
+            self.expired += 1
+
+    def discard(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "idle_ttl_seconds": self.idle_ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expired": self.expired,
+                "invalidations": self.invalidations,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            }
@@ -0,0 +1,326 @@
+"""
+Message Log — 追加写的 JSONL 分段日志（群聊消息历史）
+
+原实现每条消息都读出全部历史、追加一条、再以 indent=2 重写整个 JSON 文件，
+长对话的磁盘 I/O 为 O(n²)。这里改为:
+  - 每条消息追加一行 JSON 到当前活跃分段（O(1) 写入）
+  - 活跃分段超过 SEGMENT_MAX_BYTES 后封存并开启新分段
+  - 末尾的小封存分段超过 MAX_SEALED_SEGMENTS 个时合并为一个分段（compaction），控制文件数；
+    达到 COMPACT_MAX_BYTES 的大分段不再参与合并，每次合并的拷贝量与日志总长度无关
+  - 旁路偏移索引 .offsets.idx：第 i 条记录的 (分段号, 偏移, 长度) 位于 16*i 字节处，
+    任意位置的一页记录都只需一次索引读取 + 按需读取对应行（读旧页与读最新页成本相同）
+
+记录的 id 即其在日志中的序号（从 0 开始），用作分页游标。
+
+目录结构:
+  {directory}/
+    00000001.jsonl
+    00000002.jsonl   # 最后一个为活跃分段
+    .offsets.idx
+"""
+
+import os
+import json
+import shutil
+import struct
+import threading
+from typing import Callable, Iterator, Optional
+
+from src.utils.json_store import FileLock
+
+
+class MessageLog:
+    """分段 JSONL 日志；同一目录的实例共享线程锁，跨进程写入由文件锁串行化"""
+
+    SEGMENT_SUFFIX = ".jsonl"
+    SEGMENT_MAX_BYTES = int(os.environ.get("MESSAGE_LOG_SEGMENT_BYTES", str(1 << 20)))
+    MAX_SEALED_SEGMENTS = 8
+    COMPACT_MAX_BYTES = int(os.environ.get("MESSAGE_LOG_COMPACT_BYTES",
+                                           str(SEGMENT_MAX_BYTES * MAX_SEALED_SEGMENTS)))
+    INDEX_FILE = ".offsets.idx"
+    INDEX_ENTRY = struct.Struct("<IQI")  # segment seq, byte offset, byte length (不含换行)
+    READ_BATCH = 512
+
+    _locks: dict[str, threading.RLock] = {}
+    _locks_guard = threading.Lock()
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.index_path = os.path.join(directory, self.INDEX_FILE)
+        with self._locks_guard:
+            self._lock = self._locks.setdefault(os.path.realpath(directory), threading.RLock())
+
+    def _file_lock(self) -> FileLock:
+        return FileLock(os.path.join(self.directory, "log"))
+
+    # ========== Segments ==========
+
+    def _segments(self) -> list[str]:
+        """按顺序返回所有分段路径"""
+        try:
+            names = sorted(n for n in os.listdir(self.directory) if n.endswith(self.SEGMENT_SUFFIX))
+        except FileNotFoundError:
+            return []
+        return [os.path.join(self.directory, n) for n in names]
+
+    def _segment_path(self, seq: int) -> str:
+        return os.path.join(self.directory, f"{seq:08d}{self.SEGMENT_SUFFIX}")
+
+    @staticmethod
+    def _segment_seq(path: str) -> int:
+        return int(os.path.basename(path).split(".")[0])
+
+    def exists(self) -> bool:
+        return bool(self._segments())
+
+    # ========== Offset Index ==========
+
+    def _index_is_valid(self, segments: list[str]) -> bool:
+        """索引最后一项必须恰好指向最后一个分段的末尾"""
+        try:
+            index_size = os.path.getsize(self.index_path)
+        except OSError:
+            return not segments
+        if index_size % self.INDEX_ENTRY.size:
+            return False
+        if index_size == 0:
+            return not segments
+        if not segments:
+            return False
+        with open(self.index_path, "rb") as f:
+            f.seek(index_size - self.INDEX_ENTRY.size)
+            seq, offset, length = self.INDEX_ENTRY.unpack(f.read(self.INDEX_ENTRY.size))
+        last = segments[-1]
+        try:
+            return seq == self._segment_seq(last) and offset + length + 1 == os.path.getsize(last)
+        except OSError:
+            return False
+
+    def _count(self) -> int:
+        """记录数；索引缺失或与日志不一致时（崩溃、旧数据）加锁重建"""
+        if not self._index_is_valid(self._segments()):
+            with self._lock, self._file_lock():
+                if not self._index_is_valid(self._segments()):
+                    self._rebuild_index()
+        try:
+            return os.path.getsize(self.index_path) // self.INDEX_ENTRY.size
+        except OSError:
+            return 0
+
+    def _rebuild_index(self) -> None:
+        """扫描全部分段重建索引；截掉最后一个分段末尾写入中断的半行（调用方持有文件锁）"""
+        segments = self._segments()
+        if not segments:
+            if os.path.exists(self.index_path):
+                os.remove(self.index_path)
+            return
+
+        entries = bytearray()
+        for i, path in enumerate(segments):
+            seq = self._segment_seq(path)
+            offset = 0
+            valid_end = 0
+            with open(path, "rb") as f:
+                for line in f:
+                    content = line.rstrip(b"\n")
+                    if line.endswith(b"\n") and self._parse(content) is not None:
+                        entries += self.INDEX_ENTRY.pack(seq, offset, len(content))
+                        valid_end = offset + len(line)
+                    elif line.endswith(b"\n"):
+                        valid_end = offset + len(line)  # 中间的坏行：跳过但保留
+                    offset += len(line)
+            if i == len(segments) - 1 and valid_end < offset:
+                with open(path, "r+b") as f:
+                    f.truncate(valid_end)
+
+        tmp_path = f"{self.index_path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(entries)
+        os.replace(tmp_path, self.index_path)
+        print(f"[MessageLog] Rebuilt offset index for {self.directory} "
+              f"({len(entries) // self.INDEX_ENTRY.size} records)")
+
+    def _read_entries(self, start: int, end: int) -> list[tuple[int, int, int]]:
+        with open(self.index_path, "rb") as f:
+            f.seek(start * self.INDEX_ENTRY.size)
+            data = f.read((end - start) * self.INDEX_ENTRY.size)
+        return list(self.INDEX_ENTRY.iter_unpack(data))
+
+    # ========== Write ==========
+
+    def append(self, record: dict) -> dict:
+        """追加一条记录，写入 id（序号）后返回该记录"""
+        os.makedirs(self.directory, exist_ok=True)
+        with self._lock, self._file_lock():
+            segments = self._segments()
+            if not self._index_is_valid(segments):
+                self._rebuild_index()
+                segments = self._segments()
+            count = os.path.getsize(self.index_path) // self.INDEX_ENTRY.size if segments else 0
+
+            active = segments[-1] if segments else self._segment_path(1)
+            size = os.path.getsize(active) if os.path.exists(active) else 0
+            if size >= self.SEGMENT_MAX_BYTES:
+                active = self._segment_path(self._segment_seq(active) + 1)
+                size = 0
+                self._compact(segments, min_run=self.MAX_SEALED_SEGMENTS)
+
+            record = {**record, "id": count}
+            content = json.dumps(record, ensure_ascii=False).encode("utf-8")
+            with open(active, "ab") as f:
+                f.write(content + b"\n")
+            with open(self.index_path, "ab") as f:
+                f.write(self.INDEX_ENTRY.pack(self._segment_seq(active), size, len(content)))
+            return record
+
+    def import_if_empty(self, load_records: Callable[[], list[dict]]) -> int:
+        """
+        日志为空时写入 load_records() 返回的记录（迁移旧数据用），整体写成一个分段。
+        多个线程/进程同时迁移时只有一个会写入。返回写入条数。
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        with self._lock, self._file_lock():
+            if self._segments():
+                return 0
+            records = load_records()
+            if not records:
+                return 0
+            tmp_path = os.path.join(self.directory, ".import.tmp")
+            with open(tmp_path, "wb") as f:
+                for i, record in enumerate(records):
+                    f.write((json.dumps({**record, "id": i}, ensure_ascii=False) + "\n").encode("utf-8"))
+            os.replace(tmp_path, self._segment_path(1))
+            self._rebuild_index()
+            return len(records)
+
+    def compact(self) -> None:
+        """将末尾的小封存分段合并为一个（大分段与活跃分段不动）"""
+        with self._lock, self._file_lock():
+            segments = self._segments()
+            if not self._index_is_valid(segments):
+                self._rebuild_index()
+            self._compact(segments)
+
+    def _compact(self, segments: list[str], min_run: int = 2) -> None:
+        """
+        合并末尾连续的、小于 COMPACT_MAX_BYTES 的封存分段（至少 min_run 个才合并）。
+        前面的大分段保持不动，避免每次合并都重写整个历史。
+        """
+        sealed = segments[:-1]
+        start = len(sealed)
+        while start > 0 and os.path.getsize(sealed[start - 1]) < self.COMPACT_MAX_BYTES:
+            start -= 1
+        sealed = sealed[start:]
+        if len(sealed) < max(min_run, 2):
+            return
+        target = sealed[0]
+        target_seq = self._segment_seq(target)
+
+        # 1. 合并分段内容，记录各分段在合并后文件中的起始偏移
+        bases: dict[int, int] = {}
+        tmp_segment = os.path.join(self.directory, ".compact.tmp")
+        with open(tmp_segment, "wb") as out:
+            for path in sealed:
+                bases[self._segment_seq(path)] = out.tell()
+                with open(path, "rb") as f:
+                    shutil.copyfileobj(f, out)
+
+        # 2. 改写索引中指向被合并分段的项
+        with open(self.index_path, "rb") as f:
+            entries = list(self.INDEX_ENTRY.iter_unpack(f.read()))
+        tmp_index = f"{self.index_path}.tmp"
+        with open(tmp_index, "wb") as f:
+            for seq, offset, length in entries:
+                if seq in bases:
+                    seq, offset = target_seq, offset + bases[seq]
+                f.write(self.INDEX_ENTRY.pack(seq, offset, length))
+
+        # 3. 被合并的第一个分段是合并文件的前缀，旧索引在替换后仍然有效；
+        #    再替换索引，最后删除其余分段
+        os.replace(tmp_segment, target)
+        os.replace(tmp_index, self.index_path)
+        for path in sealed[1:]:
+            os.remove(path)
+        print(f"[MessageLog] Compacted {len(sealed)} segments in {self.directory}")
+
+    def clear(self) -> None:
+        with self._lock:
+            shutil.rmtree(self.directory, ignore_errors=True)
+
+    # ========== Read ==========
+
+    @staticmethod
+    def _parse(line: bytes) -> Optional[dict]:
+        line = line.strip()
+        if not line:
+            return None
+        try:
+            return json.loads(line)
+        except ValueError:
+            return None  # 写入中断留下的半行
+
+    def __len__(self) -> int:
+        return self._count()
+
+    def read_range(self, start: int, end: int) -> list[dict]:
+        """按序号读取 [start, end) 区间的记录；同一分段内的连续记录合并为一次读取"""
+        try:
+            return self._read_range(start, end)
+        except FileNotFoundError:
+            # 读取期间分段被并发 compaction 合并：索引已更新，重读一次
+            return self._read_range(start, end)
+
+    def _read_range(self, start: int, end: int) -> list[dict]:
+        count = self._count()
+        start, end = max(start, 0), min(end, count)
+        if start >= end:
+            return []
+
+        entries = self._read_entries(start, end)
+        records: list[dict] = []
+        i = 0
+        while i < len(entries):
+            seq, first_offset, _ = entries[i]
+            j = i
+            while j + 1 < len(entries) and entries[j + 1][0] == seq:
+                j += 1
+            _, last_offset, last_length = entries[j]
+            with open(self._segment_path(seq), "rb") as f:
+                f.seek(first_offset)
+                data = f.read(last_offset + last_length - first_offset)
+            for position, (_, offset, length) in enumerate(entries[i:j + 1], start=start + i):
+                record = self._parse(data[offset - first_offset:offset - first_offset + length]) or {}
+                record["id"] = position
+                records.append(record)
+            i = j + 1
+        return records
+
+    def page(self, limit: int, before: Optional[int] = None,
+             after: Optional[int] = None) -> tuple[list[dict], bool, bool]:
+        """
+        游标分页，返回 (records, has_more_before, has_more_after)
+          before=id: id 之前（更早）的 limit 条
+          after=id:  id 之后（更新）的 limit 条
+          都不传:    最新的 limit 条
+        """
+        count = self._count()
+        limit = max(limit, 0)
+        if after is not None:
+            start = max(after + 1, 0)
+            end = min(start + limit, count)
+        else:
+            end = min(before, count) if before is not None else count
+            end = max(end, 0)
+            start = max(end - limit, 0)
+        start = min(start, end)
+        return self.read_range(start, end), start > 0, end < count
+
+    def tail(self, n: int) -> list[dict]:
+        """返回最后 n 条记录（按写入顺序）"""
+        return self.page(n)[0]
+
+    def __iter__(self) -> Iterator[dict]:
+        """按写入顺序遍历全部记录"""
+        count = self._count()
+        for start in range(0, count, self.READ_BATCH):
+            yield from self.read_range(start, start + self.READ_BATCH)
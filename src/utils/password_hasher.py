@@ -0,0 +1,101 @@
+"""
+Password Hasher — 在专用有界线程池上执行 bcrypt
+
+bcrypt 每次 hash/check 需要数百毫秒 CPU。原实现在同步路由中直接调用，
+登录高峰时占满 FastAPI 默认线程池，聊天等其他同步接口随之排队。这里:
+  - hash / check 提交到独立的 ThreadPoolExecutor（AUTH_HASH_WORKERS 个线程），
+    异步路由 await 结果，不占用默认线程池
+  - 排队数超过 AUTH_HASH_MAX_PENDING 时直接拒绝（HasherBusyError），避免积压无限增长
+  - bcrypt cost 由 AUTH_BCRYPT_ROUNDS 配置；已有哈希自带 cost，改配置后仍可校验
+"""
+
+import os
+import time
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+import bcrypt
+
+
+BCRYPT_ROUNDS = int(os.environ.get("AUTH_BCRYPT_ROUNDS", "12"))
+HASH_WORKERS = int(os.environ.get("AUTH_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+HASH_MAX_PENDING = int(os.environ.get("AUTH_HASH_MAX_PENDING", "64"))
+
+
+class HasherBusyError(Exception):
+    """待处理的哈希任务已达上限"""
+
+
+class PasswordHasher:
+    """bcrypt hash / check；异步接口在专用线程池上执行"""
+
+    def __init__(self, rounds: int = BCRYPT_ROUNDS, max_workers: int = HASH_WORKERS,
+                 max_pending: int = HASH_MAX_PENDING):
+        self.rounds = rounds
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bcrypt")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.busy_seconds = 0.0
+
+    # ========== Sync ==========
+
+    def hash_sync(self, password: str) -> str:
+        return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(rounds=self.rounds)).decode("utf-8")
+
+    @staticmethod
+    def check_sync(password: str, hashed: str) -> bool:
+        return bcrypt.checkpw(password.encode("utf-8"), hashed.encode("utf-8"))
+
+    # ========== Async ==========
+
+    async def hash(self, password: str) -> str:
+        return await self._submit(self.hash_sync, password)
+
+    async def check(self, password: str, hashed: str) -> bool:
+        return await self._submit(self.check_sync, password, hashed)
+
+    async def _submit(self, fn: Callable[..., Any], *args) -> Any:
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.rejected += 1
+                raise HasherBusyError()
+            self._pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, self._timed, fn, *args)
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def _timed(self, fn: Callable[..., Any], *args) -> Any:
+        start = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            with self._lock:
+                self.completed += 1
+                self.busy_seconds += time.perf_counter() - start
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "rounds": self.rounds,
+                "workers": self.max_workers,
+                "max_pending": self.max_pending,
+                "pending": self._pending,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "avg_ms": round(self.busy_seconds / self.completed * 1000, 2) if self.completed else 0.0,
+            }
+
+
+_hasher = PasswordHasher()
+
+
+def get_password_hasher() -> PasswordHasher:
+    return _hasher
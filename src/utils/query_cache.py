@@ -0,0 +1,125 @@
+"""
+Query Cache — 知识库检索缓存 (LRU + TTL)
+
+Agent 在多轮工具调用、群聊多个成员之间经常重复发起相同或仅空白不同的
+search_knowledge_base 查询。这里提供两层缓存:
+  1. 查询嵌入:   (model, query)                        → embedding
+  2. 检索结果:   (vector_store, 版本号, query, top_k)  → results
+
+写入/删除向量库时递增该 vector_store 的版本号（bump_collection_version），
+旧版本的结果缓存自然失效。版本号为进程内计数；其他进程的写入由 TTL 兜底。
+"""
+
+import os
+import re
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+
+class TTLCache:
+    """线程安全的 LRU + TTL 缓存；记录命中率与命中节省的计算时间"""
+
+    def __init__(self, max_size: int = 1024, ttl: float = 300.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, tuple[float, float, Any]]" = OrderedDict()  # key -> (expires, cost, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+        self.saved_seconds = 0.0
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """命中直接返回；未命中则计算并缓存（计算耗时作为后续命中的节省时间）"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires, cost, value = entry
+                if expires > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    self.saved_seconds += cost
+                    return value
+                del self._entries[key]
+                self.expired += 1
+            self.misses += 1
+
+        start = time.perf_counter()
+        value = compute()
+        cost = time.perf_counter() - start
+
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, cost, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "expired": self.expired,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+                "saved_seconds": round(self.saved_seconds, 4),
+            }
+
+
+_WS_RE = re.compile(r"\s+")
+
+
+def normalize_query(query: str) -> str:
+    """折叠空白，使仅空白不同的查询共享缓存"""
+    return _WS_RE.sub(" ", query).strip()
+
+
+_CACHE_SIZE = int(os.environ.get("RAG_QUERY_CACHE_SIZE", "1024"))
+_CACHE_TTL = float(os.environ.get("RAG_QUERY_CACHE_TTL", "300"))
+
+_embedding_cache = TTLCache(max_size=_CACHE_SIZE, ttl=_CACHE_TTL)
+_result_cache = TTLCache(max_size=_CACHE_SIZE, ttl=_CACHE_TTL)
+
+_versions: dict[str, int] = {}
+_versions_lock = threading.Lock()
+
+
+def get_query_embedding_cache() -> TTLCache:
+    return _embedding_cache
+
+
+def get_query_result_cache() -> TTLCache:
+    return _result_cache
+
+
+def collection_version(vs_path: str) -> int:
+    return _versions.get(os.path.realpath(vs_path), 0)
+
+
+def bump_collection_version(vs_path: str) -> int:
+    """向量库内容变化后调用，使该库的检索结果缓存失效"""
+    key = os.path.realpath(vs_path)
+    with _versions_lock:
+        _versions[key] = _versions.get(key, 0) + 1
+        return _versions[key]
+
+
+def query_cache_stats() -> dict:
+    return {
+        "embeddings": _embedding_cache.stats(),
+        "results": _result_cache.stats(),
+    }
@@ -1,14 +1,29 @@
 """
 RAG Ingestion Pipeline — 知识库摄入管道
-Load → Clean → Split → Embed → Store (ChromaDB)
+Load → Clean → Split → Embed → Store (ChromaDB + BM25 倒排索引)
 
-使用 sentence-transformers 进行本地嵌入 (Privacy First)
+使用 sentence-transformers 进行本地嵌入 (Privacy First)；
+检索时融合向量与 BM25 两路排序 (Reciprocal Rank Fusion)
 """
 
 import os
 import re
-from typing import Optional
-
+import json
+import time
+import hashlib
+import threading
+import weakref
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Callable, Iterable, Iterator, Optional
+
+from src.utils.bm25_index import BM25Index, get_bm25_index, is_exact_id_query, reciprocal_rank_fusion
+from src.utils.embedding_service import get_embedding_service
+from src.utils.query_cache import (
+    bump_collection_version, collection_version, get_query_embedding_cache,
+    get_query_result_cache, normalize_query,
+)
+from src.utils.vector_store_cache import get_chroma_cache
 
 
 class TextSplitterService:
@@ -39,18 +54,123 @@ class TextSplitterService:
             return [text]
 
 
+class IngestionManifest:
+    """
+    增量摄入清单: vector_store/_ingest_manifest.json
+
+    {source: {"path", "file_hash", "splitter", "chunks": [chunk_id, ...]}}
+    chunk_id 由 chunk 文本哈希生成（见 ChunkIdAllocator），内容未变的 chunk 可以直接复用已有向量。
+    """
+
+    FILENAME = "_ingest_manifest.json"
+    _locks: dict[str, threading.Lock] = {}
+    _locks_guard = threading.Lock()
+
+    def __init__(self, vs_path: str):
+        self.path = os.path.join(vs_path, self.FILENAME)
+        with self._locks_guard:
+            self.lock = self._locks.setdefault(os.path.realpath(self.path), threading.Lock())
+        self.files: dict[str, dict] = self._read()
+
+    def _read(self) -> dict:
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f).get("files", {})
+        except Exception as e:
+            print(f"[IngestionManifest] Unreadable manifest {self.path}, ignoring: {e}")
+            return {}
+
+    def get(self, source: str) -> Optional[dict]:
+        return self.files.get(source)
+
+    def set(self, source: str, entry: dict) -> None:
+        self.files[source] = entry
+
+    def remove(self, source: str) -> None:
+        self.files.pop(source, None)
+
+    def clear(self) -> None:
+        self.files = {}
+
+    def save(self) -> None:
+        """写临时文件后 os.replace，避免留下半截 JSON"""
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": 1, "files": self.files}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    @staticmethod
+    def hash_file(path: str) -> str:
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+        return h.hexdigest()
+
+
+class ChunkIdAllocator:
+    """基于内容的 chunk id；同一文件内重复的文本追加序号区分（可流式使用）"""
+
+    def __init__(self, source: str):
+        self.source = source
+        self._seen: dict[str, int] = {}
+
+    def next_id(self, chunk: str) -> str:
+        digest = hashlib.sha1(chunk.encode("utf-8")).hexdigest()[:16]
+        n = self._seen.get(digest, 0)
+        self._seen[digest] = n + 1
+        return f"{self.source}_{digest}" if n == 0 else f"{self.source}_{digest}_{n}"
+
+
+class IngestionCancelled(Exception):
+    """摄入被调用方取消"""
+
+
+@dataclass
+class PreparedFile:
+    """Load → Clean → Split 阶段的产物，交给 Embed → Store 阶段消费"""
+    path: str
+    source: str
+    file_hash: str = ""
+    chunks: Optional[Iterable[str]] = None  # None 表示内容未变，直接跳过
+    skipped_count: int = 0
+    error: Optional[str] = None
+
+
+def _prepare_file_chunks(path: str, chunk_size: int, chunk_overlap: int) -> tuple[list[str], dict]:
+    """进程池 worker: Load → Clean → Split 单个文件，返回 (chunks, 各阶段耗时)"""
+    t0 = time.perf_counter()
+    text = RAGIngestion._load(path)
+    t1 = time.perf_counter()
+    cleaned = RAGIngestion._clean(text)
+    t2 = time.perf_counter()
+    chunks = TextSplitterService().split_text(cleaned, chunk_size=chunk_size, chunk_overlap=chunk_overlap) if cleaned else []
+    t3 = time.perf_counter()
+    return chunks, {"load": t1 - t0, "clean": t2 - t1, "split": t3 - t2}
+
+
 class RAGIngestion:
     """
     知识库摄入管道: Load → Clean → Split → Embed → Store
+    纯文本按块流式读取、chunk 以生成器产出、跨文件合批嵌入、分批写入，
+    峰值内存与单个文件大小无关。
 
     每个 Agent 拥有独立的知识库:
       data/{workspace}/{agent}/knowledge_base/  (原始文件)
-      data/{workspace}/{agent}/vector_store/    (ChromaDB)
+      data/{workspace}/{agent}/vector_store/    (ChromaDB + _bm25_index.json)
     """
 
     DEFAULT_CHUNK_SIZE = 500
     DEFAULT_CHUNK_OVERLAP = 50
+    READ_BLOCK_CHARS = 1 << 20  # 流式读取块大小（字符）
+    EMBED_BATCH_SIZE = 64       # 跨文件合批嵌入
+    STORE_BATCH_SIZE = 256      # 单次写入 Chroma 的最大条数
+    INGEST_WORKERS = int(os.environ.get("RAG_INGEST_WORKERS", "0"))  # 并行模式进程数，0 = CPU 核数
     EMBEDDING_MODEL = "all-MiniLM-L6-v2"  # 轻量级, ~80MB
+    RRF_K = 60                  # Reciprocal Rank Fusion 平滑常数
+    HYBRID_CANDIDATES = 20      # 每路检索参与融合的最少候选数
 
     def __init__(self, data_root: str, workspace: str, agent_id: str):
         self.data_root = data_root
@@ -62,94 +182,468 @@ class RAGIngestion:
         os.makedirs(self.vs_path, exist_ok=True)
 
         self._collection = None
+        self._collection_lease = None
         self._embedder = None
         self._splitter_service = TextSplitterService()
 
     def _get_embedder(self):
-        """延迟加载 sentence-transformers 模型"""
+        """获取进程级共享的嵌入服务（模型只加载一次）"""
         if self._embedder is None:
-            try:
-                from sentence_transformers import SentenceTransformer
-                self._embedder = SentenceTransformer(self.EMBEDDING_MODEL)
-            except ImportError:
-                raise ImportError(
-                    "sentence-transformers 未安装。"
-                    "请运行: pip install sentence-transformers"
-                )
+            self._embedder = get_embedding_service(self.EMBEDDING_MODEL)
         return self._embedder
 
+    @property
+    def collection_name(self) -> str:
+        return f"{self.agent_id}_knowledge"
+
     def _get_collection(self):
-        """延迟加载 ChromaDB collection"""
+        """获取 ChromaDB collection（客户端与句柄由进程级缓存复用；本实例存活期间不会被关闭）"""
         if self._collection is None:
-            try:
-                import chromadb
-                client = chromadb.PersistentClient(path=self.vs_path)
-                collection_name = f"{self.agent_id}_knowledge"
-                self._collection = client.get_or_create_collection(
-                    name=collection_name,
-                    metadata={"hnsw:space": "cosine"}
-                )
-            except ImportError:
-                raise ImportError(
-                    "chromadb 未安装。请运行: pip install chromadb"
-                )
+            self._collection, release = get_chroma_cache().open_collection(
+                self.vs_path,
+                self.collection_name,
+                metadata={"hnsw:space": "cosine"}
+            )
+            # 实例被回收时自动归还句柄
+            self._collection_lease = weakref.finalize(self, release)
         return self._collection
 
+    def _drop_collection(self) -> None:
+        if self._collection_lease is not None:
+            self._collection_lease()
+        self._collection = None
+        self._collection_lease = None
+
+    def _get_lexical_index(self) -> BM25Index:
+        """
+        获取 BM25 倒排索引（进程级缓存）。
+        旧版知识库没有索引文件时，从 collection 中的文档一次性回填。
+        """
+        index = get_bm25_index(self.vs_path)
+        if len(index) == 0:
+            collection = self._get_collection()
+            if collection.count():
+                with index.lock:
+                    if len(index) == 0:
+                        existing = collection.get(include=["documents", "metadatas"])
+                        for cid, doc, meta in zip(existing["ids"], existing["documents"], existing["metadatas"]):
+                            index.add(cid, doc or "", (meta or {}).get("source", "unknown"))
+                        index.save()
+                        print(f"[RAG] Backfilled BM25 index with {len(index)} chunks.")
+        return index
+
     # ========== Core Pipeline ==========
 
+    @property
+    def splitter_signature(self) -> str:
+        """切分参数变化时所有 chunk 都要重建"""
+        return f"{self.DEFAULT_CHUNK_SIZE}/{self.DEFAULT_CHUNK_OVERLAP}"
+
     def ingest_file(self, file_path: str) -> int:
         """
         处理单个文件: Load → Clean → Split → Embed → Store
-        返回生成的 chunk 数
-        """
-        text = self._load(file_path)
-        if not text.strip():
-            return 0
-
-        cleaned = self._clean(text)
-        
-        # Split using the new service
-        chunks = self._splitter_service.split_text(
-            cleaned, 
-            chunk_size=self.DEFAULT_CHUNK_SIZE, 
-            chunk_overlap=self.DEFAULT_CHUNK_OVERLAP
-        )
-        
-        self._embed_and_store(chunks, source=os.path.basename(file_path))
-        return len(chunks)
+        内容哈希未变的文件直接跳过；变化的文件只嵌入文本发生变化的 chunk。
+        返回该文件的 chunk 数
+        """
+        report = self.ingest_files([file_path])
+        result = report["files"].get(os.path.basename(file_path), 0)
+        if isinstance(result, str):
+            raise RuntimeError(result)
+        return result
 
     def ingest_all(self) -> dict:
         """
         处理 knowledge_base/ 下所有文件
         返回 {filename: chunk_count}
         """
-        results = {}
         if not os.path.exists(self.kb_path):
-            return results
+            return {}
+
+        paths = [
+            os.path.join(self.kb_path, fname)
+            for fname in os.listdir(self.kb_path)
+            if os.path.isfile(os.path.join(self.kb_path, fname))
+        ]
+        return self.ingest_files(paths)["files"]
+
+    def ingest_files(self, file_paths: list[str],
+                     on_progress: Optional[Callable[[dict], None]] = None,
+                     should_cancel: Optional[Callable[[], bool]] = None) -> dict:
+        """
+        流式摄入多个文件，chunk 跨文件合批嵌入与写入。
+        返回报告: {files: {source: chunk_count | "Error: ..."}, chunks, embedded, reused,
+                   seconds, chunks_per_sec}
+        """
+        return self._run_pipeline(self._prepare_stream(file_paths), on_progress, should_cancel)
+
+    def ingest_files_parallel(self, file_paths: list[str], workers: Optional[int] = None,
+                              on_progress: Optional[Callable[[dict], None]] = None,
+                              should_cancel: Optional[Callable[[], bool]] = None) -> dict:
+        """
+        并行摄入: Load → Clean → Split 分发到进程池（CPU 密集：python-docx 解析与正则清洗），
+        Embed → Store 仍由当前进程单消费者完成。
+        报告额外包含 workers 与各阶段耗时 (load/clean/split 为各 worker 累计 CPU 时间)。
+        """
+        workers = workers or self.INGEST_WORKERS or os.cpu_count() or 1
+        stage_times = {"load": 0.0, "clean": 0.0, "split": 0.0}
+
+        def prepared_files() -> Iterator[PreparedFile]:
+            pending = []
+            for item in self._prepare_stream(file_paths):
+                if item.chunks is None:
+                    yield item  # 未变化或出错，无需进入进程池
+                else:
+                    pending.append(item)
+            if not pending:
+                return
+
+            pool = ProcessPoolExecutor(max_workers=min(workers, len(pending)))
+            try:
+                futures = {
+                    pool.submit(
+                        _prepare_file_chunks, item.path,
+                        self.DEFAULT_CHUNK_SIZE, self.DEFAULT_CHUNK_OVERLAP
+                    ): item
+                    for item in pending
+                }
+                for future in as_completed(futures):
+                    item = futures[future]
+                    try:
+                        chunks, times = future.result()
+                    except Exception as e:
+                        item.chunks = None
+                        item.error = f"Error: {e}"
+                    else:
+                        item.chunks = chunks
+                        for stage, seconds in times.items():
+                            stage_times[stage] += seconds
+                    yield item
+            finally:
+                # 消费端取消/异常时不再等待排队中的文件
+                pool.shutdown(wait=True, cancel_futures=True)
+
+        report = self._run_pipeline(prepared_files(), on_progress, should_cancel)
+        report["workers"] = workers
+        report["timings"].update({k: round(v, 3) for k, v in stage_times.items()})
+        return report
+
+    # ========== Streaming Pipeline ==========
+
+    def _prepare_stream(self, file_paths: list[str]) -> Iterator[PreparedFile]:
+        """为每个文件计算哈希；内容变化的文件以生成器形式惰性切分"""
+        manifest = IngestionManifest(self.vs_path)
+        for path in file_paths:
+            source = os.path.basename(path)
+            try:
+                file_hash = IngestionManifest.hash_file(path)
+            except Exception as e:
+                yield PreparedFile(path, source, error=f"Error: {e}")
+                continue
+
+            previous = manifest.get(source)
+            if (previous and previous.get("file_hash") == file_hash
+                    and previous.get("splitter") == self.splitter_signature):
+                yield PreparedFile(path, source, file_hash, skipped_count=len(previous.get("chunks", [])))
+            else:
+                yield PreparedFile(path, source, file_hash, chunks=self.iter_chunks(path))
+
+    def iter_chunks(self, file_path: str) -> Iterator[str]:
+        """
+        按块读取、清洗、切分，逐个产出 chunk。
+        每块切分后保留最后一个 chunk 与下一块拼接，避免在块边界处硬切。
+        """
+        tail = ""
+        for block in self._iter_clean_blocks(file_path):
+            text = f"{tail}\n\n{block}" if tail else block
+            chunks = self._splitter_service.split_text(
+                text,
+                chunk_size=self.DEFAULT_CHUNK_SIZE,
+                chunk_overlap=self.DEFAULT_CHUNK_OVERLAP
+            )
+            if not chunks:
+                continue
+            yield from chunks[:-1]
+            tail = chunks[-1]
+        if tail.strip():
+            yield tail
+
+    def _iter_clean_blocks(self, path: str) -> Iterator[str]:
+        """纯文本文件按 READ_BLOCK_CHARS 分块读取（在换行处断开），其他格式整体加载"""
+        ext = os.path.splitext(path)[1].lower()
+        if ext not in (".txt", ".md", ".csv"):
+            cleaned = self._clean(self._load(path))
+            if cleaned:
+                yield cleaned
+            return
+
+        carry = ""
+        with open(path, "r", encoding="utf-8", errors="ignore") as f:
+            while True:
+                block = f.read(self.READ_BLOCK_CHARS)
+                if len(block) < self.READ_BLOCK_CHARS:
+                    carry += block  # 已到文件末尾
+                    break
+                text = carry + block
+                # 优先在段落边界断开，其次在行边界
+                cut = text.rfind("\n\n")
+                if cut == -1:
+                    cut = text.rfind("\n")
+                if cut == -1:
+                    carry = text  # 超长单行：继续累积到下一个换行
+                    continue
+                carry = text[cut + 1:]
+                cleaned = self._clean(text[:cut + 1])
+                if cleaned:
+                    yield cleaned
+        cleaned = self._clean(carry)
+        if cleaned:
+            yield cleaned
+
+    def _run_pipeline(self, prepared: Iterable[PreparedFile],
+                      on_progress: Optional[Callable[[dict], None]] = None,
+                      should_cancel: Optional[Callable[[], bool]] = None) -> dict:
+        """
+        Embed → Store 阶段（单消费者）:
+          - 新 chunk 累积到 EMBED_BATCH_SIZE 后批量嵌入
+          - 已嵌入的 chunk 累积到 STORE_BATCH_SIZE 后批量写入 Chroma
+          - 内容未变的 chunk 复用已有向量，只批量更新 chunk_index
+
+        should_cancel 返回 True 时在当前批次后停止：正在处理的文件被回滚，
+        已完成的文件照常写入清单，报告中 cancelled=True。
+        """
+        start = time.perf_counter()
+        collection = self._get_collection()
+        lexical = self._get_lexical_index()
+        manifest = IngestionManifest(self.vs_path)
+        report = {"files": {}, "chunks": 0, "embedded": 0, "reused": 0, "cancelled": False}
+        timings = {"embed": 0.0, "store": 0.0}
+
+        def progress(source: str):
+            if on_progress:
+                on_progress({
+                    "file": source,
+                    "files_done": len(report["files"]),
+                    "chunks": report["chunks"],
+                    "embedded": report["embedded"],
+                })
+
+        to_embed: list[tuple[str, str, dict]] = []  # (id, text, metadata)
+        to_store: list[tuple[str, str, list, dict]] = []  # (id, text, embedding, metadata)
+        to_update: list[tuple[str, dict]] = []  # (id, metadata)
+
+        def flush_store():
+            if to_store:
+                t0 = time.perf_counter()
+                self._store_batch(to_store)
+                timings["store"] += time.perf_counter() - t0
+                to_store.clear()
+
+        def flush_embed():
+            if to_embed:
+                t0 = time.perf_counter()
+                embeddings = self._embed_batch([text for _, text, _ in to_embed])
+                timings["embed"] += time.perf_counter() - t0
+                for (cid, text, meta), emb in zip(to_embed, embeddings):
+                    to_store.append((cid, text, emb, meta))
+                report["embedded"] += len(to_embed)
+                source = to_embed[-1][2]["source"]
+                to_embed.clear()
+                if len(to_store) >= self.STORE_BATCH_SIZE:
+                    flush_store()
+                progress(source)
+
+        def flush_updates():
+            if to_update:
+                collection.update(
+                    ids=[cid for cid, _ in to_update],
+                    metadatas=[meta for _, meta in to_update]
+                )
+                to_update.clear()
+
+        with manifest.lock:
+            manifest = IngestionManifest(self.vs_path)  # 持锁后重新读取
+            try:
+                for item in prepared:
+                    source = item.source
+                    if should_cancel and should_cancel():
+                        report["cancelled"] = True
+                        break
+                    if item.error:
+                        report["files"][source] = item.error
+                    elif item.chunks is None:
+                        print(f"[Ingest] {source} unchanged, skipped.")
+                        report["files"][source] = item.skipped_count
+                    else:
+                        ids: list[str] = []
+                        existing: set[str] = set()
+                        try:
+                            previous = manifest.get(source)
+                            reusable = None
+                            if previous and previous.get("splitter") == self.splitter_signature:
+                                reusable = previous.get("chunks", [])
+
+                            if reusable is None:
+                                # 没有可信清单（旧版数据）：删除旧的同源文档后全量写入
+                                self._delete_source(source)
+                            elif reusable:
+                                # 以向量库中实际存在的为准（防止清单与 collection 不一致）
+                                existing = set(collection.get(ids=reusable, include=[])["ids"])
+
+                            allocator = ChunkIdAllocator(source)
+                            for index, chunk in enumerate(item.chunks):
+                                cid = allocator.next_id(chunk)
+                                ids.append(cid)
+                                meta = {"source": source, "chunk_index": index}
+                                if cid in existing:
+                                    lexical.add(cid, chunk, source)
+                                    to_update.append((cid, meta))
+                                    report["reused"] += 1
+                                    if len(to_update) >= self.STORE_BATCH_SIZE:
+                                        flush_updates()
+                                else:
+                                    to_embed.append((cid, chunk, meta))
+                                    if len(to_embed) >= self.EMBED_BATCH_SIZE:
+                                        if should_cancel and should_cancel():
+                                            raise IngestionCancelled()
+                                        flush_embed()
+
+                            current = set(ids)
+                            stale = [cid for cid in (reusable or []) if cid not in current]
+                            if stale:
+                                collection.delete(ids=stale)
+                                for cid in stale:
+                                    lexical.remove(cid)
+                                bump_collection_version(self.vs_path)
+
+                            manifest.set(source, {
+                                "path": item.path,
+                                "file_hash": item.file_hash,
+                                "splitter": self.splitter_signature,
+                                "chunks": ids,
+                            })
+                            report["files"][source] = len(ids)
+                            report["chunks"] += len(ids)
+                        except Exception as e:
+                            # 丢弃该文件尚未写入的 chunk，并删除已写入的新 chunk，保持与清单一致
+                            orphans = [cid for cid in ids if cid not in existing]
+                            to_embed[:] = [x for x in to_embed if x[2]["source"] != source]
+                            to_store[:] = [x for x in to_store if x[3]["source"] != source]
+                            to_update[:] = [x for x in to_update if x[1]["source"] != source]
+                            if orphans:
+                                for cid in orphans:
+                                    lexical.remove(cid)
+                                try:
+                                    collection.delete(ids=orphans)
+                                except Exception:
+                                    pass
+                                bump_collection_version(self.vs_path)
+                            if isinstance(e, IngestionCancelled):
+                                report["cancelled"] = True
+                                break
+                            report["files"][source] = f"Error: {e}"
+
+                    progress(source)
 
-        for fname in os.listdir(self.kb_path):
-            fpath = os.path.join(self.kb_path, fname)
-            if os.path.isfile(fpath):
                 try:
-                    count = self.ingest_file(fpath)
-                    results[fname] = count
+                    flush_embed()
+                    flush_store()
+                    flush_updates()
                 except Exception as e:
-                    results[fname] = f"Error: {e}"
-        return results
+                    self._discard_unflushed(e, manifest, report, to_embed, to_store, to_update)
+            finally:
+                manifest.save()
+                if lexical.dirty:
+                    lexical.save()
+
+        elapsed = time.perf_counter() - start
+        report["seconds"] = round(elapsed, 3)
+        # 串行模式下 load/clean/split 与消费交织执行，其耗时计入 prepare
+        timings["prepare"] = max(elapsed - timings["embed"] - timings["store"], 0.0)
+        report["timings"] = {k: round(v, 3) for k, v in timings.items()}
+        report["chunks_per_sec"] = round(report["chunks"] / elapsed, 1) if elapsed > 0 else 0.0
+        print(
+            f"[Ingest] {len(report['files'])} files, {report['chunks']} chunks "
+            f"({report['embedded']} embedded, {report['reused']} reused) "
+            f"in {elapsed:.2f}s — {report['chunks_per_sec']} chunks/s"
+        )
+        return report
 
-    def query(self, question: str, top_k: int = 5) -> list[dict]:
+    def _discard_unflushed(self, error: Exception, manifest: "IngestionManifest", report: dict,
+                           to_embed: list, to_store: list, to_update: list) -> None:
         """
-        检索相关文档片段
-        返回 [{content, source, score}]
+        最后一批嵌入/写入失败：涉及的文件可能只写入了一部分 chunk。
+        删除这些文件的清单记录与已写入的 chunk，下次导入按无清单文件全量重建，避免重复写入。
         """
-        collection = self._get_collection()
-        embedder = self._get_embedder()
+        failed = ({meta["source"] for _, _, meta in to_embed}
+                  | {meta["source"] for _, _, _, meta in to_store}
+                  | {meta["source"] for _, meta in to_update})
+        to_embed.clear()
+        to_store.clear()
+        to_update.clear()
+        for source in sorted(failed):
+            entry = manifest.get(source)
+            if entry:
+                report["chunks"] -= len(entry.get("chunks", []))
+            manifest.remove(source)
+            self._delete_source(source)
+            report["files"][source] = f"Error: {error}"
+        bump_collection_version(self.vs_path)
 
-        query_embedding = embedder.encode(question).tolist()
+    def query(self, question: str, top_k: int = 5) -> list[dict]:
+        """
+        检索相关文档片段（混合检索）
+          - 形如 ID 的查询 ("ORD-2024-0153") 先走倒排索引精确查找，命中则不调用嵌入模型
+          - 其他查询同时做向量检索与 BM25 检索，按 Reciprocal Rank Fusion 融合排序
+        返回 [{content, source, score}]，score 归一化到 0~1
 
+        结果按 (向量库版本, query, top_k) 缓存，向量库写入后自动失效。
+        """
+        key = (os.path.realpath(self.vs_path), collection_version(self.vs_path), normalize_query(question), top_k)
+        docs = get_query_result_cache().get_or_compute(key, lambda: self._hybrid_query(question, top_k))
+        return [dict(doc) for doc in docs]
+
+    def _hybrid_query(self, question: str, top_k: int) -> list[dict]:
+        lexical = self._get_lexical_index()
+
+        if is_exact_id_query(question):
+            hits = lexical.search(question, top_k, exact=True)
+            if hits:
+                best = hits[0][1]
+                return [self._lexical_doc(lexical, cid, score / best) for cid, score in hits]
+
+        n_candidates = max(top_k * 4, self.HYBRID_CANDIDATES)
+        dense = self._dense_query(question, n_candidates)
+        lexical_hits = lexical.search(question, n_candidates)
+        if not lexical_hits:
+            return [doc for _, doc in dense[:top_k]]
+
+        dense_docs = dict(dense)
+        fused = reciprocal_rank_fusion(
+            [[cid for cid, _ in dense], [cid for cid, _ in lexical_hits]],
+            k=self.RRF_K
+        )
+        max_score = 2.0 / (self.RRF_K + 1)  # 两路均排第一时的 RRF 分数
+        docs = []
+        for cid, score in fused[:top_k]:
+            doc = dense_docs.get(cid) or self._lexical_doc(lexical, cid, 0.0)
+            docs.append({**doc, "score": score / max_score})
+        return docs
+
+    def _dense_query(self, question: str, n_results: int) -> list[tuple[str, dict]]:
+        """向量检索，返回 [(chunk_id, {content, source, score})]"""
+        collection = self._get_collection()
+        count = collection.count()
+        if not count:
+            return []
+
+        text = normalize_query(question)
+        query_embedding = get_query_embedding_cache().get_or_compute(
+            (self.EMBEDDING_MODEL, text),
+            lambda: self._get_embedder().encode(text).tolist()
+        )
         results = collection.query(
             query_embeddings=[query_embedding],
-            n_results=min(top_k, collection.count() or 1)
+            n_results=min(n_results, count)
         )
 
         docs = []
@@ -157,31 +651,47 @@ class RAGIngestion:
             for i, doc in enumerate(results["documents"][0]):
                 meta = results["metadatas"][0][i] if results["metadatas"] else {}
                 distance = results["distances"][0][i] if results["distances"] else 0
-                docs.append({
+                docs.append((results["ids"][0][i], {
                     "content": doc,
                     "source": meta.get("source", "unknown"),
                     "score": 1 - distance  # cosine distance → similarity
-                })
+                }))
         return docs
 
+    @staticmethod
+    def _lexical_doc(index: BM25Index, cid: str, score: float) -> dict:
+        entry = index.get(cid) or {}
+        return {
+            "content": entry.get("text", ""),
+            "source": entry.get("source", "unknown"),
+            "score": score,
+        }
+
     def rebuild_all(self) -> dict:
         """重建整个知识库索引 (清空 → 重新 ingest)"""
-        collection = self._get_collection()
         # 清空集合
         try:
-            import chromadb
-            client = chromadb.PersistentClient(path=self.vs_path)
-            client.delete_collection(f"{self.agent_id}_knowledge")
-            self._collection = None  # Force re-creation
+            get_chroma_cache().delete_collection(self.vs_path, self.collection_name)
         except Exception:
             pass
+        self._drop_collection()  # Force re-creation
+
+        manifest = IngestionManifest(self.vs_path)
+        with manifest.lock:
+            manifest.clear()
+            manifest.save()
+            lexical = get_bm25_index(self.vs_path)
+            lexical.clear()
+            lexical.save()
+        bump_collection_version(self.vs_path)
 
         results = self.ingest_all()
         return results
 
     # ========== Sub-steps ==========
 
-    def _load(self, path: str) -> str:
+    @staticmethod
+    def _load(path: str) -> str:
         """Loader Factory: 根据扩展名选择加载器"""
         ext = os.path.splitext(path)[1].lower()
 
@@ -205,12 +715,14 @@ class RAGIngestion:
             except Exception:
                 return ""
 
-    def _clean(self, text: str) -> str:
+    @staticmethod
+    def _clean(text: str) -> str:
         """Auto-Cleaner: 清洗文本"""
         # 1. 多余换行 → 单换行
         text = re.sub(r"\n{3,}", "\n\n", text)
         # 2. 去除页码 (常见格式: "- 1 -", "Page 1", "第 1 页")
-        text = re.sub(r"[-–—]\s*\d+\s*[-–—]", "", text)
+        #    "- 1 -" 只匹配独占一行的情况，避免破坏 "ORD-2024-0153" 这类 ID
+        text = re.sub(r"^[ \t]*[-–—][ \t]*\d+[ \t]*[-–—][ \t]*$", "", text, flags=re.MULTILINE)
         text = re.sub(r"Page\s+\d+", "", text, flags=re.IGNORECASE)
         text = re.sub(r"第\s*\d+\s*页", "", text)
         # 3. 去除非打印字符 (保留换行和空格)
@@ -219,33 +731,31 @@ class RAGIngestion:
         text = re.sub(r" {3,}", " ", text)
         return text.strip()
 
-    def _embed_and_store(self, chunks: list[str], source: str) -> None:
-        """嵌入并存储到 ChromaDB"""
-        if not chunks:
-            return
+    def _embed_batch(self, texts: list[str]) -> list:
+        """批量生成嵌入"""
+        return self._get_embedder().encode(texts).tolist()
+
+    def _store_batch(self, items: list[tuple[str, str, list, dict]]) -> None:
+        """批量写入 ChromaDB 与 BM25 索引: [(id, document, embedding, metadata)]"""
+        self._get_collection().add(
+            ids=[cid for cid, _, _, _ in items],
+            documents=[doc for _, doc, _, _ in items],
+            embeddings=[emb for _, _, emb, _ in items],
+            metadatas=[meta for _, _, _, meta in items]
+        )
+        lexical = get_bm25_index(self.vs_path)
+        for cid, doc, _, meta in items:
+            lexical.add(cid, doc, meta["source"])
+        bump_collection_version(self.vs_path)
 
+    def _delete_source(self, source: str) -> None:
+        """删除某个来源文件的全部 chunk"""
         collection = self._get_collection()
-        embedder = self._get_embedder()
-
-        # 生成嵌入
-        embeddings = embedder.encode(chunks).tolist()
-
-        # 生成 IDs
-        ids = [f"{source}_chunk_{i}" for i in range(len(chunks))]
-        metadatas = [{"source": source, "chunk_index": i} for i in range(len(chunks))]
-
-        # 删除旧的同源文档
         try:
             existing = collection.get(where={"source": source})
             if existing and existing["ids"]:
                 collection.delete(ids=existing["ids"])
         except Exception:
             pass
-
-        # 存入
-        collection.add(
-            documents=chunks,
-            embeddings=embeddings,
-            ids=ids,
-            metadatas=metadatas
-        )
+        get_bm25_index(self.vs_path).remove_source(source)
+        bump_collection_version(self.vs_path)
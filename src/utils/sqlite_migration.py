@@ -0,0 +1,114 @@
+"""
+SQLite Migration — 将 JSON 存储布局导入 SQLite 后端
+
+scripts/migrate_json_to_sqlite.py 与注册流程（AGENTOS_STORAGE=sqlite 时把模板导入
+新用户的 agentos.db）共用这里的逻辑。原 JSON 文件保留不动；重复执行是安全的：
+Agent 与群组按 id 覆盖，已有消息的群组和已存在的用户会跳过。
+"""
+
+import os
+import json
+
+from src.utils.message_log import MessageLog
+from src.utils.sqlite_store import (
+    SQLiteAgentStore, SQLiteGroupStore, SQLiteMessageLog, SQLiteUserStore, get_sqlite_db
+)
+
+LEGACY_PREFIX = "_group_messages_"
+
+
+def _load_json(path: str, default):
+    if not os.path.exists(path):
+        return default
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def migrate_users(data_root: str, dry_run: bool = False) -> int:
+    """导入 users.json；已存在（id 或手机号重复）的用户跳过"""
+    users = _load_json(os.path.join(data_root, "users.json"), {})
+    if dry_run:
+        return len(users)
+    store = SQLiteUserStore(get_sqlite_db(data_root))
+    existing = store.all()
+    return sum(1 for uid, user in users.items() if uid not in existing and store.insert(uid, user))
+
+
+def migrate_registry(registry_path: str, dry_run: bool = False) -> int:
+    """导入 agents_registry.json 到同目录的 agentos.db"""
+    agents = _load_json(registry_path, {}).get("agents", {})
+    if dry_run or not agents:
+        return len(agents)
+    return SQLiteAgentStore(get_sqlite_db(os.path.dirname(registry_path))).import_all(agents)
+
+
+def _workspace_group_ids(ws_path: str, groups: list[dict]) -> list[str]:
+    """群组配置中的 id 以及磁盘上有消息记录的 id（包括已删除群组遗留的记录）"""
+    group_ids = [g["id"] for g in groups]
+    log_root = os.path.join(ws_path, "_group_messages")
+    if os.path.isdir(log_root):
+        group_ids += sorted(os.listdir(log_root))
+    group_ids += sorted(
+        name[len(LEGACY_PREFIX):-len(".json")] for name in os.listdir(ws_path)
+        if name.startswith(LEGACY_PREFIX) and name.endswith(".json")
+    )
+    return list(dict.fromkeys(group_ids))
+
+
+def migrate_workspace(root: str, workspace_id: str, dry_run: bool = False) -> tuple[int, int]:
+    """导入单个工作区的群组与消息，返回 (群组数, 消息数)"""
+    ws_path = os.path.join(root, workspace_id)
+    groups = _load_json(os.path.join(ws_path, "_group_chats.json"), [])
+    db = None if dry_run else get_sqlite_db(root)
+    if db and groups:
+        SQLiteGroupStore(db).replace_all(workspace_id, groups)
+
+    messages = 0
+    for group_id in _workspace_group_ids(ws_path, groups):
+        log_dir = os.path.join(ws_path, "_group_messages", group_id)
+        legacy_path = os.path.join(ws_path, f"{LEGACY_PREFIX}{group_id}.json")
+
+        def load_records(log_dir=log_dir, legacy_path=legacy_path) -> list[dict]:
+            log = MessageLog(log_dir)
+            if log.exists():
+                return list(log)
+            return _load_json(legacy_path, [])
+
+        if dry_run:
+            messages += len(load_records())
+        else:
+            messages += SQLiteMessageLog(db, workspace_id, group_id).import_if_empty(load_records)
+    return len(groups), messages
+
+
+def _is_workspace(path: str) -> bool:
+    if not os.path.isdir(path):
+        return False
+    names = os.listdir(path)
+    return "_group_chats.json" in names or "_group_messages" in names or any(
+        n.startswith(LEGACY_PREFIX) for n in names
+    )
+
+
+def migrate_root(root: str, dry_run: bool = False) -> None:
+    """迁移一个 FileManager 根目录（data/ 或 data/{user_id}/）"""
+    registry_path = os.path.join(root, "agents_registry.json")
+    if os.path.exists(registry_path):
+        print(f"  {registry_path}: {migrate_registry(registry_path, dry_run)} agents")
+    for name in sorted(os.listdir(root)):
+        if name.startswith((".", "_")) or not _is_workspace(os.path.join(root, name)):
+            continue
+        groups, messages = migrate_workspace(root, name, dry_run)
+        print(f"  {os.path.join(root, name)}: {groups} groups, {messages} messages")
+
+
+def migrate_data_root(data_root: str, dry_run: bool = False) -> None:
+    print(f"{data_root}/users.json: {migrate_users(data_root, dry_run)} users")
+    migrate_root(data_root, dry_run)
+    for name in sorted(os.listdir(data_root)):
+        user_root = os.path.join(data_root, name)
+        if name.startswith((".", "_")) or not os.path.isdir(user_root):
+            continue
+        if os.path.exists(os.path.join(user_root, "agents_registry.json")):
+            print(f"{user_root}:")
+            migrate_root(user_root, dry_run)
@@ -0,0 +1,387 @@
+"""
+SQLite Store — 可选的 SQLite (WAL) 存储后端
+
+默认后端仍是 JSON 文件（agents_registry.json、_group_chats.json、消息日志、users.json）。
+设置环境变量 AGENTOS_STORAGE=sqlite 后，AgentRegistry / GroupChatManager / auth
+改用同目录下的 agentos.db:
+  - WAL 模式：读写互不阻塞，多进程 (uvicorn workers) 安全
+  - 每线程一个连接（sqlite3 连接不能跨线程共享）
+  - workspace / group / timestamp / tag / phone 上建索引，单条读写不随数据量线性增长
+
+从 JSON 迁移: python scripts/migrate_json_to_sqlite.py（逻辑见 src/utils/sqlite_migration.py）
+"""
+
+import os
+import json
+import sqlite3
+import threading
+from typing import Any, Callable, Iterator, Optional
+
+
+DB_FILENAME = "agentos.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS agents (
+    id TEXT PRIMARY KEY,
+    workspace TEXT,
+    config TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_agents_workspace ON agents(workspace);
+
+CREATE TABLE IF NOT EXISTS agent_tags (
+    agent_id TEXT NOT NULL,
+    tag TEXT NOT NULL,
+    PRIMARY KEY (agent_id, tag)
+);
+CREATE INDEX IF NOT EXISTS idx_agent_tags_tag ON agent_tags(tag);
+
+CREATE TABLE IF NOT EXISTS groups (
+    workspace TEXT NOT NULL,
+    id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (workspace, id)
+);
+CREATE INDEX IF NOT EXISTS idx_groups_workspace ON groups(workspace, position);
+
+CREATE TABLE IF NOT EXISTS group_messages (
+    workspace TEXT NOT NULL,
+    group_id TEXT NOT NULL,
+    id INTEGER NOT NULL,
+    timestamp TEXT,
+    data TEXT NOT NULL,
+    PRIMARY KEY (workspace, group_id, id)
+);
+CREATE INDEX IF NOT EXISTS idx_group_messages_timestamp ON group_messages(workspace, group_id, timestamp);
+
+CREATE TABLE IF NOT EXISTS users (
+    id TEXT PRIMARY KEY,
+    phone TEXT NOT NULL UNIQUE,
+    data TEXT NOT NULL
+);
+"""
+
+
+def storage_backend() -> str:
+    """当前存储后端: "json"（默认）或 "sqlite" """
+    return os.environ.get("AGENTOS_STORAGE", "json").lower()
+
+
+class SQLiteDatabase:
+    """单个 SQLite 数据库文件；每线程一个连接，首次打开时建表"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.connection().executescript(SCHEMA)
+
+    def connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+        return conn
+
+    def transaction(self) -> "_Transaction":
+        """写事务 (BEGIN IMMEDIATE)：先取得写锁，避免读-改-写中途升级锁失败"""
+        return _Transaction(self.connection())
+
+    def query(self, sql: str, params: tuple = ()) -> list[tuple]:
+        return self.connection().execute(sql, params).fetchall()
+
+
+class _Transaction:
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+    def __enter__(self) -> sqlite3.Connection:
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+
+
+_databases: dict[str, SQLiteDatabase] = {}
+_databases_lock = threading.Lock()
+
+
+def get_sqlite_db(directory: str) -> SQLiteDatabase:
+    """返回 directory/agentos.db 的进程内共享实例"""
+    path = os.path.join(os.path.realpath(directory), DB_FILENAME)
+    with _databases_lock:
+        db = _databases.get(path)
+        if db is None:
+            db = SQLiteDatabase(path)
+            _databases[path] = db
+        return db
+
+
+def _dumps(data: Any) -> str:
+    return json.dumps(data, ensure_ascii=False)
+
+
+# ========== Agents ==========
+
+class SQLiteAgentStore:
+    """AgentRegistry 的 SQLite 实现"""
+
+    def __init__(self, db: SQLiteDatabase):
+        self.db = db
+
+    @staticmethod
+    def _write_tags(conn: sqlite3.Connection, agent_id: str, config: dict) -> None:
+        conn.execute("DELETE FROM agent_tags WHERE agent_id = ?", (agent_id,))
+        conn.executemany(
+            "INSERT OR IGNORE INTO agent_tags (agent_id, tag) VALUES (?, ?)",
+            [(agent_id, tag) for tag in config.get("tags", [])]
+        )
+
+    def _write(self, conn: sqlite3.Connection, agent_id: str, config: dict) -> None:
+        conn.execute(
+            "INSERT OR REPLACE INTO agents (id, workspace, config) VALUES (?, ?, ?)",
+            (agent_id, config.get("workspace"), _dumps(config))
+        )
+        self._write_tags(conn, agent_id, config)
+
+    def get(self, agent_id: str) -> Optional[dict]:
+        rows = self.db.query("SELECT config FROM agents WHERE id = ?", (agent_id,))
+        return json.loads(rows[0][0]) if rows else None
+
+    def list_agents(self, workspace: Optional[str] = None, tag: Optional[str] = None) -> list[tuple[str, dict]]:
+        sql = "SELECT a.id, a.config FROM agents a"
+        clauses, params = [], []
+        if tag:
+            sql += " JOIN agent_tags t ON t.agent_id = a.id"
+            clauses.append("t.tag = ?")
+            params.append(tag)
+        if workspace:
+            clauses.append("a.workspace = ?")
+            params.append(workspace)
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY a.rowid"
+        return [(aid, json.loads(config)) for aid, config in self.db.query(sql, tuple(params))]
+
+    def insert(self, agent_id: str, config: dict) -> None:
+        with self.db.transaction() as conn:
+            if conn.execute("SELECT 1 FROM agents WHERE id = ?", (agent_id,)).fetchone():
+                raise ValueError(f"Agent 已存在: {agent_id}")
+            self._write(conn, agent_id, config)
+
+    def update(self, agent_id: str, apply: Callable[[dict], None]) -> None:
+        with self.db.transaction() as conn:
+            row = conn.execute("SELECT config FROM agents WHERE id = ?", (agent_id,)).fetchone()
+            if row is None:
+                raise KeyError(f"Agent 不存在: {agent_id}")
+            config = json.loads(row[0])
+            apply(config)
+            conn.execute(
+                "UPDATE agents SET workspace = ?, config = ? WHERE id = ?",
+                (config.get("workspace"), _dumps(config), agent_id)
+            )
+            self._write_tags(conn, agent_id, config)
+
+    def delete(self, agent_id: str) -> None:
+        with self.db.transaction() as conn:
+            if conn.execute("DELETE FROM agents WHERE id = ?", (agent_id,)).rowcount == 0:
+                raise KeyError(f"Agent 不存在: {agent_id}")
+            conn.execute("DELETE FROM agent_tags WHERE agent_id = ?", (agent_id,))
+
+    def all_tags(self) -> list[str]:
+        return [tag for (tag,) in self.db.query("SELECT DISTINCT tag FROM agent_tags ORDER BY tag")]
+
+    def import_all(self, agents: dict) -> int:
+        with self.db.transaction() as conn:
+            for agent_id, config in agents.items():
+                self._write(conn, agent_id, config)
+        return len(agents)
+
+
+# ========== Groups ==========
+
+class SQLiteGroupStore:
+    """GroupChatManager 群组配置的 SQLite 实现"""
+
+    def __init__(self, db: SQLiteDatabase):
+        self.db = db
+
+    def list_groups(self, workspace: str) -> list[dict]:
+        rows = self.db.query("SELECT data FROM groups WHERE workspace = ? ORDER BY position", (workspace,))
+        return [json.loads(data) for (data,) in rows]
+
+    def get(self, workspace: str, group_id: str) -> Optional[dict]:
+        rows = self.db.query("SELECT data FROM groups WHERE workspace = ? AND id = ?", (workspace, group_id))
+        return json.loads(rows[0][0]) if rows else None
+
+    def create(self, workspace: str, build: Callable[[int], dict]) -> dict:
+        """build(现有群组数) 返回新群组"""
+        with self.db.transaction() as conn:
+            count, max_pos = conn.execute(
+                "SELECT COUNT(*), COALESCE(MAX(position), -1) FROM groups WHERE workspace = ?", (workspace,)
+            ).fetchone()
+            group = build(count)
+            conn.execute(
+                "INSERT INTO groups (workspace, id, position, data) VALUES (?, ?, ?, ?)",
+                (workspace, group["id"], max_pos + 1, _dumps(group))
+            )
+        return group
+
+    def update(self, workspace: str, group_id: str, updates: dict) -> Optional[dict]:
+        with self.db.transaction() as conn:
+            row = conn.execute(
+                "SELECT data FROM groups WHERE workspace = ? AND id = ?", (workspace, group_id)
+            ).fetchone()
+            if row is None:
+                return None
+            group = json.loads(row[0])
+            group.update({k: v for k, v in updates.items() if k != "id"})
+            conn.execute(
+                "UPDATE groups SET data = ? WHERE workspace = ? AND id = ?",
+                (_dumps(group), workspace, group_id)
+            )
+        return group
+
+    def delete(self, workspace: str, group_id: str) -> None:
+        with self.db.transaction() as conn:
+            conn.execute("DELETE FROM groups WHERE workspace = ? AND id = ?", (workspace, group_id))
+
+    def replace_all(self, workspace: str, groups: list[dict]) -> None:
+        with self.db.transaction() as conn:
+            conn.execute("DELETE FROM groups WHERE workspace = ?", (workspace,))
+            conn.executemany(
+                "INSERT OR REPLACE INTO groups (workspace, id, position, data) VALUES (?, ?, ?, ?)",
+                [(workspace, g["id"], i, _dumps(g)) for i, g in enumerate(groups)]
+            )
+
+
+# ========== Group Messages ==========
+
+class SQLiteMessageLog:
+    """与 MessageLog 接口一致的群聊消息存储；消息 id 为组内序号（从 0 开始）"""
+
+    def __init__(self, db: SQLiteDatabase, workspace: str, group_id: str):
+        self.db = db
+        self.workspace = workspace
+        self.group_id = group_id
+        self._key = (workspace, group_id)
+
+    def exists(self) -> bool:
+        return bool(self.db.query(
+            "SELECT 1 FROM group_messages WHERE workspace = ? AND group_id = ? LIMIT 1", self._key
+        ))
+
+    def __len__(self) -> int:
+        return self.db.query(
+            "SELECT COALESCE(MAX(id) + 1, 0) FROM group_messages WHERE workspace = ? AND group_id = ?", self._key
+        )[0][0]
+
+    def append(self, record: dict) -> dict:
+        with self.db.transaction() as conn:
+            next_id = conn.execute(
+                "SELECT COALESCE(MAX(id) + 1, 0) FROM group_messages WHERE workspace = ? AND group_id = ?",
+                self._key
+            ).fetchone()[0]
+            record = {**record, "id": next_id}
+            conn.execute(
+                "INSERT INTO group_messages (workspace, group_id, id, timestamp, data) VALUES (?, ?, ?, ?, ?)",
+                (*self._key, next_id, record.get("timestamp"), _dumps(record))
+            )
+        return record
+
+    def import_if_empty(self, load_records: Callable[[], list[dict]]) -> int:
+        with self.db.transaction() as conn:
+            if conn.execute(
+                "SELECT 1 FROM group_messages WHERE workspace = ? AND group_id = ? LIMIT 1", self._key
+            ).fetchone():
+                return 0
+            records = load_records()
+            conn.executemany(
+                "INSERT INTO group_messages (workspace, group_id, id, timestamp, data) VALUES (?, ?, ?, ?, ?)",
+                [(*self._key, i, r.get("timestamp"), _dumps({**r, "id": i})) for i, r in enumerate(records)]
+            )
+        return len(records)
+
+    def page(self, limit: int, before: Optional[int] = None,
+             after: Optional[int] = None) -> tuple[list[dict], bool, bool]:
+        """游标分页，语义同 MessageLog.page"""
+        limit = max(limit, 0)
+        if after is not None:
+            rows = self.db.query(
+                "SELECT data FROM group_messages WHERE workspace = ? AND group_id = ? AND id > ? "
+                "ORDER BY id LIMIT ?", (*self._key, after, limit)
+            )
+        else:
+            upper = before if before is not None else 2 ** 62
+            rows = self.db.query(
+                "SELECT data FROM group_messages WHERE workspace = ? AND group_id = ? AND id < ? "
+                "ORDER BY id DESC LIMIT ?", (*self._key, upper, limit)
+            )[::-1]
+        records = [json.loads(data) for (data,) in rows]
+        if records:
+            first, last = records[0]["id"], records[-1]["id"]
+        elif after is not None:
+            first, last = after + 1, after
+        else:
+            first, last = upper, upper - 1
+        has_before = bool(self.db.query(
+            "SELECT 1 FROM group_messages WHERE workspace = ? AND group_id = ? AND id < ? LIMIT 1", (*self._key, first)
+        ))
+        has_after = bool(self.db.query(
+            "SELECT 1 FROM group_messages WHERE workspace = ? AND group_id = ? AND id > ? LIMIT 1", (*self._key, last)
+        ))
+        return records, has_before, has_after
+
+    def tail(self, n: int) -> list[dict]:
+        return self.page(n)[0]
+
+    def __iter__(self) -> Iterator[dict]:
+        rows = self.db.query(
+            "SELECT data FROM group_messages WHERE workspace = ? AND group_id = ? ORDER BY id", self._key
+        )
+        for (data,) in rows:
+            yield json.loads(data)
+
+    def clear(self) -> None:
+        with self.db.transaction() as conn:
+            conn.execute("DELETE FROM group_messages WHERE workspace = ? AND group_id = ?", self._key)
+
+
+# ========== Users ==========
+
+class SQLiteUserStore:
+    """auth 用户表的 SQLite 实现（phone 唯一索引）"""
+
+    def __init__(self, db: SQLiteDatabase):
+        self.db = db
+
+    def all(self) -> dict:
+        return {uid: json.loads(data) for uid, data in self.db.query("SELECT id, data FROM users ORDER BY rowid")}
+
+    def find_by_phone(self, phone: str) -> Optional[tuple[str, dict]]:
+        rows = self.db.query("SELECT id, data FROM users WHERE phone = ?", (phone,))
+        return (rows[0][0], json.loads(rows[0][1])) if rows else None
+
+    def insert(self, user_id: str, user: dict) -> bool:
+        """插入用户；手机号已存在时返回 False"""
+        try:
+            with self.db.transaction() as conn:
+                conn.execute(
+                    "INSERT INTO users (id, phone, data) VALUES (?, ?, ?)",
+                    (user_id, user["phone"], _dumps(user))
+                )
+        except sqlite3.IntegrityError:
+            return False
+        return True
+
+    def replace_all(self, users: dict) -> None:
+        with self.db.transaction() as conn:
+            conn.execute("DELETE FROM users")
+            conn.executemany(
+                "INSERT OR REPLACE INTO users (id, phone, data) VALUES (?, ?, ?)",
+                [(uid, u["phone"], _dumps(u)) for uid, u in users.items()]
+            )
@@ -0,0 +1,138 @@
+"""
+Tool Dispatch — 同一轮内的多个工具调用并发执行
+
+LLM 一次返回多个 tool_calls 时（如同时检索知识库、读两个文件），原先逐个串行执行，
+一轮耗时是各工具耗时之和。这里:
+  - 结果按调用顺序返回（outcomes[i] 对应 calls[i]），工具抛出的异常作为结果返回
+  - 工具通过 metadata["parallel_safe"] 声明能否并发（默认可以）；
+    浏览器 / 代码执行等共享状态的工具标记为不可并发，它们在同一条串行通道中按调用顺序执行
+  - 每轮并发数上限 AGENT_TOOL_CONCURRENCY（串行通道占一个名额）
+  - 异步版本可传入 on_result，每个调用完成时立即回调（完成顺序），用于增量推送事件
+同步工具在有界线程池（AGENT_BLOCKING_WORKERS）中执行，并复制 contextvars，回调/追踪照常传递。
+"""
+
+import os
+import asyncio
+import functools
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Awaitable, Callable, Optional, Sequence
+
+
+TOOL_CONCURRENCY = int(os.environ.get("AGENT_TOOL_CONCURRENCY", "4"))
+
+_BLOCKING_WORKERS = int(os.environ.get("AGENT_BLOCKING_WORKERS", "16"))
+_blocking_executor = ThreadPoolExecutor(max_workers=_BLOCKING_WORKERS, thread_name_prefix="agent-blocking")
+
+
+async def run_blocking(fn, *args):
+    """在有界线程池中执行阻塞函数（复制 contextvars，回调/追踪照常传递）"""
+    ctx = contextvars.copy_context()
+    return await asyncio.get_running_loop().run_in_executor(
+        _blocking_executor, functools.partial(ctx.run, fn, *args)
+    )
+
+
+# ========== Tool Declarations ==========
+
+def is_parallel_safe(tool) -> bool:
+    """工具是否可与同一轮的其他工具并发执行（metadata["parallel_safe"]，默认 True）"""
+    metadata = getattr(tool, "metadata", None) or {}
+    return bool(metadata.get("parallel_safe", True))
+
+
+def mark_parallel_unsafe(tools: list) -> list:
+    """将工具标记为不可并发（共享浏览器页面、解释器状态等），返回原列表"""
+    for tool in tools:
+        tool.metadata = {**(tool.metadata or {}), "parallel_safe": False}
+    return tools
+
+
+async def ainvoke_tool(tool, args: dict) -> Any:
+    """原生异步工具直接 ainvoke，同步工具在有界线程池中 invoke"""
+    if getattr(tool, "coroutine", None) is not None:
+        return await tool.ainvoke(args)
+    return await run_blocking(tool.invoke, args)
+
+
+# ========== Dispatch ==========
+
+def _split(calls: Sequence, is_safe: Callable[[Any], bool]) -> tuple[list[int], list[int]]:
+    safe, serial = [], []
+    for index, call in enumerate(calls):
+        (safe if is_safe(call) else serial).append(index)
+    return safe, serial
+
+
+async def dispatch_async(
+    calls: Sequence,
+    run_one: Callable[[Any], Awaitable[Any]],
+    is_safe: Callable[[Any], bool],
+    max_concurrency: int = TOOL_CONCURRENCY,
+    on_result: Optional[Callable[[int, Any, Any], Awaitable[None]]] = None,
+) -> list:
+    """
+    并发执行 calls，返回与 calls 一一对应的结果列表。
+    run_one(call) 执行单个调用；is_safe(call) 为 False 的调用进入串行通道。
+    on_result(index, call, outcome) 在每个调用完成时按完成顺序 await。
+    """
+    outcomes: list = [None] * len(calls)
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def run(index: int):
+        async with semaphore:
+            try:
+                outcome = await run_one(calls[index])
+            except Exception as e:
+                outcome = e
+        outcomes[index] = outcome
+        if on_result is not None:
+            await on_result(index, calls[index], outcome)
+
+    async def run_serial(indices: list[int]):
+        for index in indices:
+            await run(index)
+
+    safe, serial = _split(calls, is_safe)
+    jobs = [run(index) for index in safe]
+    if serial:
+        jobs.append(run_serial(serial))
+    await asyncio.gather(*jobs)
+    return outcomes
+
+
+def dispatch_sync(
+    calls: Sequence,
+    run_one: Callable[[Any], Any],
+    is_safe: Callable[[Any], bool],
+    max_concurrency: int = TOOL_CONCURRENCY,
+) -> list:
+    """dispatch_async 的同步版本：本轮临时线程池执行，最多 max_concurrency 个线程"""
+    outcomes: list = [None] * len(calls)
+
+    def run(index: int):
+        try:
+            outcomes[index] = run_one(calls[index])
+        except Exception as e:
+            outcomes[index] = e
+
+    def run_serial(indices: list[int]):
+        for index in indices:
+            run(index)
+
+    safe, serial = _split(calls, is_safe)
+    jobs = [functools.partial(run, index) for index in safe]
+    if serial:
+        jobs.append(functools.partial(run_serial, serial))
+
+    workers = min(max(1, max_concurrency), len(jobs))
+    if workers <= 1:
+        for job in jobs:
+            job()
+        return outcomes
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="agent-tools") as pool:
+        # 每个任务各自复制 contextvars（同一 Context 不能在多个线程中同时 run）
+        futures = [pool.submit(contextvars.copy_context().run, job) for job in jobs]
+        wait(futures)
+    return outcomes
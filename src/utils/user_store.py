@@ -0,0 +1,87 @@
+"""
+User Store — users.json 的手机号索引
+
+登录 / 注册原先每次都加载整个 users.json 并逐个比较手机号，成本随用户数线性增长。
+JsonUserStore 在内存中维护 phone → user_id 映射:
+  - 按 JsonStore 的版本签名校验，文件未变化时直接复用（其他进程写入后重建一次）
+  - 本进程注册时在写锁内增量更新，不触发重建
+接口与 SQLiteUserStore 一致，auth 按存储后端二选一。
+"""
+
+import threading
+from typing import Optional
+
+from src.utils.json_store import get_json_store
+
+
+class _DuplicatePhone(Exception):
+    """中止 JsonStore.update（fn 抛出异常时不写入）"""
+
+
+class JsonUserStore:
+    """users.json ({user_id: user}) + 内存手机号索引"""
+
+    def __init__(self, path: str):
+        self.store = get_json_store(path, default=dict)
+        self._lock = threading.Lock()
+        self._signature: Optional[tuple] = None
+        self._by_phone: dict[str, str] = {}
+        self.rebuilds = 0
+
+    def _current(self) -> tuple[dict, dict[str, str]]:
+        """返回 (users, phone 索引)；文件版本变化时重建索引"""
+        signature, users = self.store.snapshot()
+        with self._lock:
+            if signature is None or signature != self._signature:
+                self._by_phone = {u["phone"]: uid for uid, u in users.items()}
+                self._signature = signature
+                self.rebuilds += 1
+            return users, self._by_phone
+
+    def all(self) -> dict:
+        """只读的全部用户（调用方不得修改返回值）"""
+        return self.store.peek()
+
+    def find_by_phone(self, phone: str) -> Optional[tuple[str, dict]]:
+        users, by_phone = self._current()
+        uid = by_phone.get(phone)
+        if uid is None or uid not in users:
+            return None
+        return uid, users[uid]
+
+    def insert(self, user_id: str, user: dict) -> bool:
+        """插入用户；手机号已存在时返回 False（不写文件）"""
+        def add_user(users: dict) -> None:
+            # 在存储锁内用索引复查：并发注册可能已抢先写入
+            _, by_phone = self._current()
+            if user["phone"] in by_phone:
+                raise _DuplicatePhone()
+            users[user_id] = user
+
+        with self.store.thread_lock:
+            try:
+                self.store.update(add_user)
+            except _DuplicatePhone:
+                return False
+            signature, _ = self.store.snapshot()
+            with self._lock:
+                self._by_phone[user["phone"]] = user_id
+                self._signature = signature
+        return True
+
+    def replace_all(self, users: dict) -> None:
+        self.store.write(users)
+
+
+_stores: dict[str, JsonUserStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_json_user_store(path: str) -> JsonUserStore:
+    """按路径返回进程内共享的 JsonUserStore"""
+    with _stores_lock:
+        store = _stores.get(path)
+        if store is None:
+            store = JsonUserStore(path)
+            _stores[path] = store
+        return store
@@ -0,0 +1,232 @@
+"""
+Vector Store Cache — ChromaDB 客户端/Collection 进程级缓存
+
+每个 Agent 的向量库位于 data/{workspace}/{agent}/vector_store/。
+原先每轮对话都会新建 chromadb.PersistentClient，重新打开 SQLite 与 HNSW 段文件。
+这里按 vs_path 缓存客户端与 collection 句柄（LRU），让活跃 Agent 的索引常驻内存:
+  - open_collection() 返回 (collection, release)，持有期间条目引用计数 > 0
+  - LRU 淘汰 / close() 遇到仍被持有的条目时只移出缓存，最后一个持有者 release 后才关闭 System；
+    期间再次打开同一路径会直接复用该条目（chromadb 按路径共享 System，不能另建后各自关闭）
+  - PersistentClient 与 get_or_create_collection 都在全局锁外执行，打开慢的向量库不阻塞其他路径
+  - 关闭时同时从 chromadb 按路径共享的 System 缓存中移除，之后重新打开会得到新的 System
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Optional
+
+
+class ChromaClientCache:
+    """按 vector_store 路径缓存 PersistentClient 与 collection（LRU + 引用计数，无人持有时才关闭）"""
+
+    def __init__(self, max_size: int = 16):
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, dict]" = OrderedDict()
+        self._retired: dict[str, dict] = {}  # 已淘汰但仍被持有的条目
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _key(vs_path: str) -> str:
+        return os.path.realpath(vs_path)
+
+    @staticmethod
+    def _new_client(key: str):
+        try:
+            import chromadb
+        except ImportError:
+            raise ImportError("chromadb 未安装。请运行: pip install chromadb")
+        return chromadb.PersistentClient(path=key)
+
+    def _evict(self) -> list[tuple[str, Any]]:
+        """LRU 淘汰超出 max_size 的条目，返回需要关闭的 (path, client)（调用方持有锁）"""
+        to_close = []
+        while len(self._entries) > self.max_size:
+            old_key, old_entry = self._entries.popitem(last=False)
+            self.evictions += 1
+            if old_entry["refs"] > 0:
+                self._retired[old_key] = old_entry
+            else:
+                to_close.append((old_key, old_entry["client"]))
+        return to_close
+
+    def _close_all(self, to_close: list[tuple[str, Any]]) -> None:
+        for path, client in to_close:
+            self._close_client(path, client)
+
+    def _get_entry(self, vs_path: str) -> dict:
+        key = self._key(vs_path)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            entry = self._retired.pop(key, None)
+            if entry is not None:
+                # 已淘汰但仍被持有：放回缓存继续使用
+                self._entries[key] = entry
+                self.hits += 1
+                to_close = self._evict()
+            else:
+                self.misses += 1
+        if entry is not None:
+            self._close_all(to_close)
+            return entry
+
+        # 在锁外打开（加载 SQLite / HNSW 段可能很慢）
+        client = self._new_client(key)
+
+        with self._lock:
+            entry = self._entries.get(key) or self._retired.pop(key, None)
+            if entry is None:
+                # 并发打开同一路径时 chromadb 返回共享的 System，落选的 client 直接丢弃即可
+                entry = {"client": client, "collections": {}, "refs": 0}
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            to_close = self._evict()
+        self._close_all(to_close)
+        return entry
+
+    def get_client(self, vs_path: str):
+        return self._get_entry(vs_path)["client"]
+
+    def get_collection(self, vs_path: str, name: str, metadata: Optional[dict] = None):
+        """获取（或创建）collection 句柄（不登记持有，仅用于一次性操作）"""
+        entry = self._get_entry(vs_path)
+        with self._lock:
+            collection = entry["collections"].get(name)
+        if collection is not None:
+            return collection
+
+        # 在锁外打开（首次打开需读盘），并发打开同一 collection 时以先登记的句柄为准
+        collection = entry["client"].get_or_create_collection(name=name, metadata=metadata)
+        with self._lock:
+            return entry["collections"].setdefault(name, collection)
+
+    def open_collection(self, vs_path: str, name: str,
+                        metadata: Optional[dict] = None) -> tuple[Any, Callable[[], None]]:
+        """
+        获取 collection 并登记一次持有，返回 (collection, release)。
+        release 只生效一次；持有期间条目即使被 LRU 淘汰也不会关闭。
+        """
+        key = self._key(vs_path)
+        while True:
+            collection = self.get_collection(vs_path, name, metadata)
+            with self._lock:
+                entry = self._entries.get(key)
+                # get_collection 与加锁之间条目可能刚被淘汰并关闭，重试
+                if entry is not None and entry["collections"].get(name) is collection:
+                    entry["refs"] += 1
+                    break
+
+        released = threading.Event()
+
+        def release() -> None:
+            if released.is_set():
+                return
+            released.set()
+            self._release(key, entry)
+
+        return collection, release
+
+    def _release(self, key: str, entry: dict) -> None:
+        with self._lock:
+            entry["refs"] -= 1
+            if entry["refs"] > 0 or self._retired.get(key) is not entry:
+                return
+            del self._retired[key]
+        self._close_client(key, entry["client"])
+
+    def delete_collection(self, vs_path: str, name: str) -> None:
+        """删除 collection 并丢弃缓存的句柄"""
+        entry = self._get_entry(vs_path)
+        with self._lock:
+            entry["collections"].pop(name, None)
+        entry["client"].delete_collection(name)
+
+    def close(self, vs_path: str) -> None:
+        """显式关闭某个向量库（例如删除 Agent 前）；仍被持有时在最后一次 release 后关闭"""
+        key = self._key(vs_path)
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None and entry["refs"] > 0:
+                self._retired[key] = entry
+                return
+        if entry:
+            self._close_client(key, entry["client"])
+
+    @staticmethod
+    def _close_client(path: str, client: Any) -> None:
+        """停止客户端的 System，并从 chromadb 的共享 System 缓存中移除"""
+        try:
+            system = getattr(client, "_system", None)
+            if system is not None:
+                system.stop()
+            from chromadb.api.client import SharedSystemClient
+            registry = getattr(SharedSystemClient, "_identifier_to_system", None)
+            if isinstance(registry, dict):
+                registry.pop(path, None)
+        except Exception as e:
+            print(f"[ChromaClientCache] Error closing client for {path}: {e}")
+
+    # ========== Metrics ==========
+
+    @staticmethod
+    def _index_bytes(path: str) -> int:
+        """HNSW 段文件（vector_store 下的子目录）总大小，即常驻索引大小的近似值"""
+        total = 0
+        try:
+            for name in os.listdir(path):
+                seg_dir = os.path.join(path, name)
+                if not os.path.isdir(seg_dir):
+                    continue
+                for fname in os.listdir(seg_dir):
+                    fpath = os.path.join(seg_dir, fname)
+                    if os.path.isfile(fpath):
+                        total += os.path.getsize(fpath)
+        except OSError:
+            pass
+        return total
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = list(self._entries.items())
+            counters = {
+                "open_handles": len(entries),
+                "retired_in_use": len(self._retired),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+        stores = []
+        for path, entry in entries:
+            vectors = 0
+            for collection in entry["collections"].values():
+                try:
+                    vectors += collection.count()
+                except Exception:
+                    pass
+            stores.append({
+                "path": path,
+                "collections": len(entry["collections"]),
+                "vectors": vectors,
+                "index_bytes": self._index_bytes(path),
+            })
+
+        counters["resident_index_bytes"] = sum(s["index_bytes"] for s in stores)
+        counters["stores"] = stores
+        return counters
+
+
+_chroma_cache = ChromaClientCache(max_size=int(os.environ.get("CHROMA_CLIENT_CACHE_SIZE", "16")))
+
+
+def get_chroma_cache() -> ChromaClientCache:
+    """返回进程级 ChromaDB 客户端缓存"""
+    return _chroma_cache
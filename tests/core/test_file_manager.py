@@ -1,7 +1,9 @@
 import unittest
 import os
+import json
 import shutil
 import sys
+from unittest.mock import patch
 
 # Ensure src is importable
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../'))
@@ -89,5 +91,28 @@ class TestFileManager(unittest.TestCase):
         with self.assertRaises(PermissionError):
             self.fm.read_file(output_file)
 
+    def test_metadata_cache_write_through(self):
+        """Lock checks are served from the metadata cache and follow external edits"""
+        doc = "workspace_test/agent_a/notes.md"
+        self.fm.write_file(doc, "v1")
+        self.fm.set_file_lock(doc, True)
+
+        with patch("builtins.open", wraps=open) as mocked_open:
+            for _ in range(3):
+                self.assertTrue(self.fm.get_file_info(doc).locked)
+                with self.assertRaises(PermissionError):
+                    self.fm.write_file(doc, "v2")
+            self.assertEqual(mocked_open.call_count, 0)
+
+        # Another FileManager instance shares the cache
+        FileManager(self.TEST_DATA_ROOT).set_file_lock(doc, False)
+        self.assertFalse(self.fm.get_file_info(doc).locked)
+
+        # Edits made outside this process are picked up via mtime/size
+        meta_path = os.path.join(self.TEST_DATA_ROOT, "workspace_test", "agent_a", "_metadata.json")
+        with open(meta_path, "w", encoding="utf-8") as f:
+            json.dump({"files": {"notes.md": {"locked": True, "type": "resource"}}}, f)
+        self.assertTrue(self.fm.get_file_info(doc).locked)
+
 if __name__ == "__main__":
     unittest.main()
@@ -10,7 +10,7 @@ PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')
 if PROJECT_ROOT not in sys.path:
     sys.path.insert(0, PROJECT_ROOT)
 
-from src.core.llm_manager import LLMManager, LLMProvider
+from src.core.llm_manager import LLMManager, LLMProvider, ModelClientPool, get_model_pool
 
 class TestLLMManager(unittest.TestCase):
     
@@ -93,5 +93,49 @@ class TestLLMManager(unittest.TestCase):
         self.assertEqual(len(models), 2)
         self.assertEqual(models[0]["display"], "Test Provider - model-a")
 
+    def test_save_providers_invalidates_pooled_clients(self):
+        mgr = LLMManager()
+        pool = get_model_pool()
+        key = ("test_provider", "openai_compatible", "http://localhost:1234/v1", "model-a", 0.7, "")
+        pool.get_or_create(key, lambda: object())
+
+        mgr.providers["test_provider"].base_url = "http://localhost:5678/v1"
+        mgr.save_providers()
+
+        created = []
+        pool.get_or_create(key, lambda: created.append(1) or object())
+        self.assertEqual(created, [1])
+        pool.invalidate("test_provider")
+
+
+class TestModelClientPool(unittest.TestCase):
+
+    def test_hit_and_miss_counters(self):
+        pool = ModelClientPool(max_size=4)
+        first = pool.get_or_create(("p", "m"), lambda: object())
+        second = pool.get_or_create(("p", "m"), lambda: object())
+        self.assertIs(first, second)
+        stats = pool.stats()
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["misses"], 1)
+
+    def test_lru_eviction(self):
+        pool = ModelClientPool(max_size=2)
+        pool.get_or_create(("a",), lambda: "A")
+        pool.get_or_create(("b",), lambda: "B")
+        pool.get_or_create(("a",), lambda: "A2")  # touch a
+        pool.get_or_create(("c",), lambda: "C")   # evicts b
+        self.assertEqual(pool.get_or_create(("a",), lambda: "A3"), "A")
+        self.assertEqual(pool.get_or_create(("b",), lambda: "B2"), "B2")
+        self.assertEqual(pool.stats()["evictions"], 2)
+
+    def test_invalidate_by_provider(self):
+        pool = ModelClientPool()
+        pool.get_or_create(("p1", "m"), lambda: 1)
+        pool.get_or_create(("p2", "m"), lambda: 2)
+        self.assertEqual(pool.invalidate("p1"), 1)
+        self.assertEqual(pool.stats()["size"], 1)
+
+
 if __name__ == "__main__":
     unittest.main()
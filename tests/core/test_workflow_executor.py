@@ -0,0 +1,227 @@
+import unittest
+import os
+import sys
+import shutil
+import asyncio
+import tempfile
+
+# Ensure src is importable
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from src.core.workflow_executor import WorkflowExecutor
+from src.core.workflow_checkpoint import WorkflowCheckpoint
+
+
+class _StubAgent:
+    """记录执行时的并发数与上下文，按 instruction 中的 delay 模拟耗时"""
+
+    def __init__(self, name, tracker, delays):
+        self.name = name
+        self.agent_id = name
+        self.tracker = tracker
+        self.delays = delays
+
+    async def execute_with_context(self, instruction, history, on_event=None):
+        self.tracker["running"] += 1
+        self.tracker["calls"].append((self.name, instruction))
+        self.tracker["peak"] = max(self.tracker["peak"], self.tracker["running"])
+        self.tracker["contexts"][instruction] = [m.get("name") for m in history]
+        await asyncio.sleep(self.delays.get(instruction, 0.01))
+        self.tracker["running"] -= 1
+        if instruction == "fail":
+            raise RuntimeError("boom")
+        return f"done:{instruction}"
+
+
+def _step(n, prompt, **extra):
+    return {"step": n, "step_name": f"S{n}", "executor_agent": f"A{n}",
+            "executor_prompt": prompt, "reviewer_agent": None, "reviewer_prompt": None,
+            "max_revision_rounds": 0, **extra}
+
+
+class TestWorkflowExecutor(unittest.TestCase):
+
+    def setUp(self):
+        self.tracker = {"running": 0, "peak": 0, "contexts": {}, "calls": []}
+
+    def _executor(self, steps, delays=None, max_parallel_steps=None):
+        agents = {s["executor_agent"]: _StubAgent(s["executor_agent"], self.tracker, delays or {})
+                  for s in steps}
+        history = [{"role": "user", "content": "topic"}]
+        return WorkflowExecutor({"workflow": steps}, agents, history, max_parallel_steps=max_parallel_steps)
+
+    def test_dependencies_from_placeholders_and_depends_on(self):
+        steps = [
+            _step(1, "a {user_input}"),
+            _step(2, "b {user_input}"),
+            _step(3, "c {step_1_result} {step_9_result}", depends_on=[2]),
+            _step(4, "d {step_4_result}"),
+        ]
+        self.assertEqual(self._executor(steps).build_dependencies(),
+                         {1: [], 2: [], 3: [1, 2], 4: []})
+
+    def test_independent_steps_run_concurrently_and_report_in_order(self):
+        steps = [
+            _step(1, "slow"),
+            _step(2, "fast"),
+            _step(3, "merge {step_1_result} {step_2_result}"),
+        ]
+        executor = self._executor(steps, delays={"slow": 0.08, "fast": 0.01}, max_parallel_steps=2)
+        reported = []
+        history = asyncio.run(executor.execute(on_step_complete=lambda d: reported.append(d["step"])))
+
+        self.assertEqual(self.tracker["peak"], 2)
+        self.assertEqual(reported, [1, 2, 3])
+        self.assertEqual([m.get("name") for m in history], [None, "A1", "A2", "A3"])
+        self.assertEqual(self.tracker["contexts"]["merge done:slow done:fast"], [None, "A1", "A2"])
+        # 相互独立的步骤看不到彼此的输出
+        self.assertEqual(self.tracker["contexts"]["fast"], [None])
+
+    def test_only_dependency_results_are_filled(self):
+        # 步骤 2 依赖步骤 1，但前向引用了相互独立的步骤 3：无论步骤 3 是否先完成都不替换
+        steps = [
+            _step(1, "one"),
+            _step(2, "two {step_1_result} {step_3_result}", depends_on=[1]),
+            _step(3, "three"),
+        ]
+        for delays in ({"one": 0.01, "three": 0.08}, {"one": 0.08, "three": 0.01}):
+            self.tracker["calls"].clear()
+            asyncio.run(self._executor(steps, delays=delays).execute())
+            prompts = [instruction for name, instruction in self.tracker["calls"] if name == "A2"]
+            self.assertEqual(prompts, ["two done:one {step_3_result}"])
+
+    def test_limit_one_runs_sequentially(self):
+        steps = [_step(n, f"p{n}") for n in range(1, 5)]
+        asyncio.run(self._executor(steps, max_parallel_steps=1).execute())
+        self.assertEqual(self.tracker["peak"], 1)
+
+    def test_failure_skips_steps_not_started(self):
+        steps = [
+            _step(1, "fail"),
+            _step(2, "after {step_1_result}"),
+            _step(3, "independent"),
+        ]
+        executor = self._executor(steps, max_parallel_steps=1)
+        history = asyncio.run(executor.execute())
+        self.assertNotIn("after {step_1_result}", self.tracker["contexts"])
+        self.assertNotIn("independent", self.tracker["contexts"])
+        self.assertIn("Critical Error in Step 1", history[-1]["content"])
+
+
+class _Reviewer:
+    """第一次驳回，之后按 crash 决定抛出异常（模拟进程中断）或通过"""
+
+    def __init__(self, tracker, crash, reviews=0):
+        self.name = "R"
+        self.agent_id = "R"
+        self.tracker = tracker
+        self.crash = crash
+        self.reviews = reviews
+
+    async def execute_with_context(self, instruction, history, on_event=None):
+        self.tracker["calls"].append((self.name, instruction))
+        self.reviews += 1
+        if self.reviews == 1:
+            return "REJECTED: shorter"
+        if self.crash:
+            raise RuntimeError("interrupted")
+        return "APPROVED"
+
+
+class TestWorkflowCheckpoint(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.checkpoint = WorkflowCheckpoint(os.path.join(self.tmp, "_group_workflows", "g1.json"))
+        self.tracker = {"running": 0, "peak": 0, "contexts": {}, "calls": []}
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def _run(self, steps, resume=False, extra_agents=None, history=None, delays=None):
+        agents = {s["executor_agent"]: _StubAgent(s["executor_agent"], self.tracker, delays or {}) for s in steps}
+        agents.update(extra_agents or {})
+        reported = []
+        executor = WorkflowExecutor({"workflow": steps}, agents, history or [{"role": "user", "content": "topic"}],
+                                    checkpoint=self.checkpoint)
+        result = asyncio.run(executor.execute(on_step_complete=reported.append, resume=resume))
+        return result, reported
+
+    def test_rerun_skips_unchanged_steps(self):
+        steps = [_step(1, "a {user_input}"), _step(2, "b {user_input}"), _step(3, "c {step_1_result}")]
+        self._run(steps)
+        self.assertEqual(len(self.tracker["calls"]), 3)
+        self.assertEqual(self.checkpoint.load()["status"], "completed")
+
+        self.tracker["calls"].clear()
+        history, reported = self._run(steps)
+        self.assertEqual(self.tracker["calls"], [])
+        self.assertEqual([d["step"] for d in reported], [1, 2, 3])
+        self.assertTrue(all(d["cached"] for d in reported))
+        self.assertEqual([m.get("name") for m in history], [None, "A1", "A2", "A3"])
+
+        # 修改步骤 1：步骤 1 与依赖它的步骤 3 重新执行，步骤 2 复用
+        self.tracker["calls"].clear()
+        steps[0] = _step(1, "a2 {user_input}")
+        self._run(steps)
+        self.assertEqual([name for name, _ in self.tracker["calls"]], ["A1", "A3"])
+
+    def test_hash_is_stable_when_independent_step_finishes_first(self):
+        # 步骤 3 与步骤 2 相互独立，步骤 2 的提示词却引用了步骤 3：哈希不能随完成顺序变化
+        steps = [
+            _step(1, "zero"),
+            _step(2, "one {step_3_result}", depends_on=[1]),
+            _step(3, "two"),
+        ]
+        self._run(steps, delays={"zero": 0.08, "two": 0.01})
+        first = {n: e["input_hash"] for n, e in self.checkpoint.load()["steps"].items()}
+
+        # 换一种完成顺序重跑：哈希一致，全部从检查点恢复
+        self.tracker["calls"].clear()
+        _, reported = self._run(steps, delays={"zero": 0.01, "two": 0.08})
+        self.assertEqual(self.tracker["calls"], [])
+        self.assertTrue(all(d["cached"] for d in reported))
+        self.assertEqual({n: e["input_hash"] for n, e in self.checkpoint.load()["steps"].items()}, first)
+
+    def test_history_change_reruns_steps(self):
+        steps = [_step(1, "a {user_input}"), _step(2, "b {step_1_result}")]
+        self._run(steps)
+        self.tracker["calls"].clear()
+
+        # 用户输入与步骤配置都不变，只有步骤看到的历史不同：必须重新执行
+        history = [{"role": "user", "content": "topic"},
+                   {"role": "assistant", "name": "Other", "content": "new context"}]
+        _, reported = self._run(steps, history=history)
+        self.assertEqual([name for name, _ in self.tracker["calls"]], ["A1", "A2"])
+        self.assertFalse(any(d["cached"] for d in reported))
+
+    def test_resume_continues_from_saved_revision_round(self):
+        steps = [
+            _step(1, "first"),
+            _step(2, "draft {step_1_result}", reviewer_agent="R",
+                  reviewer_prompt="review {step_result}", max_revision_rounds=2),
+        ]
+        history, reported = self._run(steps, extra_agents={"R": _Reviewer(self.tracker, crash=True)})
+        self.assertEqual([d["step"] for d in reported], [1])
+        saved = self.checkpoint.load()
+        self.assertEqual(saved["status"], "failed")
+        self.assertEqual(saved["steps"]["2"]["status"], "in_progress")
+        self.assertEqual(saved["steps"]["2"]["round"], 1)
+
+        self.tracker["calls"].clear()
+        data = self.checkpoint.load()
+        history, reported = self._run(data["workflow"]["workflow"], resume=True,
+                                      extra_agents={"R": _Reviewer(self.tracker, crash=False, reviews=1)},
+                                      history=data["history"])
+        # 步骤 1 不重跑也不重复上报；步骤 2 从第 2 轮（修改稿）继续
+        self.assertEqual([d["step"] for d in reported], [2])
+        self.assertEqual(self.tracker["calls"][0][0], "A2")
+        self.assertTrue(self.tracker["calls"][0][1].startswith("修改意见：shorter"))
+        self.assertEqual([m.get("name") for m in history], [None, "A1", "A2", "R", "A2", "R"])
+        self.assertEqual(self.checkpoint.load()["status"], "completed")
+
+
+if __name__ == "__main__":
+    unittest.main()
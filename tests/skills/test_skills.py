@@ -9,7 +9,7 @@ if PROJECT_ROOT not in sys.path:
     sys.path.insert(0, PROJECT_ROOT)
 
 from src.skills import deep_research, data_viz, browser_takeover
-from src.skills.skill_loader import SkillLoader
+from src.skills.skill_loader import SkillLoader, SkillRegistry
 
 class TestL2Skills(unittest.TestCase):
     def test_deep_research(self):
@@ -85,5 +85,39 @@ class TestL2Skills(unittest.TestCase):
         self.assertGreaterEqual(count, 3) # deep_research, data_viz, browser_takeover
         self.assertIsNotNone(loader.get_skill("browser_takeover"))
 
+    def test_skill_registry_reloads_only_changed_files(self):
+        """Registry re-imports a custom skill only when its mtime changes"""
+        import tempfile
+        import shutil
+        custom_dir = tempfile.mkdtemp()
+        try:
+            skill_path = os.path.join(custom_dir, "echo_skill.py")
+            with open(skill_path, "w", encoding="utf-8") as f:
+                f.write('SKILL_NAME = "echo_skill"\nSKILL_DESCRIPTION = "v1"\ndef run(**kw):\n    return "v1"\n')
+
+            registry = SkillRegistry(custom_dir)
+            registry.scan_and_load()
+            self.assertEqual(registry.get_skill("echo_skill")["description"], "v1")
+            version = registry.version
+
+            # No changes -> no reload, version unchanged
+            registry.scan_and_load()
+            self.assertEqual(registry.version, version)
+
+            with open(skill_path, "w", encoding="utf-8") as f:
+                f.write('SKILL_NAME = "echo_skill"\nSKILL_DESCRIPTION = "v2"\ndef run(**kw):\n    return "v2"\n')
+            st = os.stat(skill_path)
+            os.utime(skill_path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+            registry.scan_and_load()
+            self.assertGreater(registry.version, version)
+            self.assertEqual(registry.run_skill("echo_skill"), "v2")
+
+            os.remove(skill_path)
+            registry.scan_and_load()
+            self.assertIsNone(registry.get_skill("echo_skill"))
+        finally:
+            shutil.rmtree(custom_dir)
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,161 @@
+import unittest
+import os
+import sys
+import json
+import shutil
+import time
+import tempfile
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+# Ensure src is importable
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import jwt
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from backend.middleware import auth_middleware
+from backend.middleware.auth_middleware import JWTAuthMiddleware, VerifiedTokenCache
+from backend.routers import auth
+from src.core.agent_registry import AgentRegistry
+from src.core.file_manager import FileManager
+from src.core.group_manager import GroupChatManager
+
+
+class TestRegisterSQLite(unittest.TestCase):
+    """AGENTOS_STORAGE=sqlite 时注册需把模板导入新用户的 agentos.db"""
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.data_root = os.path.join(self.tmp, "data")
+        template = os.path.join(self.data_root, "_template")
+        ws_path = os.path.join(template, "workspace_demo")
+        os.makedirs(ws_path)
+        with open(os.path.join(template, "agents_registry.json"), "w", encoding="utf-8") as f:
+            json.dump({"version": "1.0", "agents": {"a1": {"name": "A1", "workspace": "workspace_demo"}}}, f)
+        with open(os.path.join(ws_path, "_group_chats.json"), "w", encoding="utf-8") as f:
+            json.dump([{"id": "g1", "name": "G1"}], f)
+        with open(os.path.join(ws_path, "_group_messages_g1.json"), "w", encoding="utf-8") as f:
+            json.dump([{"role": "user", "content": "hello"}], f)
+
+        for patcher in (
+            patch.dict(os.environ, {"AGENTOS_STORAGE": "sqlite"}),
+            patch.object(auth, "DATA_ROOT", self.data_root),
+            patch.object(auth, "TEMPLATE_DIR", template),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        app = FastAPI()
+        app.include_router(auth.router)
+        self.client = TestClient(app)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_register_imports_template_into_sqlite(self):
+        resp = self.client.post("/api/auth/register",
+                                json={"username": "u", "phone": "13800000000", "password": "pw"})
+        self.assertEqual(resp.status_code, 200)
+        user_root = os.path.join(self.data_root, resp.json()["user"]["id"])
+        self.assertTrue(os.path.exists(os.path.join(user_root, "agentos.db")))
+
+        registry = AgentRegistry(os.path.join(user_root, "agents_registry.json"), backend="sqlite")
+        self.assertEqual(registry.get_agent("a1")["name"], "A1")
+        gm = GroupChatManager(FileManager(user_root), backend="sqlite")
+        self.assertEqual([g["id"] for g in gm.list_groups("workspace_demo")], ["g1"])
+        self.assertEqual([m["content"] for m in gm.get_messages("workspace_demo", "g1")], ["hello"])
+
+        # 用户同样写入 sqlite
+        resp = self.client.post("/api/auth/login", json={"phone": "13800000000", "password": "pw"})
+        self.assertEqual(resp.status_code, 200)
+
+
+def _token(user_id="u1", expires_in=3600):
+    payload = {"user_id": user_id, "username": "alice",
+               "exp": datetime.utcnow() + timedelta(seconds=expires_in)}
+    return jwt.encode(payload, auth_middleware.JWT_SECRET, algorithm=auth_middleware.JWT_ALGORITHM)
+
+
+class TestJWTAuthMiddleware(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = VerifiedTokenCache(max_size=8)
+        patcher = patch.object(auth_middleware, "_token_cache", self.cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        app = FastAPI()
+        app.add_middleware(JWTAuthMiddleware)
+
+        @app.get("/api/whoami")
+        async def whoami(request: Request):
+            return {"user_id": request.state.user_id, "username": request.state.username}
+
+        @app.post("/api/whoami")
+        async def whoami_post(request: Request):
+            return {"user_id": request.state.user_id}
+
+        @app.post("/api/auth/login")
+        async def login():
+            return {"ok": True}
+
+        self.client = TestClient(app)
+
+    def _get(self, token, method="get"):
+        return getattr(self.client, method)("/api/whoami", headers={"Authorization": f"Bearer {token}"})
+
+    def test_valid_token_populates_request_state(self):
+        resp = self._get(_token("u42"))
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.json(), {"user_id": "u42", "username": "alice"})
+
+    def test_cache_hit_skips_decode(self):
+        token = _token()
+        with patch.object(auth_middleware.jwt, "decode", wraps=jwt.decode) as decode:
+            for _ in range(3):
+                self.assertEqual(self._get(token).status_code, 200)
+        self.assertEqual(decode.call_count, 1)
+        self.assertEqual((self.cache.stats()["hits"], self.cache.stats()["misses"]), (2, 1))
+
+    def test_entry_is_evicted_at_exp(self):
+        exp = time.time() + 60
+        self.cache.put("t", "u1", "alice", exp)
+        self.assertEqual(self.cache.get("t")[0], "u1")
+        with patch.object(auth_middleware.time, "time", return_value=exp):
+            self.assertIsNone(self.cache.get("t"))
+        self.assertEqual(self.cache.stats()["size"], 0)
+
+    def test_lru_is_bounded(self):
+        exp = time.time() + 60
+        for i in range(10):
+            self.cache.put(f"t{i}", f"u{i}", "", exp)
+        self.assertEqual(self.cache.stats()["size"], 8)
+        self.assertIsNone(self.cache.get("t0"))
+        self.assertEqual(self.cache.get("t9")[0], "u9")
+
+    def test_bad_and_expired_tokens_are_rejected(self):
+        resp = self._get("not-a-jwt")
+        self.assertEqual(resp.status_code, 401)
+        self.assertEqual(resp.json()["detail"], "无效的登录凭证")
+
+        resp = self._get(_token(expires_in=-10))
+        self.assertEqual(resp.status_code, 401)
+        self.assertEqual(resp.json()["detail"], "登录已过期，请重新登录")
+        self.assertEqual(self.cache.stats()["size"], 0)
+
+        forged = jwt.encode({"user_id": "u1", "exp": time.time() + 60}, "wrong-secret", algorithm="HS256")
+        self.assertEqual(self._get(forged).status_code, 401)
+
+    def test_public_path_and_guest_access(self):
+        self.assertEqual(self.client.post("/api/auth/login").json(), {"ok": True})
+        # 未登录的 GET 以只读游客身份访问模板数据，写操作需要登录
+        self.assertEqual(self.client.get("/api/whoami").json()["user_id"], "_template")
+        self.assertEqual(self.client.post("/api/whoami").status_code, 401)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+import unittest
+import os
+import sys
+import json
+from types import SimpleNamespace
+from unittest.mock import patch
+
+# Ensure src is importable
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from fastapi.testclient import TestClient
+from langchain_core.messages import AIMessage, ToolMessage
+
+from backend import server
+from backend.routers.auth import _create_token
+
+
+class _StubGraph:
+    """按给定顺序产出 astream_events 事件；fail 为真时在最后抛出异常"""
+
+    def __init__(self, events, fail=False):
+        self.events = events
+        self.fail = fail
+
+    async def astream_events(self, state, version):
+        for event in self.events:
+            yield event
+        if self.fail:
+            raise RuntimeError("llm down")
+
+
+def _event(kind, node, name=None, **data):
+    return {"event": kind, "name": name or node, "metadata": {"langgraph_node": node}, "data": data}
+
+
+def _parse_sse(body):
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+class TestChatStream(unittest.TestCase):
+
+    def setUp(self):
+        state = {"agent_config": {"name": "Dev"}, "messages": []}
+        patcher = patch.object(server, "_prepare_chat_state", lambda chat_req, request: state)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = patch.object(server, "_log_graph_error", lambda e: None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = TestClient(server.app)
+        self.headers = {"Authorization": f"Bearer {_create_token('u1', 'alice')}"}
+
+    def _stream(self, graph):
+        with patch.object(server, "get_compiled_graph", lambda version: graph):
+            resp = self.client.post("/api/chat/stream", headers=self.headers,
+                                    json={"message": "hi", "agent_id": "a1", "workspace_id": "ws"})
+        self.assertEqual(resp.status_code, 200)
+        self.assertTrue(resp.headers["content-type"].startswith("text/event-stream"))
+        return _parse_sse(resp.text)
+
+    def test_events_are_streamed_in_order(self):
+        change = {"id": "cr1", "file_path": "a.txt"}
+        graph = _StubGraph([
+            _event("on_chat_model_stream", "agent", chunk=SimpleNamespace(content="Hel")),
+            _event("on_chat_model_stream", "agent", chunk=SimpleNamespace(content="lo")),
+            _event("on_chat_model_stream", "tools", chunk=SimpleNamespace(content="ignored")),
+            _event("on_chain_end", "agent", output={"messages": [AIMessage(
+                content="Hello", tool_calls=[{"name": "write_file", "args": {"path": "a.txt"}, "id": "c1"}])]}),
+            _event("on_chain_end", "tools", output={
+                "messages": [ToolMessage(content="ok", tool_call_id="c1")], "pending_changes": [change]}),
+            _event("on_chain_end", "agent", output={"messages": [AIMessage(content="Done")]}),
+        ])
+        events = self._stream(graph)
+        self.assertEqual([kind for kind, _ in events],
+                         ["token", "token", "tool_call", "tool_result", "change_request", "done"])
+        self.assertEqual("".join(data["content"] for kind, data in events if kind == "token"), "Hello")
+        self.assertEqual(events[2][1], {"agent": "Dev", "tool": "write_file", "args": {"path": "a.txt"}, "id": "c1"})
+        self.assertEqual(events[3][1], {"agent": "Dev", "tool": "write_file", "result": "ok", "id": "c1"})
+        self.assertEqual(events[-1][1], {"response": "Done", "pending_changes": [change]})
+
+    def test_exception_emits_error_event(self):
+        graph = _StubGraph([_event("on_chat_model_stream", "agent", chunk=SimpleNamespace(content="Hi"))],
+                           fail=True)
+        events = self._stream(graph)
+        self.assertEqual([kind for kind, _ in events], ["token", "error"])
+        self.assertIn("llm down", events[-1][1]["content"])
+
+
+if __name__ == "__main__":
+    unittest.main()
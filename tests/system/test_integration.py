@@ -3,7 +3,8 @@ import os
 import sys
 import shutil
 import json
-from unittest.mock import MagicMock
+import asyncio
+from unittest.mock import MagicMock, AsyncMock
 
 # Ensure src is importable
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../'))
@@ -15,7 +16,11 @@ from src.core.workspace import WorkspaceManager
 from src.core.agent_registry import AgentRegistry
 from src.core.base_agent import BaseAgent
 from src.core.meta_agent import MetaAgent
-from src.graph.agent_graph import create_compiled_graph
+from src.graph.agent_graph import (
+    create_compiled_graph, build_agent_graph,
+    get_compiled_graph, warm_graph_registry, clear_graph_registry,
+    GRAPH_VERSION, ASYNC_GRAPH_VERSION,
+)
 from langchain_core.messages import HumanMessage, AIMessage
 
 class TestSystemIntegration(unittest.TestCase):
@@ -159,5 +164,72 @@ class TestSystemIntegration(unittest.TestCase):
             with open(full_path, "r") as f:
                 self.assertEqual(f.read(), "Hello World")
 
+    def test_async_graph_tool_flow(self):
+        """The async graph (ainvoke) produces the same change request as the sync graph."""
+        ws_id = self.wm.create_workspace("Project Beta")
+        agent_id = "agent_async_bot"
+        self.meta.create_agent(
+            workspace_id=ws_id,
+            agent_id=agent_id,
+            name="Async Bot",
+            role_desc="Developer",
+            tools=["write_file"],
+        )
+        state = {
+            "messages": [HumanMessage(content="Write a hello world file")],
+            "current_agent": agent_id,
+            "current_workspace": ws_id,
+            "agent_config": self.ar.get_agent(agent_id),
+            "pending_changes": [],
+            "approval_status": None,
+            "context": "",
+            "needs_approval": False
+        }
+
+        with unittest.mock.patch("src.graph.nodes._get_llm") as mock_get_llm:
+            mock_llm = MagicMock()
+            mock_get_llm.return_value = mock_llm
+            mock_llm.bind_tools.return_value.ainvoke = AsyncMock(return_value=AIMessage(
+                content="",
+                tool_calls=[{
+                    "name": "write_file",
+                    "args": {"path": "active/hello.txt", "content": "Hello World"},
+                    "id": "call_456"
+                }]
+            ))
+
+            from src.tools.file_tools import init_file_tools
+            init_file_tools(self.fm)
+
+            graph = build_agent_graph(async_nodes=True).compile()
+            res = asyncio.run(graph.ainvoke(state))
+
+            pending = res.get("pending_changes", [])
+            self.assertEqual(len(pending), 1)
+            # Agent 文件工具把 active/ 重定向到工作区共享目录
+            self.assertEqual(pending[0]["file_path"].replace("\\", "/"), f"{ws_id}/shared/active/hello.txt")
+            mock_llm.bind_tools.return_value.invoke.assert_not_called()
+
+    def test_compiled_graph_registry(self):
+        """get_compiled_graph compiles once per version; clear_graph_registry resets the cache."""
+        clear_graph_registry()
+        try:
+            first = get_compiled_graph()
+            self.assertIs(get_compiled_graph(GRAPH_VERSION), first)
+            self.assertIsNot(get_compiled_graph(ASYNC_GRAPH_VERSION), first)
+
+            self.assertEqual(sorted(warm_graph_registry()), sorted([GRAPH_VERSION, ASYNC_GRAPH_VERSION]))
+            self.assertIs(get_compiled_graph(), first)
+
+            clear_graph_registry()
+            rebuilt = get_compiled_graph()
+            self.assertIsNot(rebuilt, first)
+            self.assertIs(get_compiled_graph(), rebuilt)
+
+            with self.assertRaises(KeyError):
+                get_compiled_graph("no-such-version")
+        finally:
+            clear_graph_registry()
+
 if __name__ == "__main__":
     unittest.main()
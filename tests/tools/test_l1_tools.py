@@ -8,7 +8,9 @@ PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')
 if PROJECT_ROOT not in sys.path:
     sys.path.insert(0, PROJECT_ROOT)
 
-from src.tools.file_tools import init_file_tools, read_file, write_file
+from src.tools.file_tools import init_file_tools, read_file, write_file, create_agent_file_tools
+from src.tools.meta_tools import META_TOOLS
+from src.utils.tool_dispatch import is_parallel_safe
 from src.tools.code_tools import python_repl, shell_command
 from src.tools.browser_tools import get_current_time
 
@@ -30,6 +32,20 @@ class TestL1Tools(unittest.TestCase):
         self.assertIn("文件已写入", res)
         mock_fm.write_file.assert_called_with("test.txt", "new")
 
+    def test_mutating_tools_are_parallel_unsafe(self):
+        """写入类工具在同一轮内串行执行，只读工具可并发"""
+        self.assertFalse(is_parallel_safe(write_file))
+        self.assertTrue(is_parallel_safe(read_file))
+
+        agent_tools = {t.name: t for t in create_agent_file_tools("ws/agent_a", MagicMock())}
+        self.assertFalse(is_parallel_safe(agent_tools["write_file"]))
+        self.assertTrue(is_parallel_safe(agent_tools["read_file"]))
+        self.assertTrue(is_parallel_safe(agent_tools["list_directory"]))
+
+        meta_tools = {t.name: t for t in META_TOOLS}
+        self.assertFalse(is_parallel_safe(meta_tools["create_new_agent"]))
+        self.assertTrue(is_parallel_safe(meta_tools["list_available_agents"]))
+
     def test_code_tools(self):
         """Test CodeTools"""
         # Python REPL
@@ -0,0 +1,80 @@
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+from collections import OrderedDict
+from unittest.mock import patch
+
+# Ensure src is importable
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from src.utils import bm25_index
+from src.utils.bm25_index import BM25Index, get_bm25_index, is_exact_id_query, reciprocal_rank_fusion, tokenize
+
+
+class TestBM25Index(unittest.TestCase):
+
+    def test_tokenize_ids_and_cjk(self):
+        tokens = tokenize("Order ORD-2024-0153 知识库")
+        self.assertIn("ord-2024-0153", tokens)
+        self.assertIn("0153", tokens)
+        self.assertIn("知识", tokens)
+        self.assertIn("库", tokens)
+
+    def test_exact_id_detection(self):
+        self.assertTrue(is_exact_id_query(" ORD-2024-0153 "))
+        self.assertTrue(is_exact_id_query("u_12345"))
+        self.assertFalse(is_exact_id_query("refund policy"))
+        self.assertFalse(is_exact_id_query("退货流程"))
+
+    def test_search_remove_and_persist(self):
+        tmp = tempfile.mkdtemp()
+        try:
+            index = get_bm25_index(tmp)
+            index.add("a", "refund policy for damaged goods", "policy.md")
+            index.add("b", "shipping policy", "policy.md")
+            index.add("c", "ORD-7 refund issued", "orders.md")
+            self.assertEqual(index.search("refund damaged")[0][0], "a")
+            self.assertEqual([d for d, _ in index.search("ord-7", exact=True)], ["c"])
+
+            index.remove_source("policy.md")
+            index.save()
+            reloaded = BM25Index.load(index.path)
+            self.assertEqual(len(reloaded), 1)
+            self.assertEqual(reloaded.search("refund")[0][0], "c")
+        finally:
+            shutil.rmtree(tmp)
+
+    def test_index_cache_is_bounded_lru(self):
+        tmp = tempfile.mkdtemp()
+        try:
+            paths = [os.path.join(tmp, str(i)) for i in range(3)]
+            for path in paths:
+                os.makedirs(path)
+            with patch.object(bm25_index, "BM25_INDEX_CACHE_SIZE", 2), \
+                    patch.object(bm25_index, "_indexes", OrderedDict()):
+                first = get_bm25_index(paths[0])
+                first.add("a", "unsaved change", "a.md")  # dirty：不可淘汰
+                get_bm25_index(paths[1])
+                get_bm25_index(paths[2])
+                self.assertIs(get_bm25_index(paths[0]), first)
+                self.assertEqual(len(bm25_index._indexes), 2)
+
+                first.save()
+                second = get_bm25_index(paths[1])  # 淘汰最久未用的 paths[2]
+                expected = [os.path.join(os.path.realpath(p), BM25Index.FILENAME) for p in paths[:2]]
+                self.assertEqual(list(bm25_index._indexes), expected)
+                self.assertIs(get_bm25_index(paths[1]), second)
+        finally:
+            shutil.rmtree(tmp)
+
+    def test_reciprocal_rank_fusion(self):
+        fused = reciprocal_rank_fusion([["a", "b", "c"], ["c", "a"]], k=60)
+        self.assertEqual([d for d, _ in fused], ["a", "c", "b"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+import os
+import sys
+import threading
+
+# Ensure src is importable
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from src.utils.embedding_service import EmbeddingService
+
+
+class FakeModel:
+    """Stands in for SentenceTransformer: embeds each text as [len(text)]."""
+
+    def __init__(self):
+        self.calls = []
+
+    def encode(self, texts, batch_size=32):
+        self.calls.append(list(texts))
+        return [[float(len(t))] for t in texts]
+
+
+class TestEmbeddingService(unittest.TestCase):
+
+    def setUp(self):
+        self.service = EmbeddingService("fake", max_batch_size=8, max_wait_ms=50)
+        self.model = FakeModel()
+        self.service._model = self.model
+
+    def test_single_and_list_shapes(self):
+        self.assertEqual(self.service.encode("abc"), [3.0])
+        self.assertEqual(self.service.encode(["a", "bb"]), [[1.0], [2.0]])
+
+    def test_concurrent_queries_are_batched(self):
+        results = {}
+
+        def worker(text):
+            results[text] = self.service.encode(text)
+
+        threads = [threading.Thread(target=worker, args=("x" * i,)) for i in range(1, 6)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        for i in range(1, 6):
+            self.assertEqual(results["x" * i], [float(i)])
+        self.assertLess(len(self.model.calls), 5)
+
+    def test_large_request_bypasses_queue(self):
+        texts = [str(i) for i in range(20)]
+        self.assertEqual(len(self.service.encode(texts)), 20)
+        self.assertEqual(self.model.calls, [texts])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import unittest
+import os
+import sys
+import threading
+import time
+
+# Ensure src is importable
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from src.utils.ingestion_jobs import IngestionJobManager, JobConflictError
+
+
+def wait_until(predicate, timeout=2.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+class TestIngestionJobManager(unittest.TestCase):
+
+    def setUp(self):
+        self.manager = IngestionJobManager(max_workers=2)
+
+    def test_one_active_job_per_agent(self):
+        release = threading.Event()
+
+        def runner(job):
+            job.files_total = 2
+            job.update_progress({"file": "a.md", "files_done": 1, "chunks": 3, "embedded": 3})
+            release.wait(2)
+            return {"files": {"a.md": 3, "b.md": 1}, "chunks": 4}
+
+        job = self.manager.submit("ws", "agent_a", runner)
+        with self.assertRaises(JobConflictError):
+            self.manager.submit("ws", "agent_a", runner)
+        # A different agent is not blocked
+        other = self.manager.submit("ws", "agent_b", lambda j: {"files": {}})
+
+        self.assertTrue(wait_until(lambda: job.chunks_embedded == 3))
+        self.assertEqual(job.to_dict()["status"], "running")
+        release.set()
+
+        self.assertTrue(wait_until(lambda: job.status == "completed"))
+        self.assertEqual(job.files_done, 2)
+        self.assertTrue(wait_until(lambda: other.status == "completed"))
+        # Finished jobs no longer block new submissions
+        self.manager.submit("ws", "agent_a", lambda j: {"files": {}})
+
+    def test_cancel_running_job(self):
+        started = threading.Event()
+
+        def runner(job):
+            started.set()
+            while not job.cancelled():
+                time.sleep(0.01)
+            return {"files": {}, "cancelled": True}
+
+        job = self.manager.submit("ws", "agent_a", runner)
+        self.assertTrue(started.wait(2))
+        self.manager.cancel(job.id)
+        self.assertTrue(wait_until(lambda: job.status == "cancelled"))
+
+    def test_failed_job_records_error(self):
+        def runner(job):
+            raise RuntimeError("boom")
+
+        job = self.manager.submit("ws", "agent_a", runner)
+        self.assertTrue(wait_until(lambda: job.status == "failed"))
+        self.assertEqual(job.error, "boom")
+
+
+if __name__ == "__main__":
+    unittest.main()
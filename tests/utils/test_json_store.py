@@ -0,0 +1,94 @@
+import unittest
+import os
+import sys
+import json
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from unittest.mock import patch
+
+# Ensure src is importable
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from src.utils import json_store
+from src.utils.json_store import JsonStore, get_json_store
+
+
+def _increment(path, n):
+    store = get_json_store(path)
+    for _ in range(n):
+        store.update(lambda d: d.__setitem__("count", d.get("count", 0) + 1))
+
+
+class TestJsonStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, "data.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_concurrent_updates_are_not_lost(self):
+        threads = [threading.Thread(target=_increment, args=(self.path, 50)) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        with ProcessPoolExecutor(max_workers=2) as pool:
+            list(pool.map(_increment, [self.path] * 2, [50] * 2))
+
+        with open(self.path, "r", encoding="utf-8") as f:
+            self.assertEqual(json.load(f)["count"], 300)
+        self.assertEqual(get_json_store(self.path).peek()["count"], 300)
+        self.assertNotIn(".data.json.tmp", os.listdir(self.tmp))
+
+    def test_failed_update_does_not_write(self):
+        store = get_json_store(self.path)
+        store.write({"a": 1})
+
+        def boom(data):
+            data["a"] = 2
+            raise ValueError("nope")
+
+        with self.assertRaises(ValueError):
+            store.update(boom)
+        self.assertEqual(store.read(), {"a": 1})
+
+    def test_cache_follows_external_writes(self):
+        store = get_json_store(self.path)
+        store.write({"v": 1})
+        reads = store.reads
+        self.assertEqual(store.peek(), {"v": 1})
+        self.assertEqual(store.reads, reads)
+
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump({"v": 22}, f)
+        self.assertEqual(store.peek(), {"v": 22})
+
+
+    def test_batch_mode_fsyncs_data_before_replace(self):
+        events = []
+        real_fsync, real_replace = os.fsync, os.replace
+
+        def fsync(fd):
+            events.append("fsync")
+            real_fsync(fd)
+
+        def replace(src, dst):
+            events.append("replace")
+            real_replace(src, dst)
+
+        store = JsonStore(os.path.join(self.tmp, "durable.json"), fsync="batch")
+        with patch.object(json_store.os, "fsync", fsync), patch.object(json_store.os, "replace", replace):
+            store.write({"a": 1})
+        # 目录 fsync 在后台批量执行，写入返回前只有临时文件的 fsync
+        self.assertEqual(events, ["fsync", "replace"])
+        self.assertEqual(store.read(), {"a": 1})
+
+
+if __name__ == '__main__':
+    unittest.main()
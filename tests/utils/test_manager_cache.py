@@ -0,0 +1,79 @@
+import unittest
+import os
+import sys
+import time
+import shutil
+import tempfile
+
+# Ensure src is importable
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from src.utils.manager_cache import ManagerCache
+
+
+class TestManagerCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.builds = 0
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def _factory(self):
+        self.builds += 1
+        return object()
+
+    def test_reuses_until_lru_eviction(self):
+        cache = ManagerCache(max_size=2)
+        first = cache.get_or_create(("u1", "llm"), self._factory)
+        self.assertIs(cache.get_or_create(("u1", "llm"), self._factory), first)
+        cache.get_or_create(("u2", "llm"), self._factory)
+        cache.get_or_create(("u1", "llm"), self._factory)  # u1 最近使用
+        cache.get_or_create(("u3", "llm"), self._factory)  # 淘汰 u2
+        self.assertIs(cache.get_or_create(("u1", "llm"), self._factory), first)
+        self.assertEqual(self.builds, 3)
+        cache.get_or_create(("u2", "llm"), self._factory)
+        self.assertEqual(self.builds, 4)
+        self.assertEqual(cache.stats()["evictions"], 2)
+
+    def test_idle_ttl_expires_entries(self):
+        cache = ManagerCache(idle_ttl=0.05)
+        first = cache.get_or_create("u1", self._factory)
+        time.sleep(0.1)
+        self.assertIsNot(cache.get_or_create("u1", self._factory), first)
+        self.assertEqual(cache.stats()["expired"], 1)
+
+    def test_watched_file_change_rebuilds(self):
+        config = os.path.join(self.tmp, "llm_providers.json")
+        with open(config, "w") as f:
+            f.write("{}")
+        cache = ManagerCache()
+        first = cache.get_or_create("u1", self._factory, watch=(config,))
+        self.assertIs(cache.get_or_create("u1", self._factory, watch=(config,)), first)
+
+        os.utime(config, ns=(0, 0))
+        second = cache.get_or_create("u1", self._factory, watch=(config,))
+        self.assertIsNot(second, first)
+        os.remove(config)
+        self.assertIsNot(cache.get_or_create("u1", self._factory, watch=(config,)), second)
+        self.assertEqual(cache.stats()["invalidations"], 2)
+
+
+    def test_replaced_dependency_rebuilds(self):
+        cache = ManagerCache()
+        fm = object()
+        first = cache.get_or_create(("u1", "workspace_manager"), self._factory, depends=(fm,))
+        self.assertIs(cache.get_or_create(("u1", "workspace_manager"), self._factory, depends=(fm,)), first)
+
+        # 依赖的 FileManager 被重建：不再返回基于旧实例构造的对象
+        new_fm = object()
+        second = cache.get_or_create(("u1", "workspace_manager"), self._factory, depends=(new_fm,))
+        self.assertIsNot(second, first)
+        self.assertIs(cache.get_or_create(("u1", "workspace_manager"), self._factory, depends=(new_fm,)), second)
+        self.assertEqual(cache.stats()["invalidations"], 1)
+
+if __name__ == '__main__':
+    unittest.main()
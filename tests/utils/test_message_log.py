@@ -0,0 +1,125 @@
+import unittest
+import os
+import sys
+import json
+import shutil
+import tempfile
+
+# Ensure src is importable
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from src.core.file_manager import FileManager
+from src.core.group_manager import GroupChatManager
+from src.utils.message_log import MessageLog
+
+
+class TestMessageLog(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.log = MessageLog(os.path.join(self.tmp, "log"))
+        self.log.SEGMENT_MAX_BYTES = 64
+        self.log.MAX_SEALED_SEGMENTS = 3
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_tail_and_compaction_keep_order(self):
+        for i in range(40):
+            self.log.append({"n": i, "content": "x" * 10})
+
+        segments = self.log._segments()
+        self.assertLessEqual(len(segments), self.log.MAX_SEALED_SEGMENTS + 2)
+        self.assertEqual([r["n"] for r in self.log], list(range(40)))
+        self.assertEqual([r["n"] for r in self.log.tail(5)], [35, 36, 37, 38, 39])
+        self.assertEqual(len(self.log.tail(100)), 40)
+
+    def test_compaction_leaves_large_head_segments(self):
+        self.log.COMPACT_MAX_BYTES = 200
+        for i in range(80):
+            self.log.append({"n": i, "content": "x" * 10})
+
+        segments = self.log._segments()
+        sizes = [os.path.getsize(path) for path in segments]
+        # 大分段被冻结，只有末尾的小分段参与合并
+        frozen = [size for size in sizes[:-1] if size >= self.log.COMPACT_MAX_BYTES]
+        self.assertGreater(len(frozen), 1)
+        self.assertLessEqual(len(sizes) - 1 - len(frozen), self.log.MAX_SEALED_SEGMENTS)
+        self.assertEqual([r["n"] for r in self.log], list(range(80)))
+
+        self.assertGreaterEqual(sizes[0], self.log.COMPACT_MAX_BYTES)
+        head = os.stat(segments[0])
+        self.log.compact()
+        after = os.stat(segments[0])
+        self.assertEqual((after.st_ino, after.st_mtime_ns), (head.st_ino, head.st_mtime_ns))
+        self.assertEqual([r["n"] for r in self.log.page(5, before=40)[0]], [35, 36, 37, 38, 39])
+
+    def test_cursor_pages_survive_compaction(self):
+        for i in range(40):
+            record = self.log.append({"n": i})
+            self.assertEqual(record["id"], i)
+
+        records, more_before, more_after = self.log.page(5, before=10)
+        self.assertEqual([r["id"] for r in records], [5, 6, 7, 8, 9])
+        self.assertEqual([r["n"] for r in records], [5, 6, 7, 8, 9])
+        self.assertTrue(more_before)
+        self.assertTrue(more_after)
+
+        records, _, more_after = self.log.page(5, after=36)
+        self.assertEqual([r["id"] for r in records], [37, 38, 39])
+        self.assertFalse(more_after)
+
+        records, more_before, _ = self.log.page(5, before=3)
+        self.assertEqual([r["id"] for r in records], [0, 1, 2])
+        self.assertFalse(more_before)
+
+    def test_missing_index_is_rebuilt(self):
+        for i in range(10):
+            self.log.append({"n": i})
+        os.remove(self.log.index_path)
+        self.assertEqual([r["n"] for r in self.log.page(3, before=5)[0]], [2, 3, 4])
+        self.assertEqual(self.log.append({"n": 10})["id"], 10)
+
+    def test_torn_last_line_is_skipped(self):
+        self.log.append({"n": 0})
+        with open(self.log._segments()[-1], "ab") as f:
+            f.write(b'{"n": 1, "trunc')
+        self.log.append({"n": 2})
+        self.assertEqual([r["n"] for r in self.log.tail(10)], [0, 2])
+
+
+class TestGroupMessages(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.tmp, "ws"))
+        self.gm = GroupChatManager(FileManager(self.tmp))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_legacy_history_is_migrated(self):
+        legacy = os.path.join(self.tmp, "ws", "_group_messages_g1.json")
+        with open(legacy, "w", encoding="utf-8") as f:
+            json.dump([{"role": "user", "content": "old"}, {"role": "agent", "content": "hi", "agent_name": "A"}], f)
+
+        new = self.gm.add_message("ws", "g1", "user", "new")
+        self.assertEqual(new["id"], 2)
+        messages = self.gm.get_messages("ws", "g1", limit=2)
+        page = self.gm.get_messages_page("ws", "g1", limit=1, before=1)
+        self.assertEqual([m["content"] for m in page["messages"]], ["old"])
+        self.assertFalse(page["has_more_before"])
+
+        self.assertFalse(os.path.exists(legacy))
+        self.assertEqual([m["content"] for m in messages], ["hi", "new"])
+        self.assertEqual(messages[0]["role"], "assistant")
+        self.assertEqual(messages[0]["name"], "A")
+
+        self.gm.clear_messages("ws", "g1")
+        self.assertEqual(self.gm.get_messages("ws", "g1"), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
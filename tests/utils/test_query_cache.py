@@ -0,0 +1,66 @@
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+
+# Ensure src is importable
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from src.utils.query_cache import TTLCache, get_query_result_cache
+from src.utils.rag_ingestion import RAGIngestion
+from test_rag_ingestion import FakeCollection, FakeEmbedder
+
+
+class TestTTLCache(unittest.TestCase):
+
+    def test_hit_miss_and_lru_eviction(self):
+        cache = TTLCache(max_size=2, ttl=60)
+        calls = []
+        for key in ("a", "b", "a", "c", "b"):
+            cache.get_or_compute(key, lambda k=key: calls.append(k) or k.upper())
+        self.assertEqual(calls, ["a", "b", "c", "b"])
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["evictions"]), (1, 4, 2))
+
+    def test_expired_entries_are_recomputed(self):
+        cache = TTLCache(max_size=4, ttl=0)
+        cache.get_or_compute("a", lambda: 1)
+        self.assertEqual(cache.get_or_compute("a", lambda: 2), 2)
+        self.assertEqual(cache.stats()["expired"], 1)
+
+
+class TestRetrievalCache(unittest.TestCase):
+
+    def setUp(self):
+        self.data_root = tempfile.mkdtemp()
+        self.rag = RAGIngestion(self.data_root, "ws", "agent_a")
+        self.rag._collection = FakeCollection()
+        self.rag._embedder = FakeEmbedder()
+        self.rag._splitter_service.split_text = lambda text, **kw: [p for p in text.split("\n\n") if p]
+        self.doc = os.path.join(self.rag.kb_path, "doc.md")
+        self._write("refund policy\n\nshipping times")
+
+    def tearDown(self):
+        shutil.rmtree(self.data_root)
+
+    def _write(self, text):
+        with open(self.doc, "w", encoding="utf-8") as f:
+            f.write(text)
+        self.rag.ingest_file(self.doc)
+
+    def test_repeated_query_hits_cache_until_store_changes(self):
+        hits = get_query_result_cache().stats()["hits"]
+        first = self.rag.query("refund  policy", top_k=2)
+        self.assertEqual(self.rag.query(" refund policy", top_k=2), first)
+        self.assertEqual(get_query_result_cache().stats()["hits"], hits + 1)
+
+        self._write("refund policy updated\n\nshipping times")
+        contents = [d["content"] for d in self.rag.query("refund policy", top_k=2)]
+        self.assertIn("refund policy updated", contents)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,214 @@
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+
+# Ensure src is importable
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from src.utils.rag_ingestion import IngestionManifest, RAGIngestion
+
+
+class FakeEmbedder:
+    def __init__(self):
+        self.encoded = []
+
+    def encode(self, texts, **kwargs):
+        if isinstance(texts, str):
+            return FakeVector([float(len(texts))])
+        self.encoded.extend(texts)
+        return FakeVector([[float(len(t))] for t in texts])
+
+
+class FakeVector(list):
+    def tolist(self):
+        return list(self)
+
+
+class FakeCollection:
+    """In-memory subset of the chromadb Collection API used by RAGIngestion."""
+
+    def __init__(self):
+        self.docs = {}
+
+    def add(self, documents, embeddings, ids, metadatas):
+        self.add_calls = getattr(self, "add_calls", []) + [len(ids)]
+        for doc, emb, cid, meta in zip(documents, embeddings, ids, metadatas):
+            self.docs[cid] = {"document": doc, "embedding": emb, "metadata": meta}
+
+    def update(self, ids, metadatas):
+        for cid, meta in zip(ids, metadatas):
+            self.docs[cid]["metadata"] = meta
+
+    def get(self, ids=None, where=None, include=None):
+        if ids is not None:
+            return {"ids": [cid for cid in ids if cid in self.docs]}
+        source = (where or {}).get("source")
+        return {"ids": [cid for cid, d in self.docs.items() if d["metadata"]["source"] == source]}
+
+    def delete(self, ids):
+        for cid in ids:
+            self.docs.pop(cid, None)
+
+    def count(self):
+        return len(self.docs)
+
+    def query(self, query_embeddings, n_results):
+        # Nearest by embedding value (chunk length for FakeEmbedder)
+        target = query_embeddings[0][0]
+        ranked = sorted(self.docs.items(), key=lambda kv: abs(kv[1]["embedding"][0] - target))[:n_results]
+        return {
+            "ids": [[cid for cid, _ in ranked]],
+            "documents": [[d["document"] for _, d in ranked]],
+            "metadatas": [[d["metadata"] for _, d in ranked]],
+            "distances": [[0.0 for _ in ranked]],
+        }
+
+
+class TestIncrementalIngestion(unittest.TestCase):
+
+    def setUp(self):
+        self.data_root = tempfile.mkdtemp()
+        self.rag = RAGIngestion(self.data_root, "ws", "agent_a")
+        self.rag._collection = FakeCollection()
+        self.rag._embedder = FakeEmbedder()
+        # One chunk per paragraph keeps the test independent of langchain
+        self.rag._splitter_service.split_text = lambda text, **kw: [p for p in text.split("\n\n") if p]
+        self.doc = os.path.join(self.rag.kb_path, "doc.md")
+
+    def tearDown(self):
+        shutil.rmtree(self.data_root)
+
+    def _write(self, text):
+        with open(self.doc, "w", encoding="utf-8") as f:
+            f.write(text)
+
+    def test_unchanged_file_is_skipped(self):
+        self._write("alpha\n\nbeta")
+        self.assertEqual(self.rag.ingest_file(self.doc), 2)
+        self.assertEqual(len(self.rag._embedder.encoded), 2)
+
+        self.assertEqual(self.rag.ingest_file(self.doc), 2)
+        self.assertEqual(len(self.rag._embedder.encoded), 2)
+
+    def test_modified_file_only_embeds_changed_chunks(self):
+        self._write("alpha\n\nbeta\n\ngamma")
+        self.rag.ingest_file(self.doc)
+        self.rag._embedder.encoded.clear()
+
+        self._write("alpha\n\nBETA2\n\ngamma")
+        self.rag.ingest_file(self.doc)
+
+        self.assertEqual(self.rag._embedder.encoded, ["BETA2"])
+        docs = sorted(d["document"] for d in self.rag._collection.docs.values())
+        self.assertEqual(docs, ["BETA2", "alpha", "gamma"])
+
+    def test_streaming_batches_across_files(self):
+        self.rag.READ_BLOCK_CHARS = 16
+        self.rag.EMBED_BATCH_SIZE = 2
+        self.rag.STORE_BATCH_SIZE = 3
+        paths = []
+        for name in ("a.txt", "b.txt"):
+            path = os.path.join(self.rag.kb_path, name)
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("\n\n".join(f"{name} paragraph {i}" for i in range(5)))
+            paths.append(path)
+
+        report = self.rag.ingest_files(paths)
+
+        self.assertEqual(report["files"], {"a.txt": 5, "b.txt": 5})
+        self.assertEqual(report["embedded"], 10)
+        self.assertIn("chunks_per_sec", report)
+        self.assertTrue(all(n <= 4 for n in self.rag._collection.add_calls))
+        docs = sorted(d["document"] for d in self.rag._collection.docs.values())
+        self.assertIn("a.txt paragraph 4", docs)
+
+    def test_failed_final_flush_keeps_manifest_consistent(self):
+        self.rag.EMBED_BATCH_SIZE = 2
+        self.rag.STORE_BATCH_SIZE = 2
+        self._write("alpha\n\nbeta\n\ngamma")
+        collection = self.rag._collection
+        add = collection.add
+
+        def failing_add(**kwargs):
+            # 第一批写入成功，最后一批（循环结束后的 flush）失败
+            if getattr(collection, "add_calls", None):
+                raise RuntimeError("disk full")
+            add(**kwargs)
+
+        collection.add = failing_add
+        report = self.rag.ingest_files([self.doc])
+        self.assertIn("disk full", report["files"]["doc.md"])
+        self.assertEqual(report["chunks"], 0)
+        self.assertIsNone(IngestionManifest(self.rag.vs_path).get("doc.md"))
+        self.assertEqual(collection.docs, {})
+
+        # 下次导入全量重建，不会重复写入
+        collection.add = add
+        report = self.rag.ingest_files([self.doc])
+        self.assertEqual(report["files"], {"doc.md": 3})
+        self.assertEqual(sorted(d["document"] for d in collection.docs.values()), ["alpha", "beta", "gamma"])
+
+    def test_parallel_ingestion_reports_stage_timings(self):
+        paths = []
+        for name in ("a.md", "b.md", "c.md"):
+            path = os.path.join(self.rag.kb_path, name)
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(f"content of {name}")
+            paths.append(path)
+
+        report = self.rag.ingest_files_parallel(paths, workers=2)
+
+        self.assertEqual(report["workers"], 2)
+        self.assertEqual(set(report["files"]), {"a.md", "b.md", "c.md"})
+        self.assertTrue(all(isinstance(v, int) and v >= 1 for v in report["files"].values()))
+        for stage in ("load", "clean", "split", "embed", "store"):
+            self.assertIn(stage, report["timings"])
+
+        # Unchanged files never reach the process pool again
+        again = self.rag.ingest_files_parallel(paths, workers=2)
+        self.assertEqual(again["embedded"], 0)
+
+
+class TestHybridQuery(unittest.TestCase):
+
+    def setUp(self):
+        self.data_root = tempfile.mkdtemp()
+        self.rag = RAGIngestion(self.data_root, "ws", "agent_a")
+        self.rag._collection = FakeCollection()
+        self.rag._embedder = FakeEmbedder()
+        self.rag._splitter_service.split_text = lambda text, **kw: [p for p in text.split("\n\n") if p]
+        self.doc = os.path.join(self.rag.kb_path, "orders.md")
+        with open(self.doc, "w", encoding="utf-8") as f:
+            f.write("订单 ORD-2024-0153 已发货\n\n订单 ORD-2024-0154 待付款\n\n退货流程说明")
+        self.rag.ingest_file(self.doc)
+
+    def tearDown(self):
+        shutil.rmtree(self.data_root)
+
+    def test_exact_id_query_skips_embedder(self):
+        self.rag._embedder.encode = lambda *a, **kw: self.fail("embedder should not be called")
+        docs = self.rag.query("ORD-2024-0154", top_k=3)
+        self.assertEqual(docs[0]["content"], "订单 ORD-2024-0154 待付款")
+        self.assertEqual(docs[0]["source"], "orders.md")
+        self.assertEqual(len(docs), 1)
+
+    def test_fused_query_ranks_lexical_match_first(self):
+        docs = self.rag.query("退货流程", top_k=2)
+        self.assertEqual(docs[0]["content"], "退货流程说明")
+        self.assertLessEqual(docs[0]["score"], 1.0)
+
+    def test_index_follows_changed_chunks(self):
+        with open(self.doc, "w", encoding="utf-8") as f:
+            f.write("订单 ORD-2024-0153 已发货\n\n退货流程说明")
+        self.rag.ingest_file(self.doc)
+        self.rag._embedder.encode = lambda *a, **kw: FakeVector([0.0])
+        docs = self.rag.query("ORD-2024-0154", top_k=3)
+        self.assertNotIn("订单 ORD-2024-0154 待付款", [d["content"] for d in docs])
+
+
+if __name__ == "__main__":
+    unittest.main()
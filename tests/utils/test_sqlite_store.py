@@ -0,0 +1,111 @@
+import unittest
+import os
+import sys
+import json
+import shutil
+import tempfile
+
+# Ensure src is importable
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+SCRIPTS_DIR = os.path.join(PROJECT_ROOT, "scripts")
+if SCRIPTS_DIR not in sys.path:
+    sys.path.insert(0, SCRIPTS_DIR)
+
+from src.core.agent_registry import AgentRegistry
+from src.core.file_manager import FileManager
+from src.core.group_manager import GroupChatManager
+from src.utils.message_log import MessageLog
+from src.utils.sqlite_store import SQLiteUserStore, get_sqlite_db
+from migrate_json_to_sqlite import migrate_data_root
+
+
+class TestSQLiteBackend(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.tmp, "workspace_a"))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_agent_registry(self):
+        registry = AgentRegistry(os.path.join(self.tmp, "agents_registry.json"), backend="sqlite")
+        registry.register_agent("a1", {"name": "A1", "workspace": "ws1", "tags": ["x", "y"]})
+        registry.register_agent("a2", {"name": "A2", "workspace": "ws2", "tags": ["y"]})
+        with self.assertRaises(ValueError):
+            registry.register_agent("a1", {"name": "dup"})
+
+        registry.update_agent("a1", {"tags": ["z"]})
+        self.assertEqual(registry.get_agent("a1")["tags"], ["z"])
+        self.assertIn("updated_at", registry.get_agent("a1"))
+        self.assertEqual([a["id"] for a in registry.list_agents(workspace="ws2")], ["a2"])
+        self.assertEqual([a["id"] for a in registry.list_agents(tag="y")], ["a2"])
+        self.assertEqual(registry.get_all_tags(), ["y", "z"])
+
+        registry.remove_agent("a2")
+        self.assertIsNone(registry.get_agent("a2"))
+        with self.assertRaises(KeyError):
+            registry.update_agent("a2", {})
+        self.assertFalse(os.path.exists(os.path.join(self.tmp, "agents_registry.json")))
+
+    def test_group_manager_cursor_pages(self):
+        gm = GroupChatManager(FileManager(self.tmp), backend="sqlite")
+        group = gm.create_group("workspace_a", "Team", ["a1"], "a1")
+        self.assertEqual(group["id"], "group_team_1")
+        gm.update_group("workspace_a", group["id"], {"name": "Renamed", "id": "hijack"})
+        self.assertEqual(gm.get_group("workspace_a", group["id"])["name"], "Renamed")
+
+        for i in range(10):
+            self.assertEqual(gm.add_message("workspace_a", group["id"], "user", f"m{i}")["id"], i)
+        page = gm.get_messages_page("workspace_a", group["id"], limit=3)
+        self.assertEqual([m["content"] for m in page["messages"]], ["m7", "m8", "m9"])
+        self.assertTrue(page["has_more_before"])
+        self.assertFalse(page["has_more_after"])
+        older = gm.get_messages_page("workspace_a", group["id"], limit=3, before=page["messages"][0]["id"])
+        self.assertEqual([m["content"] for m in older["messages"]], ["m4", "m5", "m6"])
+        newer = gm.get_messages_page("workspace_a", group["id"], limit=5, after=7)
+        self.assertEqual([m["content"] for m in newer["messages"]], ["m8", "m9"])
+        self.assertFalse(newer["has_more_after"])
+
+        gm.delete_group("workspace_a", group["id"])
+        self.assertEqual(gm.list_groups("workspace_a"), [])
+
+    def test_user_store_phone_is_unique(self):
+        users = SQLiteUserStore(get_sqlite_db(self.tmp))
+        self.assertTrue(users.insert("u1", {"phone": "123", "username": "a"}))
+        self.assertFalse(users.insert("u2", {"phone": "123", "username": "b"}))
+        self.assertEqual(users.find_by_phone("123")[0], "u1")
+        self.assertIsNone(users.find_by_phone("456"))
+
+    def test_migrate_json_layout(self):
+        with open(os.path.join(self.tmp, "users.json"), "w", encoding="utf-8") as f:
+            json.dump({"u1": {"phone": "123", "username": "a"}}, f)
+        user_root = os.path.join(self.tmp, "u1")
+        ws_path = os.path.join(user_root, "workspace_a")
+        os.makedirs(ws_path)
+        with open(os.path.join(user_root, "agents_registry.json"), "w", encoding="utf-8") as f:
+            json.dump({"version": "1.0", "agents": {"a1": {"name": "A1", "workspace": "workspace_a"}}}, f)
+        with open(os.path.join(ws_path, "_group_chats.json"), "w", encoding="utf-8") as f:
+            json.dump([{"id": "g1", "name": "G1"}, {"id": "g2", "name": "G2"}], f)
+        log = MessageLog(os.path.join(ws_path, "_group_messages", "g1"))
+        for i in range(3):
+            log.append({"role": "user", "content": f"m{i}"})
+        with open(os.path.join(ws_path, "_group_messages_g2.json"), "w", encoding="utf-8") as f:
+            json.dump([{"role": "user", "content": "legacy"}], f)
+
+        migrate_data_root(self.tmp)
+        migrate_data_root(self.tmp)  # idempotent
+
+        self.assertEqual(SQLiteUserStore(get_sqlite_db(self.tmp)).find_by_phone("123")[0], "u1")
+        registry = AgentRegistry(os.path.join(user_root, "agents_registry.json"), backend="sqlite")
+        self.assertEqual(registry.get_agent("a1")["name"], "A1")
+        gm = GroupChatManager(FileManager(user_root), backend="sqlite")
+        self.assertEqual([g["id"] for g in gm.list_groups("workspace_a")], ["g1", "g2"])
+        self.assertEqual([m["content"] for m in gm.get_messages("workspace_a", "g1")], ["m0", "m1", "m2"])
+        self.assertEqual([m["content"] for m in gm.get_messages("workspace_a", "g2")], ["legacy"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,138 @@
+import unittest
+import os
+import sys
+import time
+import asyncio
+import threading
+
+# Ensure src is importable
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from src.utils.tool_dispatch import dispatch_async, dispatch_sync
+
+
+class _Probe:
+    """记录同时运行的调用数与串行通道内的执行顺序"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.running = 0
+        self.peak = 0
+        self.unsafe_running = 0
+        self.unsafe_peak = 0
+        self.serial_order = []
+        self.overlapped = False  # 安全调用与不安全调用是否同时运行过
+
+    def enter(self, call):
+        with self.lock:
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+            if not call["safe"]:
+                self.unsafe_running += 1
+                self.unsafe_peak = max(self.unsafe_peak, self.unsafe_running)
+                self.serial_order.append(call["name"])
+            if 0 < self.unsafe_running < self.running:
+                self.overlapped = True
+
+    def leave(self, call):
+        with self.lock:
+            self.running -= 1
+            if not call["safe"]:
+                self.unsafe_running -= 1
+
+
+def _calls(delays, unsafe=()):
+    return [{"name": f"t{i}", "delay": d, "safe": i not in unsafe} for i, d in enumerate(delays)]
+
+
+class TestDispatchAsync(unittest.TestCase):
+
+    def _run(self, calls, max_concurrency=4, on_result=None):
+        probe = _Probe()
+
+        async def run_one(call):
+            probe.enter(call)
+            try:
+                await asyncio.sleep(call["delay"])
+                if call["name"] == "boom":
+                    raise ValueError("boom")
+                return call["name"].upper()
+            finally:
+                probe.leave(call)
+
+        outcomes = asyncio.run(dispatch_async(calls, run_one, lambda c: c["safe"],
+                                              max_concurrency=max_concurrency, on_result=on_result))
+        return outcomes, probe
+
+    def test_results_keep_call_order(self):
+        completed = []
+
+        async def on_result(index, call, outcome):
+            completed.append(index)
+
+        outcomes, _ = self._run(_calls([0.06, 0.01, 0.03]), on_result=on_result)
+        self.assertEqual(outcomes, ["T0", "T1", "T2"])
+        # 回调按完成顺序，结果列表按调用顺序
+        self.assertEqual(completed, [1, 2, 0])
+
+    def test_runs_concurrently_under_cap(self):
+        _, probe = self._run(_calls([0.05] * 6), max_concurrency=3)
+        self.assertEqual(probe.peak, 3)
+
+    def test_unsafe_calls_are_serial_in_call_order(self):
+        calls = _calls([0.03, 0.01, 0.03, 0.01], unsafe=(0, 1, 3))
+        outcomes, probe = self._run(calls, max_concurrency=8)
+        self.assertEqual(outcomes, ["T0", "T1", "T2", "T3"])
+        self.assertEqual(probe.serial_order, ["t0", "t1", "t3"])
+        # 串行通道只占一个名额：最多 1 个不安全调用 + 1 个安全调用同时运行
+        self.assertLessEqual(probe.peak, 2)
+
+    def test_safe_calls_overlap_the_serial_lane(self):
+        # 写入类调用穿插在读取之间：写入彼此不重叠且按调用顺序执行，读取与写入同时进行
+        calls = _calls([0.04, 0.04, 0.04, 0.04, 0.04], unsafe=(0, 2, 4))
+        outcomes, probe = self._run(calls, max_concurrency=4)
+        self.assertEqual(outcomes, ["T0", "T1", "T2", "T3", "T4"])
+        self.assertEqual(probe.serial_order, ["t0", "t2", "t4"])
+        self.assertEqual(probe.unsafe_peak, 1)
+        self.assertTrue(probe.overlapped)
+
+    def test_exception_becomes_outcome(self):
+        calls = [{"name": "ok", "delay": 0, "safe": True}, {"name": "boom", "delay": 0, "safe": True}]
+        outcomes, _ = self._run(calls)
+        self.assertEqual(outcomes[0], "OK")
+        self.assertIsInstance(outcomes[1], ValueError)
+
+
+class TestDispatchSync(unittest.TestCase):
+
+    def test_order_cap_and_serial_lane(self):
+        probe = _Probe()
+
+        def run_one(call):
+            probe.enter(call)
+            try:
+                time.sleep(call["delay"])
+                return call["name"].upper()
+            finally:
+                probe.leave(call)
+
+        calls = _calls([0.04, 0.01, 0.04, 0.01, 0.04, 0.01], unsafe=(1, 3))
+        outcomes = dispatch_sync(calls, run_one, lambda c: c["safe"], max_concurrency=3)
+        self.assertEqual(outcomes, [c["name"].upper() for c in calls])
+        self.assertEqual(probe.serial_order, ["t1", "t3"])
+        self.assertLessEqual(probe.peak, 3)
+        self.assertGreater(probe.peak, 1)
+        self.assertEqual(probe.unsafe_peak, 1)
+
+    def test_single_worker_runs_inline(self):
+        threads = []
+        outcomes = dispatch_sync(_calls([0, 0]), lambda c: threads.append(threading.get_ident()) or c["name"],
+                                 lambda c: c["safe"], max_concurrency=1)
+        self.assertEqual(outcomes, ["t0", "t1"])
+        self.assertEqual(set(threads), {threading.get_ident()})
+
+
+if __name__ == "__main__":
+    unittest.main()
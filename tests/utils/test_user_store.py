@@ -0,0 +1,55 @@
+import unittest
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+
+# Ensure src is importable
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from src.utils.user_store import JsonUserStore
+
+
+class TestJsonUserStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, "users.json")
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump({f"u{i}": {"phone": f"138{i:08d}", "username": f"user{i}"} for i in range(1000)}, f)
+        self.users = JsonUserStore(self.path)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_find_by_phone_uses_cached_index(self):
+        self.assertEqual(self.users.find_by_phone("13800000042")[0], "u42")
+        self.assertIsNone(self.users.find_by_phone("000"))
+        self.assertEqual(self.users.find_by_phone("13800000999")[1]["username"], "user999")
+        self.assertEqual(self.users.rebuilds, 1)
+
+    def test_insert_updates_index_without_rebuild(self):
+        self.users.find_by_phone("13800000001")
+        self.assertTrue(self.users.insert("new", {"phone": "139", "username": "new"}))
+        self.assertFalse(self.users.insert("dup", {"phone": "139", "username": "dup"}))
+        self.assertEqual(self.users.find_by_phone("139")[0], "new")
+        self.assertEqual(self.users.rebuilds, 1)
+        with open(self.path, "r", encoding="utf-8") as f:
+            self.assertNotIn("dup", json.load(f))
+
+    def test_external_write_rebuilds_index(self):
+        self.users.find_by_phone("13800000001")
+        time.sleep(0.01)
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump({"other": {"phone": "150", "username": "other"}}, f)
+        self.assertIsNone(self.users.find_by_phone("13800000001"))
+        self.assertEqual(self.users.find_by_phone("150")[0], "other")
+        self.assertEqual(self.users.rebuilds, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
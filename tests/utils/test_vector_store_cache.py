@@ -0,0 +1,155 @@
+import unittest
+import os
+import sys
+import types
+import shutil
+import tempfile
+from unittest.mock import patch
+
+# Ensure src is importable
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from src.utils.vector_store_cache import ChromaClientCache
+
+
+class FakeSystem:
+    def __init__(self):
+        self.stopped = False
+
+    def stop(self):
+        self.stopped = True
+
+
+class FakeSharedSystemClient:
+    """chromadb.api.client.SharedSystemClient：按路径共享 System"""
+
+    _identifier_to_system = {}
+
+
+class FakeClient:
+    """chromadb.PersistentClient 中 ChromaClientCache 用到的部分（同一路径复用已注册的 System）"""
+
+    created = []
+
+    def __init__(self, path):
+        self.path = path
+        self._system = FakeSharedSystemClient._identifier_to_system.setdefault(path, FakeSystem())
+        self.collections = {}
+        FakeClient.created.append(self)
+
+    def get_or_create_collection(self, name, metadata=None):
+        if self._system.stopped:
+            raise RuntimeError("client used after stop()")
+        return self.collections.setdefault(name, object())
+
+    def delete_collection(self, name):
+        self.collections.pop(name, None)
+
+
+def _fake_chromadb_modules():
+    chromadb = types.ModuleType("chromadb")
+    chromadb.PersistentClient = FakeClient
+    client_module = types.ModuleType("chromadb.api.client")
+    client_module.SharedSystemClient = FakeSharedSystemClient
+    return {"chromadb": chromadb, "chromadb.api": types.ModuleType("chromadb.api"),
+            "chromadb.api.client": client_module}
+
+
+class TestChromaClientCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        FakeClient.created = []
+        FakeSharedSystemClient._identifier_to_system = {}
+        patcher = patch.dict(sys.modules, _fake_chromadb_modules())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def _path(self, name):
+        return os.path.join(self.tmp, name, "vector_store")
+
+    def test_hit_reuses_client_and_collection(self):
+        cache = ChromaClientCache(max_size=2)
+        first = cache.get_collection(self._path("a"), "kb")
+        self.assertIs(cache.get_collection(self._path("a"), "kb"), first)
+        self.assertEqual(len(FakeClient.created), 1)
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+
+    def test_eviction_closes_idle_client(self):
+        cache = ChromaClientCache(max_size=1)
+        cache.get_collection(self._path("a"), "kb")
+        cache.get_collection(self._path("b"), "kb")
+        client_a, client_b = FakeClient.created
+        self.assertTrue(client_a._system.stopped)
+        self.assertFalse(client_b._system.stopped)
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_evicted_path_is_unregistered_and_reopens(self):
+        cache = ChromaClientCache(max_size=1)
+        cache.get_collection(self._path("a"), "kb")
+        key_a = os.path.realpath(self._path("a"))
+        self.assertIn(key_a, FakeSharedSystemClient._identifier_to_system)
+
+        cache.get_collection(self._path("b"), "kb")  # 淘汰并关闭 a
+        self.assertNotIn(key_a, FakeSharedSystemClient._identifier_to_system)
+
+        # 重新打开得到新的 System，而不是已停止的旧 System
+        cache.get_collection(self._path("a"), "kb")
+        self.assertFalse(FakeClient.created[-1]._system.stopped)
+
+        cache.close(self._path("a"))
+        self.assertNotIn(key_a, FakeSharedSystemClient._identifier_to_system)
+
+    def test_collection_is_opened_outside_the_lock(self):
+        cache = ChromaClientCache(max_size=2)
+        cache.get_client(self._path("a"))
+        seen = []
+
+        def get_or_create_collection(name, metadata=None):
+            seen.append(cache._lock._is_owned())
+            return object()
+
+        FakeClient.created[0].get_or_create_collection = get_or_create_collection
+        first = cache.get_collection(self._path("a"), "kb")
+        self.assertEqual(seen, [False])
+        self.assertIs(cache.get_collection(self._path("a"), "kb"), first)
+
+    def test_eviction_keeps_client_open_while_in_use(self):
+        cache = ChromaClientCache(max_size=1)
+        collection, release = cache.open_collection(self._path("a"), "kb")
+        cache.get_collection(self._path("b"), "kb")  # 淘汰 a，但 a 仍被持有
+        client_a = FakeClient.created[0]
+        self.assertFalse(client_a._system.stopped)
+        self.assertEqual(cache.stats()["retired_in_use"], 1)
+
+        # 持有期间重新打开同一路径复用原条目，不另建 client
+        again, release_again = cache.open_collection(self._path("a"), "kb")
+        self.assertIs(again, collection)
+        self.assertEqual(len(FakeClient.created), 2)
+
+        cache.get_collection(self._path("b"), "kb")  # 再次淘汰 a
+        release()
+        self.assertFalse(client_a._system.stopped)
+        release()  # 重复 release 无效
+        release_again()
+        self.assertTrue(client_a._system.stopped)
+        self.assertEqual(cache.stats()["retired_in_use"], 0)
+
+    def test_close_waits_for_holders(self):
+        cache = ChromaClientCache(max_size=4)
+        _, release = cache.open_collection(self._path("a"), "kb")
+        cache.close(self._path("a"))
+        client_a = FakeClient.created[0]
+        self.assertFalse(client_a._system.stopped)
+        release()
+        self.assertTrue(client_a._system.stopped)
+
+
+if __name__ == "__main__":
+    unittest.main()